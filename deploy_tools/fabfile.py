@@ -4,7 +4,7 @@ import random
 
 REPO_URL = 'https://german970814@bitbucket.org/ingeniarte/contribuciones.git'
 FOLDER_ROOT = 'contribuciones'
-STRUCTURE_PROJECT = ('static', 'source', 'media', )
+STRUCTURE_PROJECT = ('static', 'source', 'media', 'cache', )
 ACTUAL_BRANCH = 'master'
 
 env.user = 'conial'
@@ -20,6 +20,7 @@ def deploy():
     _update_virtualenv(env.user, env.host, source_folder)
     _update_static_files(source_folder, env.user, env.host)
     _update_database_info(source_folder)
+    _update_cache_info(source_folder)
     _update_database(source_folder, env.user, env.host)
     _restart_gunicorn_server(env.user)
 
@@ -79,6 +80,11 @@ def _update_database_info(source_folder):
     sed(database_path, 'PASSWORD = .+$', 'PASSWORD = "123456"')
 
 
+def _update_cache_info(source_folder):
+    cache_path = source_folder + '/digitacion/cache.py'
+    sed(cache_path, "ENTORNO = .+$", "ENTORNO = 'produccion'")
+
+
 def _update_database(source_folder, user, site_name):
     run('cd %s && /home/%s/.envs/contribuciones/bin/python3 manage.py migrate --noinput' % (
         source_folder, user
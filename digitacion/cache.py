@@ -0,0 +1,61 @@
+"""Cache Configuration"""
+
+import os
+
+# 'desarrollo': cache local en cada proceso, y los templates se leen en cada render
+# 'produccion': cache compartido en archivos entre los procesos, y templates compilados en memoria
+# el entorno tambien define las conexiones a la base de datos, ver database.get_databases
+ENTORNO = 'desarrollo'
+
+# carpeta del cache compartido, al lado de media y static
+LOCATION = os.path.abspath(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '../cache'))
+
+# segundos por defecto de las llaves
+TIMEOUT = 300
+
+# numero maximo de llaves del cache local de cada proceso
+MAX_ENTRIES_LOCAL = 1000
+
+# numero maximo de archivos del cache compartido
+MAX_ENTRIES_SHARED = 10000
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+
+def get_caches(entorno=ENTORNO):
+    """
+    Retorna la configuracion de CACHES: 'default' es compartido entre los procesos en
+    produccion (sesiones, versiones de los datos en cache), y 'local' es un LRU por proceso.
+    """
+
+    local = {
+        'BACKEND': 'main.caches.LRUCache',
+        'LOCATION': 'local',
+        'TIMEOUT': TIMEOUT,
+        'OPTIONS': {'MAX_ENTRIES': MAX_ENTRIES_LOCAL},
+    }
+
+    if entorno == 'produccion':
+        default = {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': LOCATION,
+            'TIMEOUT': TIMEOUT,
+            'OPTIONS': {'MAX_ENTRIES': MAX_ENTRIES_SHARED},
+        }
+    else:
+        default = dict(local, LOCATION='default')
+
+    return {'default': default, 'local': local}
+
+
+def get_template_loaders(entorno=ENTORNO):
+    """Retorna los loaders de los templates, en produccion los templates se compilan una vez."""
+
+    if entorno == 'produccion':
+        return [('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)]
+    return TEMPLATE_LOADERS
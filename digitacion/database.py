@@ -10,4 +10,50 @@ PORT = '5432'
 
 HOST = '127.0.0.1'
 
-ENGINE = 'django.db.backends.postgresql_psycopg2'
+ENGINE = 'digitacion.db.postgresql'
+
+# segundos que una conexion se mantiene abierta entre peticiones en produccion
+CONN_MAX_AGE = 60
+
+# verifica las conexiones persistentes antes de usarlas, por si la base de datos las cerro
+CONN_HEALTH_CHECKS = True
+
+# conexiones libres del pool de cada proceso, para workers con hilos (0 sin pool)
+POOL_MAXIMO = 0
+
+# servidor de la replica de lectura para los reportes y el dashboard (None sin replica)
+LECTURA_HOST = None
+
+
+def get_databases(entorno='desarrollo'):
+    """
+    Retorna la configuracion de DATABASES. En desarrollo cada peticion abre su conexion; en
+    produccion las conexiones se mantienen abiertas en cada hilo, o vuelven al pool del proceso
+    al terminar la peticion si POOL_MAXIMO no es 0. Si hay LECTURA_HOST se agrega el alias
+    'lectura' de la replica.
+    """
+
+    default = {
+        'ENGINE': ENGINE,
+        'NAME': NAME,
+        'USER': USER,
+        'PASSWORD': PASSWORD,
+        'PORT': PORT,
+        'HOST': HOST,
+        'CONN_MAX_AGE': 0,
+    }
+
+    if entorno == 'produccion':
+        default['CONN_HEALTH_CHECKS'] = CONN_HEALTH_CHECKS
+        if POOL_MAXIMO:
+            default['POOL'] = {'MAXIMO': POOL_MAXIMO}
+        else:
+            default['CONN_MAX_AGE'] = CONN_MAX_AGE
+
+    databases = {'default': default}
+
+    if LECTURA_HOST:
+        # en las pruebas la replica usa la base de datos de pruebas principal
+        databases['lectura'] = dict(default, HOST=LECTURA_HOST, TEST={'MIRROR': 'default'})
+
+    return databases
@@ -0,0 +1,14 @@
+"""
+Backends de base de datos con health checks y pool de conexiones en el proceso.
+
+Ademas de las opciones de Django, cada base de datos acepta:
+
+    'CONN_HEALTH_CHECKS': verifica la conexion persistente antes de usarla en cada peticion.
+    'POOL': {'MAXIMO': n}, guarda hasta n conexiones libres para los hilos del proceso.
+"""
+
+# backends por vendor de la base de datos
+ENGINES = {
+    'postgresql': 'digitacion.db.postgresql',
+    'sqlite': 'digitacion.db.sqlite3',
+}
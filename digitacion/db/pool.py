@@ -0,0 +1,171 @@
+"""
+Pool de conexiones por proceso, y mixin para los DatabaseWrapper de Django.
+
+Los procesos hijos (fork) heredan los pools y las conexiones del padre, pero no las
+pueden usar: compartirian el socket con el padre. Los pools y las conexiones guardan
+el pid del proceso que los creo, y en otro proceso se descartan sin cerrarlos, porque
+cerrarlos terminaria la sesion del padre.
+"""
+
+# Python imports
+from collections import deque
+import os
+import threading
+
+
+# pools del proceso, por alias de la base de datos
+POOLS = {}
+
+_lock = threading.Lock()
+
+
+class Pool(object):
+    """Conexiones abiertas libres de un alias, compartidas entre los hilos del proceso."""
+
+    def __init__(self, maximo):
+        self.maximo = maximo
+        # proceso dueño de las conexiones
+        self.pid = os.getpid()
+        self.libres = deque()
+        self.lock = threading.Lock()
+        # contadores para el monitoreo
+        self.creadas = 0
+        self.reusadas = 0
+
+    def obtener(self):
+        """Retorna la ultima conexion libre, o None si no hay."""
+        with self.lock:
+            return self.libres.pop() if self.libres else None
+
+    def devolver(self, conexion):
+        """Guarda la conexion, retorna False si el pool esta lleno y se debe cerrar."""
+        with self.lock:
+            if len(self.libres) >= self.maximo:
+                return False
+            self.libres.append(conexion)
+            return True
+
+    def contar(self, contador):
+        with self.lock:
+            setattr(self, contador, getattr(self, contador) + 1)
+
+    def cerrar(self):
+        """Cierra las conexiones libres."""
+        with self.lock:
+            while self.libres:
+                conexion = self.libres.pop()
+                try:
+                    conexion.close()
+                except Exception:
+                    # la conexion ya estaba cerrada
+                    pass
+
+
+def get_pool(alias, maximo):
+    with _lock:
+        # los pools heredados del proceso padre se descartan, sin cerrar sus conexiones
+        if alias not in POOLS or POOLS[alias].pid != os.getpid():
+            POOLS[alias] = Pool(maximo)
+        return POOLS[alias]
+
+
+def cerrar_pools(*aliases):
+    """Cierra las conexiones libres de los pools de los alias, o de todos los pools del proceso."""
+    with _lock:
+        for alias in aliases or list(POOLS):
+            pool = POOLS.pop(alias, None)
+            if pool is not None and pool.pid == os.getpid():
+                pool.cerrar()
+
+
+class ConexionesMixin(object):
+    """
+    Agrega al DatabaseWrapper el health check de las conexiones persistentes, y el pool.
+
+    Con el pool, CONN_MAX_AGE debe ser 0: la conexion vuelve al pool al terminar cada
+    peticion y la toma el siguiente hilo que la necesite.
+    """
+
+    # la conexion se debe verificar antes de usarla
+    health_check_pendiente = False
+    # proceso que abrio la conexion
+    pid_conexion = None
+
+    @property
+    def pool(self):
+        opciones = self.settings_dict.get('POOL')
+        if not opciones:
+            return None
+        return get_pool(self.alias, opciones.get('MAXIMO', 10))
+
+    def conexion_usable(self, conexion):
+        """Verifica una conexion que no esta en uso, sin los wrappers de Django."""
+        try:
+            conexion.cursor().execute('SELECT 1')
+        except self.Database.Error:
+            return False
+        return True
+
+    def cerrar_conexion(self, conexion):
+        try:
+            conexion.close()
+        except self.Database.Error:
+            pass
+
+    def reusar_conexion(self, conexion):
+        """Prepara una conexion del pool para este wrapper."""
+        return conexion
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is not None:
+            conexion = pool.obtener()
+            while conexion is not None:
+                if not self.settings_dict.get('CONN_HEALTH_CHECKS') or self.conexion_usable(conexion):
+                    pool.contar('reusadas')
+                    return self.reusar_conexion(conexion)
+                # la conexion se cerro mientras estaba libre
+                self.cerrar_conexion(conexion)
+                conexion = pool.obtener()
+            pool.contar('creadas')
+        return super().get_new_connection(conn_params)
+
+    def connect(self):
+        self.pid_conexion = os.getpid()
+        super().connect()
+
+    def conexion_heredada(self):
+        """Retorna True si la conexion la abrio otro proceso, antes del fork."""
+        return self.connection is not None and self.pid_conexion != os.getpid()
+
+    def _close(self):
+        if self.conexion_heredada():
+            # la conexion es del proceso padre, no se cierra ni vuelve al pool
+            return
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        try:
+            # la conexion vuelve al pool sin transacciones abiertas
+            self.connection.rollback()
+        except self.Database.Error:
+            return super()._close()
+        if not pool.devolver(self.connection):
+            return super()._close()
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        # la conexion que sigue abierta se verifica la siguiente vez que se use
+        self.health_check_pendiente = bool(
+            self.connection is not None and self.settings_dict.get('CONN_HEALTH_CHECKS')
+        )
+
+    def ensure_connection(self):
+        if self.conexion_heredada():
+            # el proceso hijo abre su propia conexion
+            self.connection = None
+        if self.health_check_pendiente:
+            self.health_check_pendiente = False
+            if self.connection is not None and not self.in_atomic_block and not self.is_usable():
+                self.close()
+        super().ensure_connection()
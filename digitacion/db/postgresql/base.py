@@ -0,0 +1,15 @@
+"""Backend de postgresql con health checks y pool de conexiones."""
+
+# Django imports
+from django.db.backends.postgresql_psycopg2 import base
+
+# Locale imports
+from ..pool import ConexionesMixin
+
+
+class DatabaseWrapper(ConexionesMixin, base.DatabaseWrapper):
+
+    def reusar_conexion(self, conexion):
+        # igual que get_new_connection, el nivel de aislamiento se toma de las opciones o de la conexion
+        self.isolation_level = self.settings_dict['OPTIONS'].get('isolation_level', conexion.isolation_level)
+        return conexion
@@ -0,0 +1,11 @@
+"""Backend de sqlite con health checks y pool de conexiones, para desarrollo y pruebas."""
+
+# Django imports
+from django.db.backends.sqlite3 import base
+
+# Locale imports
+from ..pool import ConexionesMixin
+
+
+class DatabaseWrapper(ConexionesMixin, base.DatabaseWrapper):
+    pass
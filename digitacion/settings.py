@@ -12,7 +12,7 @@ https://docs.djangoproject.com/en/1.8/ref/settings/
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 import os
-from . import database
+from . import cache, database
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -53,6 +53,7 @@ MIDDLEWARE_CLASSES = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'main.middleware.EscrituraMiddleware',
 ]
 
 ROOT_URLCONF = 'digitacion.urls'
@@ -61,8 +62,8 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': cache.get_template_loaders(),
             'context_processors': [
                 'django.template.context_processors.media',
                 'django.template.context_processors.debug',
@@ -81,16 +82,12 @@ WSGI_APPLICATION = 'digitacion.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/1.8/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': database.ENGINE,
-        'NAME': database.NAME,
-        'USER': database.USER,
-        'PASSWORD': database.PASSWORD,
-        'PORT': database.PORT,
-        'HOST': database.HOST
-    }
-}
+DATABASES = database.get_databases(cache.ENTORNO)
+
+# los reportes y el dashboard leen de la replica, si esta configurada en database.py
+DATABASE_ROUTERS = ['main.routers.LecturaRouter']
+
+DATABASE_LECTURA = 'lectura'
 
 
 # Internationalization
@@ -129,3 +126,17 @@ AUTHENTICATION_BACKENDS = (
     'main.backends.EmailAuthenticationBackend',
     'django.contrib.auth.backends.ModelBackend',
 )
+
+
+# Cache
+# la configuracion por entorno esta en cache.py
+
+CACHES = cache.get_caches()
+
+SESSION_ENGINE = cache.SESSION_ENGINE
+
+# cache local de los limites de intentos de login, ver main/limites.py
+LOGIN_CACHE = 'local'
+
+# cache local de los usuarios autenticados, ver main/backends.py
+USUARIOS_CACHE = 'local'
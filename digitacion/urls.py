@@ -6,11 +6,13 @@ from django.contrib import admin
 
 # locale imports
 # from . import main
-from script import importar_sobres_excel_view
+from script import importar_sobres_excel_view, descargar_log_importacion_view
 
 urlpatterns = [
     url(r'^admin/', include(admin.site.urls)),
     url(r'^', include('main.urls', namespace='main')),
+    url(r'^import_data/excel/(?P<pk>\d+)/$', importar_sobres_excel_view, name='importar_sobres_excel_estado'),
+    url(r'^import_data/excel/(?P<pk>\d+)/log/$', descargar_log_importacion_view, name='importar_sobres_excel_log'),
     url(r'^import_data/excel/', importar_sobres_excel_view, name='importar_sobres_excel'),
     # url(r'^/$', RedirectView.as_view(url="/login/")),
 ]
@@ -1,12 +1,18 @@
 # Django imports
+from django.core.urlresolvers import reverse
 from django.http import HttpResponse
 from django.contrib.auth.decorators import login_required
 from django.utils.translation import ugettext as _
-from django.db.models import Q
 
 # Locale imports
-from .decorators import login_required_api
-from .models import Persona
+from .datatables import SobreDataTable
+from .limites import get_contadores
+from .lotes import crear_sobres, MAXIMO_LOTE
+from .decorators import login_required_api, login_required_api_csrf, group_required, solo_lectura
+from .mixins import FechasRangoFormMixin
+from .models import Sobre, ImportacionSobres
+from .personas import get_persona
+from .search import buscar_personas, LIMITE_BUSQUEDA, MAXIMO_LIMITE_BUSQUEDA, MAXIMO_OFFSET_BUSQUEDA
 from .constants import (
     RESPONSE_SUCCESS, RESPONSE_DENIED,
     RESPONSE_ERROR, RESPONSE_NOT_FOUND,
@@ -14,9 +20,17 @@ from .constants import (
 )
 
 # Python imports
+import datetime
 import json
 
 
+def get_int(params, name, default):
+    try:
+        return int(params.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
 @login_required
 def get_persona_api(request, id_persona):
     """Retorna los datos de una persona a partir de un id."""
@@ -25,12 +39,12 @@ def get_persona_api(request, id_persona):
     data = {RESPONSE_CODE: RESPONSE_SUCCESS}
 
     if request.method == 'GET':
-        try:
-            # intenta obtener la persona, con la url
-            persona = Persona.objects.get(id=id_persona)
+        # intenta obtener la persona, con la url
+        persona = get_persona(id_persona)
+        if persona is not None:
             # añade el json de la persona
             data['persona'] = persona.to_json()
-        except Persona.DoesNotExist:
+        else:
             # retorna la respuesta de error
             data[RESPONSE_CODE] = RESPONSE_NOT_FOUND
             # retorna un mensaje
@@ -46,6 +60,7 @@ def get_persona_api(request, id_persona):
 
 
 @login_required_api
+@solo_lectura
 def get_personas_api(request):
     """Retorna las personas en formato JSON."""
 
@@ -55,17 +70,103 @@ def get_personas_api(request):
         value = request.GET.get('q', None)
 
         if value is not None:
-            queryset = (
-                Q(nombre__icontains=value) | Q(primer_apellido__icontains=value) |
-                Q(segundo_apellido__icontains=value) | Q(cedula__icontains=value)
-            )
-
-            data['personas'] = Persona.objects.filter(queryset).to_json(
-                fields=['nombre', 'primer_apellido', 'cedula']
-            )[0:10]
+            limit = min(max(get_int(request.GET, 'limit', LIMITE_BUSQUEDA), 1), MAXIMO_LIMITE_BUSQUEDA)
+            offset = min(max(get_int(request.GET, 'offset', 0), 0), MAXIMO_OFFSET_BUSQUEDA)
+            # se pide una persona de mas, para saber si hay mas resultados
+            personas = buscar_personas(value, limit=limit + 1, offset=offset)
+            data['personas'] = personas[:limit]
+            data['has_more'] = len(personas) > limit
+            data['limit'] = limit
+            data['offset'] = offset
         else:
             data[RESPONSE_CODE] = RESPONSE_ERROR
     else:
         data[RESPONSE_CODE] = RESPONSE_DENIED
 
     return data
+
+
+@group_required('administrador')
+@login_required_api
+@solo_lectura
+def listar_sobres_api(request):
+    """Retorna los sobres de un rango de fechas, con el protocolo server-side de DataTables."""
+
+    if request.method != 'GET':
+        return {RESPONSE_CODE: RESPONSE_DENIED}
+
+    form = FechasRangoFormMixin(data=request.GET)
+
+    if not form.is_valid():
+        # DataTables muestra el error que venga en la respuesta
+        return {RESPONSE_CODE: RESPONSE_ERROR, 'error': _('Rango de fechas inválido')}
+
+    fecha_inicial = form.cleaned_data.get('fecha_inicial')
+    fecha_final = form.cleaned_data.get('fecha_final') + datetime.timedelta(days=1)
+
+    data = SobreDataTable(Sobre.objects.listado(fecha_inicial, fecha_final), request.GET).get_data()
+    data[RESPONSE_CODE] = RESPONSE_SUCCESS
+
+    return data
+
+
+@login_required_api
+def get_importacion_api(request, pk):
+    """Retorna el progreso de una importacion de sobres."""
+
+    if request.method != 'GET' or not request.user.is_authenticated():
+        return {RESPONSE_CODE: RESPONSE_DENIED}
+
+    try:
+        importacion = ImportacionSobres.objects.get(pk=pk)
+    except ImportacionSobres.DoesNotExist:
+        return {RESPONSE_CODE: RESPONSE_NOT_FOUND, 'message': _('No se encontró la importación')}
+
+    data = {RESPONSE_CODE: RESPONSE_SUCCESS, 'importacion': importacion.get_estado()}
+    if data['importacion']['terminada']:
+        data['importacion']['log_url'] = reverse('importar_sobres_excel_log', args=(importacion.pk, ))
+
+    return data
+
+
+@group_required('administrador', 'digitador')
+@login_required_api_csrf
+def crear_sobres_api(request):
+    """
+    Crea un lote de sobres, recibe un JSON {"sobres": [...]} y retorna el resultado de cada
+    sobre. Modifica datos, la peticion debe enviar el token CSRF en el header X-CSRFToken.
+    """
+
+    if request.method != 'POST':
+        return {RESPONSE_CODE: RESPONSE_DENIED, 'message': _('Peticion Incorrecta')}
+
+    try:
+        sobres = json.loads(request.body.decode('utf-8')).get('sobres')
+    except (ValueError, AttributeError):
+        sobres = None
+
+    if not isinstance(sobres, list):
+        return {RESPONSE_CODE: RESPONSE_ERROR, 'message': _('Lote de sobres inválido')}
+    if len(sobres) > MAXIMO_LOTE:
+        return {
+            RESPONSE_CODE: RESPONSE_ERROR,
+            'message': _('El lote no puede tener mas de %(maximo)s sobres') % {'maximo': MAXIMO_LOTE}
+        }
+
+    resultados = crear_sobres(sobres)
+    return {
+        RESPONSE_CODE: RESPONSE_SUCCESS,
+        'resultados': resultados,
+        'creados': sum(1 for resultado in resultados if resultado['ok']),
+    }
+
+
+@group_required('administrador')
+@login_required_api
+def get_contadores_login_api(request):
+    """Retorna los contadores de los intentos de login de este proceso, para el monitoreo."""
+
+    if request.method != 'GET':
+        return {RESPONSE_CODE: RESPONSE_DENIED}
+
+    return {RESPONSE_CODE: RESPONSE_SUCCESS, 'contadores': get_contadores()}
@@ -0,0 +1,17 @@
+# Django imports
+from django.apps import AppConfig
+from django.utils.translation import ugettext_lazy as _
+
+
+class MainConfig(AppConfig):
+    """Configuracion de la aplicacion principal."""
+
+    name = 'main'
+    verbose_name = _('Digitacion')
+
+    def ready(self):
+        # se registran las señales
+        from . import signals  # noqa
+        # se construyen las constantes de los templates
+        from .context_processors import cargar_constantes
+        cargar_constantes()
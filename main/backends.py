@@ -1,5 +1,39 @@
 # Django Imports
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import caches
+
+# Locale imports
+from .versiones import get_version, invalidar
+
+
+# cache de los usuarios, debe ser local: los usuarios incluyen el hash de la contraseña
+# y no se deben guardar en el cache compartido en archivos
+USUARIOS_CACHE = getattr(settings, 'USUARIOS_CACHE', 'default')
+
+# segundos que se guarda un usuario en cache
+CACHE_TIMEOUT = 60
+
+# llave de la version de los usuarios en cache, en el cache compartido para que todos los
+# procesos vean los cambios
+CACHE_VERSION_KEY = 'usuarios:version'
+
+
+def get_key(user_id):
+    return 'usuarios:usuario:{}:{}'.format(get_version(CACHE_VERSION_KEY), user_id)
+
+
+def invalidar_usuarios():
+    """
+    Invalida los usuarios en cache de todos los procesos, cuando se guarda o se elimina
+    un usuario, o cambian los grupos.
+    """
+    invalidar(CACHE_VERSION_KEY)
+
+
+def normalizar_email(email):
+    """Retorna el email sin espacios, para buscarlo sin importar mayusculas."""
+    return email.strip() if isinstance(email, str) else email
 
 
 class EmailAuthenticationBackend(object):
@@ -9,23 +43,44 @@ class EmailAuthenticationBackend(object):
         # define un modelo de usuario
         self.user_model = get_user_model()
 
-    def authenticate(self, email=None, password=None):
-        """Funcion encargada de autentificacion."""
+    def get_user_by_email(self, email):
+        """
+        Retorna el usuario del email, sin importar mayusculas (con el indice de la
+        migracion 0008 en postgres). Si hay varios, se usa el que coincide exactamente.
+        """
+        email = normalizar_email(email)
+        if not email:
+            return None
         try:
-            # intenta obtener el usuario por el email
-            user = self.user_model.objects.get(email=email)
-            # checkea la contraseña
-            if user.check_password(password):
-                # retorna el usuario
-                return user
+            return self.user_model.objects.get(email__iexact=email)
+        except self.user_model.MultipleObjectsReturned:
+            return self.user_model.objects.filter(email=email).first()
         except self.user_model.DoesNotExist:
-            # no retorna nada
             return None
 
+    def authenticate(self, email=None, password=None):
+        """Funcion encargada de autentificacion."""
+        # intenta obtener el usuario por el email
+        user = self.get_user_by_email(email)
+        # checkea la contraseña
+        if user is not None and user.check_password(password):
+            # retorna el usuario
+            return user
+        # no retorna nada
+        return None
+
     def get_user(self, user_id):
+        # el usuario se guarda en cache, se invalida cuando se guarda o cambian los grupos
+        cache = caches[USUARIOS_CACHE]
+        key = get_key(user_id)
+        user = cache.get(key)
+        if user is not None:
+            return user
         try:
             # intenta obtener el usuario y lo retorna
-            return self.user_model.objects.get(id=user_id)
+            user = self.user_model.objects.get(id=user_id)
         except self.user_model.DoesNotExist:
             # no retorna nada
             return None
+        cache.set(key, user, CACHE_TIMEOUT)
+        return user
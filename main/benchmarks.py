@@ -0,0 +1,306 @@
+"""
+Micro-benchmarks de la aplicacion, se ejecutan con el comando benchmark:
+
+    python manage.py benchmark conversion
+"""
+
+# Django imports
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.signals import request_finished, request_started
+from django.core.urlresolvers import reverse
+from django.db import connections, transaction
+from django.template import Engine, RequestContext
+from django.test import Client, RequestFactory
+from django.test.utils import override_settings
+
+# Locale imports
+from . import constants as constants_module
+from .columnas import ESQUEMA_SOBRES
+from .context_processors import constants
+from .forms import FormularioCrearSobre, FormularioCrearPersona
+from .models import Persona
+from digitacion.db import ENGINES
+from digitacion.db.pool import cerrar_pools
+
+# Python imports
+from collections import OrderedDict
+import copy
+import datetime
+import threading
+import time
+
+
+__author__ = 'German Alzate'
+
+# benchmarks registrados, por nombre
+BENCHMARKS = OrderedDict()
+
+
+def benchmark(nombre):
+    """Registra una funcion de benchmark, que retorna un diccionario de resultados."""
+    def decorator(funcion):
+        BENCHMARKS[nombre] = funcion
+        return funcion
+    return decorator
+
+
+def medir(funcion, repeticiones=3):
+    """Retorna el menor tiempo en segundos de las repeticiones de la funcion."""
+    tiempos = []
+    for i in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos)
+
+
+def filas_de_prueba(numero):
+    """Filas como las que llegan del archivo de excel."""
+    return [
+        [
+            '04/12/2016', 1, 'sin sobre' if i % 10 == 0 else None, 'juan', 'perez', 'gomez',
+            '1.045.{:03d}'.format(i % 1000), '3001234567', '$10.000', 3, 'ef'
+        ] for i in range(numero)
+    ]
+
+
+@benchmark('conversion')
+def benchmark_conversion(filas=20000):
+    """Compara las celdas por segundo de format_value contra el esquema de columnas."""
+
+    # conversion celda por celda anterior al esquema de columnas
+    def to_python(obj, boolean=True):
+        if obj is not None:
+            if getattr(str(obj), '__len__', lambda: None)() == 1:
+                try:
+                    if boolean:
+                        return bool(int(obj))
+                except Exception:
+                    pass
+            try:
+                return int(obj)
+            except Exception:
+                if isinstance(obj, datetime.datetime):
+                    return obj
+                return str(obj)
+        return None
+
+    def format_value(obj, **kwargs):
+        if obj is not None:
+            if isinstance(obj, str):
+                obj = obj.replace('.', '').replace(',', '').replace('$', '').replace('-', '')
+                obj = obj.strip().title()
+            native = to_python(obj, **kwargs)
+            if type(native) in [int, bool]:
+                return native
+            try:
+                return datetime.datetime.strptime(native, constants_module.DATE_FORMAT)
+            except Exception:
+                return native
+        return ''
+
+    rows = filas_de_prueba(filas)
+    celdas = filas * ESQUEMA_SOBRES.numero_columnas
+
+    def celda_por_celda():
+        for row in rows:
+            [format_value(valor) for valor in row]
+
+    def por_columnas():
+        ESQUEMA_SOBRES.convertir_bloque(rows)
+
+    resultados = OrderedDict()
+    resultados['format_value (celdas/s)'] = celdas / medir(celda_por_celda)
+    resultados['esquema (celdas/s)'] = celdas / medir(por_columnas)
+    return resultados
+
+
+@benchmark('constantes')
+def benchmark_constantes(renders=200):
+    """Compara el tiempo de dibujar base.html construyendo las constantes en cada render, y precalculadas."""
+
+    engine = Engine.get_default()
+    template = engine.get_template('base.html')
+    request = RequestFactory().get('/')
+    request.user = AnonymousUser()
+
+    def constants_por_render(request):
+        # procesador anterior, arma el diccionario en cada render
+        return {x: getattr(constants_module, x) for x in constants_module.__all__}
+
+    def dibujar():
+        for i in range(renders):
+            template.render(RequestContext(request))
+
+    procesadores = engine.template_context_processors
+    resultados = OrderedDict()
+    try:
+        engine.template_context_processors = tuple(
+            constants_por_render if procesador is constants else procesador for procesador in procesadores
+        )
+        resultados['por render (ms/render)'] = medir(dibujar) * 1000 / renders
+    finally:
+        engine.template_context_processors = procesadores
+    resultados['precalculadas (ms/render)'] = medir(dibujar) * 1000 / renders
+    return resultados
+
+
+@benchmark('to_json')
+def benchmark_to_json(instancias=100000, repeticiones=3):
+    """Compara CustomModel.to_json revisando los campos en cada llamada, contra el serializador compilado."""
+
+    personas = [
+        Persona(id=i, nombre='juan', primer_apellido='perez', segundo_apellido='gomez', cedula=i, telefono=None)
+        for i in range(instancias)
+    ]
+
+    def to_json_por_llamada(persona):
+        # implementacion anterior, revisa __dir__() y los campos del modelo en cada llamada
+        JSON = {}
+        for field in [field.name for field in persona._meta.fields if not field.is_relation]:
+            if field not in persona.__dir__():
+                raise ValueError(field)
+            JSON[field] = getattr(persona, field).__str__().upper()
+        return JSON
+
+    def por_llamada():
+        for persona in personas:
+            to_json_por_llamada(persona)
+
+    def compilado():
+        for persona in personas:
+            persona.to_json()
+
+    resultados = OrderedDict()
+    # las dos implementaciones se miden con las mismas repeticiones
+    resultados['por llamada (instancias/s)'] = instancias / medir(por_llamada, repeticiones)
+    resultados['compilado (instancias/s)'] = instancias / medir(compilado, repeticiones)
+    return resultados
+
+
+@benchmark('formularios')
+def benchmark_formularios(instancias=1000):
+    """Compara construir el formulario de sobres copiando los campos de personas en cada instancia, y en la clase."""
+
+    def con_campos_por_instancia():
+        # implementacion anterior, crea un formulario de personas para copiar sus campos
+        form = FormularioCrearSobre()
+        for name, field in FormularioCrearPersona().fields.items():
+            form.fields[name] = field
+            form.fields[name].required = False
+        return form
+
+    def por_instancia():
+        for i in range(instancias):
+            con_campos_por_instancia()
+
+    def en_la_clase():
+        for i in range(instancias):
+            FormularioCrearSobre()
+
+    resultados = OrderedDict()
+    resultados['por instancia (formularios/s)'] = instancias / medir(por_instancia)
+    resultados['en la clase (formularios/s)'] = instancias / medir(en_la_clase)
+    return resultados
+
+
+def get_templates(loaders):
+    """Retorna el setting TEMPLATES con los loaders."""
+    templates = copy.deepcopy(settings.TEMPLATES)
+    templates[0]['APP_DIRS'] = False
+    templates[0]['OPTIONS']['loaders'] = loaders
+    return templates
+
+
+@benchmark('cache')
+def benchmark_cache(peticiones=50):
+    """
+    Compara el tiempo de las peticiones a home_view y crear_sobre, leyendo los templates
+    y las sesiones en cada peticion, y con el loader de templates y las sesiones en cache.
+    """
+
+    loaders = ['django.template.loaders.filesystem.Loader', 'django.template.loaders.app_directories.Loader']
+    configuraciones = OrderedDict([
+        ('sin cache', {
+            'TEMPLATES': get_templates(loaders),
+            'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+        }),
+        ('con cache', {
+            'TEMPLATES': get_templates([('django.template.loaders.cached.Loader', loaders)]),
+            'SESSION_ENGINE': 'django.contrib.sessions.backends.cached_db',
+        }),
+    ])
+    urls = OrderedDict([('home', reverse('main:home')), ('crear_sobre', reverse('main:crear_sobre'))])
+
+    resultados = OrderedDict()
+    # el usuario y las sesiones de la prueba no se guardan
+    with transaction.atomic():
+        email, password = 'benchmark@digitacion.local', 'benchmark'
+        get_user_model().objects.create_superuser('benchmark', email, password)
+
+        for nombre, configuracion in configuraciones.items():
+            with override_settings(**configuracion):
+                # cada cliente carga los middlewares con el motor de sesiones de la configuracion
+                client = Client()
+                client.login(email=email, password=password)
+                for vista, url in urls.items():
+                    client.get(url)
+
+                    def pedir():
+                        for i in range(peticiones):
+                            client.get(url)
+
+                    resultados['{} {} (ms/peticion)'.format(vista, nombre)] = medir(pedir) * 1000 / peticiones
+
+        transaction.set_rollback(True)
+
+    return resultados
+
+
+@benchmark('conexiones')
+def benchmark_conexiones(peticiones=200, hilos=4):
+    """
+    Prueba de carga de las conexiones a la base de datos: varios hilos atienden peticiones
+    con una consulta, cerrando la conexion en cada peticion, con conexiones persistentes,
+    y con el pool de conexiones.
+    """
+
+    configuraciones = OrderedDict([
+        ('sin persistencia', {'CONN_MAX_AGE': 0}),
+        ('persistentes', {'CONN_MAX_AGE': 60, 'CONN_HEALTH_CHECKS': True}),
+        ('pool', {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': True, 'POOL': {'MAXIMO': hilos}}),
+    ])
+    alias = 'benchmark'
+    default = connections['default']
+
+    def atender():
+        # igual que el handler de Django, las conexiones se cierran con las señales de la peticion
+        for i in range(peticiones):
+            request_started.send(sender=None)
+            with connections[alias].cursor() as cursor:
+                cursor.execute('SELECT 1')
+            request_finished.send(sender=None)
+        connections[alias].close()
+
+    def cargar():
+        trabajadores = [threading.Thread(target=atender) for i in range(hilos)]
+        for trabajador in trabajadores:
+            trabajador.start()
+        for trabajador in trabajadores:
+            trabajador.join()
+
+    resultados = OrderedDict()
+    try:
+        for nombre, configuracion in configuraciones.items():
+            connections.databases[alias] = dict(
+                default.settings_dict, ENGINE=ENGINES[default.vendor], **configuracion
+            )
+            # cada hilo atiende sus peticiones una despues de otra
+            resultados['{} (ms/peticion)'.format(nombre)] = medir(cargar) * 1000 / peticiones
+            cerrar_pools(alias)
+    finally:
+        connections.databases.pop(alias, None)
+
+    return resultados
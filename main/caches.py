@@ -0,0 +1,43 @@
+"""
+Backend de cache local LRU, para el cache de cada proceso.
+
+LocMemCache de Django 1.8 borra las llaves en orden de insercion cuando se llena; este
+backend guarda las llaves en orden de uso y borra las que se usaron hace mas tiempo.
+"""
+
+# Django imports
+from django.core.cache.backends import locmem
+
+# Python imports
+from collections import OrderedDict
+
+
+__author__ = 'German Alzate'
+
+
+class LRUCache(locmem.LocMemCache):
+    """Cache local por proceso, que descarta las llaves usadas hace mas tiempo."""
+
+    def __init__(self, name, params):
+        # las llaves se guardan en orden de uso
+        locmem._caches.setdefault(name, OrderedDict())
+        super().__init__(name, params)
+
+    def get(self, key, default=None, version=None, acquire_lock=True):
+        llave = self.make_key(key, version=version)
+        with (self._lock.writer() if acquire_lock else locmem.dummy()):
+            if llave in self._cache:
+                self._cache.move_to_end(llave)
+        return super().get(key, default=default, version=version, acquire_lock=acquire_lock)
+
+    def _set(self, key, value, timeout=locmem.DEFAULT_TIMEOUT):
+        super()._set(key, value, timeout)
+        self._cache.move_to_end(key)
+
+    def _cull(self):
+        if self._cull_frequency == 0:
+            self.clear()
+            return
+        # se borran las llaves usadas hace mas tiempo
+        for i in range(max(len(self._cache) // self._cull_frequency, 1)):
+            self._delete(next(iter(self._cache)))
@@ -0,0 +1,176 @@
+"""
+Esquema de las columnas del archivo de importacion de sobres.
+
+Cada columna tiene un convertidor por tipo (texto, dinero, entero, booleano, fecha y
+forma de pago) que se compila una vez con el esquema, y se aplica por columnas a un
+bloque completo de filas. Las celdas que no se pueden convertir quedan en None y se
+reportan por fila y columna.
+"""
+
+# Django imports
+from django.utils.dateparse import parse_date
+
+# Locale imports
+from .constants import DATE_FORMAT
+from .models import Sobre
+
+# Python imports
+from collections import namedtuple
+import datetime
+
+
+__author__ = 'German Alzate'
+
+# caracteres que se quitan de los numeros y textos del archivo
+CARACTERES_NUMERO = str.maketrans('', '', '.,$- ')
+CARACTERES_TEXTO = str.maketrans('', '', '.,$-')
+
+VERDADEROS = frozenset(['1', 'SI', 'S', 'TRUE', 'VERDADERO'])
+FALSOS = frozenset(['0', 'NO', 'N', 'FALSE', 'FALSO'])
+
+
+class Columna(namedtuple('Columna', ['indice', 'modelo', 'nombre', 'tipo', 'requerido'])):
+    """Columna del archivo: posicion, modelo al que pertenece, campo y tipo."""
+
+    __slots__ = ()
+
+
+def convertir_texto(valor):
+    if isinstance(valor, str):
+        return valor.translate(CARACTERES_TEXTO).strip().title()
+    return str(valor)
+
+
+def convertir_entero(valor):
+    if isinstance(valor, bool):
+        raise ValueError('valor booleano')
+    if isinstance(valor, int):
+        return valor
+    if isinstance(valor, float):
+        if not valor.is_integer():
+            raise ValueError('numero con decimales')
+        return int(valor)
+    numero = str(valor).translate(CARACTERES_NUMERO)
+    if not numero.isdigit():
+        raise ValueError('numero invalido')
+    return int(numero)
+
+
+def convertir_booleano(valor):
+    if isinstance(valor, bool):
+        return valor
+    texto = str(valor).strip().upper()
+    if texto in VERDADEROS:
+        return True
+    if texto in FALSOS:
+        return False
+    raise ValueError('booleano invalido')
+
+
+def convertir_fecha(valor):
+    if isinstance(valor, datetime.datetime):
+        return valor.date()
+    if isinstance(valor, datetime.date):
+        return valor
+    texto = str(valor).strip()
+    try:
+        return datetime.datetime.strptime(texto, DATE_FORMAT).date()
+    except ValueError:
+        pass
+    # las celdas de fecha tambien pueden llegar en formato ISO
+    fecha = parse_date(texto)
+    if fecha is None:
+        raise ValueError('fecha invalida')
+    return fecha
+
+
+# codigos de las formas de pago, por codigo y por nombre
+FORMAS_PAGO = dict([(codigo, codigo) for codigo, nombre in Sobre.FORMAS_PAGO] +
+                   [(nombre, codigo) for codigo, nombre in Sobre.FORMAS_PAGO])
+
+
+def convertir_forma_pago(valor):
+    try:
+        return FORMAS_PAGO[str(valor).strip().upper()]
+    except KeyError:
+        raise ValueError('forma de pago invalida')
+
+
+CONVERTIDORES = {
+    'texto': convertir_texto,
+    'dinero': convertir_entero,
+    'cedula': convertir_entero,
+    'telefono': convertir_entero,
+    'entero': convertir_entero,
+    'booleano': convertir_booleano,
+    'fecha': convertir_fecha,
+    'forma_pago': convertir_forma_pago,
+}
+
+# valor de las celdas vacias que no son requeridas, por tipo
+VACIOS = {'texto': ''}
+
+
+def compilar_convertidor(columna):
+    """Retorna la funcion que convierte una celda de la columna, con el manejo de las celdas vacias."""
+
+    convertir = CONVERTIDORES[columna.tipo]
+    vacio = VACIOS.get(columna.tipo)
+
+    def convertidor(valor):
+        if valor is None or valor == '' or isinstance(valor, str) and not valor.strip():
+            if columna.requerido:
+                raise ValueError('campo vacio')
+            return vacio
+        return convertir(valor)
+
+    return convertidor
+
+
+class EsquemaImportacion(object):
+    """Esquema de columnas del archivo, con los convertidores compilados."""
+
+    def __init__(self, columnas):
+        self.columnas = tuple(columnas)
+        self.numero_columnas = max(columna.indice for columna in self.columnas) + 1
+        self.convertidores = [(columna, compilar_convertidor(columna)) for columna in self.columnas]
+        self.modelos = {columna.nombre: columna.modelo for columna in self.columnas}
+
+    def convertir_bloque(self, rows):
+        """
+        Convierte un bloque de filas por columnas. Retorna, por fila, un diccionario de
+        valores por modelo ({modelo: {campo: valor}}) y un diccionario de errores
+        ({campo: razon}).
+        """
+
+        numero = self.numero_columnas
+        rows = [row if len(row) >= numero else list(row) + [None] * (numero - len(row)) for row in rows]
+        valores = [{} for row in rows]
+        errores = [{} for row in rows]
+
+        for columna, convertir in self.convertidores:
+            indice, nombre, modelo = columna.indice, columna.nombre, columna.modelo
+            for posicion, row in enumerate(rows):
+                try:
+                    valor = convertir(row[indice])
+                except (ValueError, TypeError) as e:
+                    valor = None
+                    errores[posicion][nombre] = str(e)
+                valores[posicion].setdefault(modelo, {})[nombre] = valor
+
+        return valores, errores
+
+
+ESQUEMA_SOBRES = EsquemaImportacion([
+    Columna(0, 'sobre', 'fecha', 'fecha', True),
+    Columna(1, 'sobre', 'diligenciado', 'booleano', True),
+    Columna(2, 'observacion', 'texto', 'texto', False),
+    Columna(3, 'persona', 'nombre', 'texto', False),
+    Columna(4, 'persona', 'primer_apellido', 'texto', False),
+    Columna(5, 'persona', 'segundo_apellido', 'texto', False),
+    Columna(6, 'persona', 'cedula', 'cedula', False),
+    Columna(7, 'persona', 'telefono', 'telefono', False),
+    Columna(8, 'sobre', 'valor', 'dinero', True),
+    Columna(9, 'sobre', 'tipo_ingreso', 'entero', True),
+    Columna(10, 'sobre', 'forma_pago', 'forma_pago', True),
+])
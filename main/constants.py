@@ -2,8 +2,13 @@
 
 __author__ = 'German Alzate'
 
+# constantes que se exponen en los templates
 __all__ = [
-    'RESPONSE_SUCCESS', 'RESPONSE_ERROR', 'RESPONSE_DENIED', 'RESPONSE_CODE', 'RESPONSE_NOT_FOUND', 'RESPONSE_REDIRECT'
+    'CSS_ERROR_CLASS', 'INPUT_CLASS', 'SELECT_CLASS',
+    'ERROR_FORM', 'SUCCESS_FORM', 'INFO_FORM',
+    'RESPONSE_SUCCESS', 'RESPONSE_ERROR', 'RESPONSE_DENIED', 'RESPONSE_CODE', 'RESPONSE_NOT_FOUND', 'RESPONSE_REDIRECT',
+    'CONTENT_TYPE', 'CONTENT_TYPE_HTML',
+    'DATE_FORMAT',
 ]
 
 # CSS
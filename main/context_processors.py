@@ -4,13 +4,24 @@ Procesadores de contextos para los templates con constantes
 
 from . import constants as constants_module
 
+from types import MappingProxyType
+
 
 __author__ = 'German Alzate'
 
+# constantes de los templates, se construyen una vez al cargar la aplicacion
+CONSTANTS = MappingProxyType({})
+
+
+def cargar_constantes():
+    """Construye el diccionario inmutable de constantes para los templates."""
+
+    global CONSTANTS
+    CONSTANTS = MappingProxyType({x: getattr(constants_module, x) for x in constants_module.__all__})
+    return CONSTANTS
+
 
 def constants(request):
     """Procesador de contexto de constantes."""
 
-    data = {x: getattr(constants_module, x) for x in constants_module.__all__}
-
-    return data
+    return CONSTANTS
@@ -0,0 +1,260 @@
+"""
+Implementacion del protocolo server-side de DataTables (https://datatables.net/manual/server-side).
+
+La paginacion usa keyset sobre las columnas de `keyset` cuando la tabla esta ordenada por
+la primera columna y el cliente envia el cursor de la pagina anterior, de lo contrario usa
+OFFSET.
+
+El cursor solo sirve para avanzar a la pagina siguiente ordenando por la primera columna:
+saltar a una pagina, volver a la anterior u ordenar por otra columna se resuelve
+con OFFSET, que recorre las filas anteriores a la pagina.
+"""
+
+# Django imports
+from django.core.urlresolvers import reverse
+from django.db.models import Q
+from django.utils.formats import date_format
+from django.utils.html import escape, format_html
+from django.utils.translation import ugettext as _
+
+# Locale imports
+from .constants import DATE_FORMAT
+from .models import Sobre
+
+# Python imports
+from functools import reduce
+import datetime
+import operator
+
+
+__author__ = 'German Alzate'
+
+
+class DataTable(object):
+    """Clase base para responder las peticiones de DataTables sobre un queryset."""
+
+    # nombres de las columnas, cada una se dibuja con el metodo render_<columna>
+    columns = ()
+    # campos por los que se ordena cada columna, None si no se puede ordenar
+    order_fields = ()
+    # campos para la busqueda general
+    search_fields = ()
+    # campos de la paginacion por keyset, el primero debe ser el de la primera columna
+    keyset = ()
+    # numero de filas por defecto y maximo de filas por pagina
+    page_length = 10
+    max_page_length = 100
+
+    def __init__(self, queryset, params):
+        self.queryset = queryset
+        self.params = params
+
+    def get_int(self, name, default=0):
+        try:
+            return int(self.params.get(name, default))
+        except (TypeError, ValueError):
+            return default
+
+    def get_length(self):
+        length = self.get_int('length', self.page_length)
+        if length <= 0 or length > self.max_page_length:
+            # DataTables envia -1 para mostrar todo
+            return self.max_page_length
+        return length
+
+    def get_order(self):
+        """Retorna la columna y si el orden es descendente."""
+        column = self.get_int('order[0][column]', 0)
+        if column < 0 or column >= len(self.order_fields) or self.order_fields[column] is None:
+            column = 0
+        return column, self.params.get('order[0][dir]', 'asc') == 'desc'
+
+    def get_search_query(self, value):
+        """Retorna la condicion de la busqueda general, en todos los campos de search_fields."""
+        return reduce(operator.or_, [Q(**{field + '__icontains': value}) for field in self.search_fields])
+
+    def filter_columns(self, queryset):
+        """Aplica los filtros por columna, con el metodo filter_<columna>."""
+        for index, column in enumerate(self.columns):
+            value = self.params.get('columns[{}][search][value]'.format(index), '').strip()
+            if value and hasattr(self, 'filter_' + column):
+                queryset = getattr(self, 'filter_' + column)(queryset, value)
+        return queryset
+
+    def parse_cursor(self, value):
+        """Convierte el cursor enviado por el cliente en los valores del keyset."""
+        raise NotImplementedError('Método parse_cursor no implementado en %s' % self.__class__.__name__)
+
+    def get_cursor(self, obj):
+        """Retorna el cursor del keyset para un objeto."""
+        raise NotImplementedError('Método get_cursor no implementado en %s' % self.__class__.__name__)
+
+    def filter_keyset(self, queryset, values, descending):
+        """Filtra las filas que van despues de los valores del keyset."""
+        lookup = '__lt' if descending else '__gt'
+        condiciones = []
+        for index, field in enumerate(self.keyset):
+            # (a > x) or (a = x and b > y) ...
+            condicion = {self.keyset[i]: values[i] for i in range(index)}
+            condicion[field + lookup] = values[index]
+            condiciones.append(Q(**condicion))
+        return queryset.filter(reduce(operator.or_, condiciones))
+
+    def get_data(self):
+        """Retorna el diccionario de respuesta para DataTables."""
+
+        start = max(self.get_int('start', 0), 0)
+        length = self.get_length()
+        column, descending = self.get_order()
+
+        queryset = self.queryset
+        records_total = queryset.count()
+
+        filtrado = False
+        search = self.params.get('search[value]', '').strip()
+        if search:
+            queryset = queryset.filter(self.get_search_query(search))
+            filtrado = True
+        columnas = self.filter_columns(queryset)
+        filtrado = filtrado or columnas is not queryset
+        queryset = columnas
+
+        # solo se vuelve a contar si hay filtros
+        records_filtered = queryset.count() if filtrado else records_total
+
+        prefix = '-' if descending else ''
+        if column == 0 and self.keyset:
+            order = [prefix + field for field in self.keyset]
+        else:
+            order = [prefix + self.order_fields[column]] + [prefix + field for field in self.keyset]
+        queryset = queryset.order_by(*order)
+
+        cursor = self.params.get('cursor', '')
+        values = self.parse_cursor(cursor) if cursor and column == 0 and self.keyset else None
+        if values is not None:
+            # la pagina empieza despues del cursor, sin recorrer las filas anteriores
+            rows = list(self.filter_keyset(queryset, values, descending)[:length])
+        else:
+            rows = list(queryset[start:start + length])
+
+        data = {
+            'draw': self.get_int('draw', 0),
+            'recordsTotal': records_total,
+            'recordsFiltered': records_filtered,
+            'data': [self.render_row(obj) for obj in rows],
+        }
+
+        if rows and self.keyset:
+            # cursor para pedir la siguiente pagina
+            data['cursor'] = {'start': start + len(rows), 'value': self.get_cursor(rows[-1])}
+
+        return data
+
+    def get_first_page(self):
+        """
+        Retorna las filas de la primera pagina, el total de filas y el cursor de la
+        siguiente pagina, para dibujar la tabla en el servidor (deferLoading).
+        """
+        rows = list(self.queryset.order_by(*self.keyset)[:self.page_length])
+        cursor = None
+        if rows:
+            cursor = {'start': len(rows), 'value': self.get_cursor(rows[-1])}
+        return rows, self.queryset.count(), cursor
+
+    def render_row(self, obj):
+        return [getattr(self, 'render_' + column)(obj) for column in self.columns]
+
+
+class SobreDataTable(DataTable):
+    """Tabla de los sobres para la vista de listar_sobres."""
+
+    columns = (
+        'fecha', 'diligenciado', 'persona', 'valor', 'tipo_ingreso',
+        'forma_pago', 'observaciones', 'comandos'
+    )
+    order_fields = (
+        'fecha', 'diligenciado', 'persona__nombre', 'valor', 'tipo_ingreso__nombre',
+        'forma_pago', 'observaciones__texto', None
+    )
+    search_fields = (
+        'persona__nombre', 'persona__primer_apellido', 'persona__segundo_apellido',
+        'tipo_ingreso__nombre', 'observaciones__texto'
+    )
+    keyset = ('fecha', 'id')
+
+    def get_search_query(self, value):
+        query = super().get_search_query(value)
+        if value.isdigit():
+            query |= Q(valor=value) | Q(persona__cedula=value)
+        return query
+
+    def filter_fecha(self, queryset, value):
+        try:
+            return queryset.filter(fecha=datetime.datetime.strptime(value, DATE_FORMAT).date())
+        except ValueError:
+            return queryset.none()
+
+    def filter_diligenciado(self, queryset, value):
+        return queryset.filter(diligenciado=value.upper() in ('SI', 'TRUE', '1'))
+
+    def filter_persona(self, queryset, value):
+        query = (
+            Q(persona__nombre__icontains=value) | Q(persona__primer_apellido__icontains=value) |
+            Q(persona__segundo_apellido__icontains=value)
+        )
+        if value.isdigit():
+            query |= Q(persona__cedula=value)
+        return queryset.filter(query)
+
+    def filter_valor(self, queryset, value):
+        value = value.replace('$', '').replace('.', '').replace(',', '')
+        if not value.isdigit():
+            return queryset.none()
+        return queryset.filter(valor=value)
+
+    def filter_tipo_ingreso(self, queryset, value):
+        return queryset.filter(tipo_ingreso__nombre__icontains=value)
+
+    def filter_forma_pago(self, queryset, value):
+        value = value.upper()
+        formas = [codigo for codigo, nombre in Sobre.FORMAS_PAGO if value in (codigo, nombre)]
+        return queryset.filter(forma_pago__in=formas)
+
+    def filter_observaciones(self, queryset, value):
+        return queryset.filter(observaciones__texto__icontains=value)
+
+    def parse_cursor(self, value):
+        try:
+            fecha, id = value.split('|')
+            return datetime.datetime.strptime(fecha, '%Y-%m-%d').date(), int(id)
+        except ValueError:
+            return None
+
+    def get_cursor(self, obj):
+        return '{}|{}'.format(obj.fecha.strftime('%Y-%m-%d'), obj.id)
+
+    def render_fecha(self, obj):
+        return date_format(obj.fecha)
+
+    def render_diligenciado(self, obj):
+        return 'SI' if obj.diligenciado else 'NO'
+
+    def render_persona(self, obj):
+        return escape(obj.persona) if obj.persona is not None else ''
+
+    def render_valor(self, obj):
+        return '${}'.format(obj.valor)
+
+    def render_tipo_ingreso(self, obj):
+        return escape(obj.tipo_ingreso)
+
+    def render_forma_pago(self, obj):
+        return obj.get_forma_pago_display()
+
+    def render_observaciones(self, obj):
+        return escape(obj.observaciones) if obj.observaciones is not None else _('NINGUNA')
+
+    def render_comandos(self, obj):
+        return format_html(
+            '<a href="{}" class="fa fa-edit btn btn-success"></a>', reverse('main:editar_sobre', args=(obj.id, ))
+        )
@@ -1,10 +1,12 @@
 # Django imports
 from django.contrib.auth.decorators import user_passes_test
 from django.http import HttpResponse
-from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
 
 # Locale imports
 from . import constants
+from .permisos import pertenece_grupo
+from .routers import escritura_reciente, lectura
 
 # Python imports
 from functools import wraps
@@ -22,7 +24,7 @@ def group_required(*grupos):
                 return True
             else:
                 # si tiene los grupos
-                return user.is_authenticated() and user.groups.filter(name__in=grupos).exists()
+                return user.is_authenticated() and pertenece_grupo(user, grupos)
     else:
         decorator = lambda x: x.is_authenticated()
 
@@ -30,10 +32,9 @@ def group_required(*grupos):
     return user_passes_test(decorator)
 
 
-def login_required_api(view_func):
-    """Decorador para saber si un usuario está logeado o no en una API, retornando una respuesta JSON."""
+def respuesta_api(view_func):
+    """Decorador que retorna el diccionario de la vista de una API como una respuesta JSON."""
 
-    @csrf_exempt
     @wraps(view_func)
     def wrapped_view(request, *args, **kwargs):
         # if request.user.is_authenticated():
@@ -46,3 +47,29 @@ def login_required_api(view_func):
         #     content_type=constants.CONTENT_TYPE
         # )
     return wrapped_view
+
+
+def login_required_api(view_func):
+    """Decorador para saber si un usuario está logeado o no en una API, retornando una respuesta JSON."""
+    return csrf_exempt(respuesta_api(view_func))
+
+
+def login_required_api_csrf(view_func):
+    """Como login_required_api, pero con la proteccion CSRF, para las APIs que modifican datos."""
+    return csrf_protect(respuesta_api(view_func))
+
+
+def solo_lectura(view_func):
+    """
+    Decorador para las vistas que solo leen, como los reportes, que leen los datos de la
+    base de datos de lectura si el usuario no acaba de escribir.
+    """
+
+    @wraps(view_func)
+    def wrapped_view(request, *args, **kwargs):
+        request.solo_lectura = True
+        if escritura_reciente(request):
+            return view_func(request, *args, **kwargs)
+        with lectura():
+            return view_func(request, *args, **kwargs)
+    return wrapped_view
@@ -7,8 +7,14 @@ from django.utils.translation import ugettext_lazy as _
 # Locale imports
 from .models import Sobre, Persona, TipoIngreso, Observacion
 from .mixins import CustomForm, CustomModelForm, FechasRangoFormMixin
+from .limites import permitir_login, login_fallido, login_exitoso
+from .personas import get_persona, crear_persona
 from . import constants
 
+# Python imports
+from collections import OrderedDict
+import copy
+
 
 class FormularioLogearUsuario(CustomForm):
     """Formulario para el login de usuarios en el sistema."""
@@ -20,6 +26,8 @@ class FormularioLogearUsuario(CustomForm):
     def __init__(self, *args, **kwargs):
         # crea un usuario en cache que luego será devuelto
         self.user_cache = None
+        # ip de la peticion, para los limites de intentos
+        self.ip = kwargs.pop('ip', None)
         super().__init__(*args, **kwargs)
 
     def clean(self, *args, **kwargs):
@@ -29,15 +37,23 @@ class FormularioLogearUsuario(CustomForm):
         email = cleaned_data.get('email')
         password = cleaned_data.get('password')
 
+        # si se superaron los intentos, se rechaza antes de calcular el hash de la contraseña
+        if not permitir_login(self.ip, email):
+            raise forms.ValidationError(_('Demasiados intentos, espera unos minutos e intenta de nuevo'))
+
         # autentifica el usuario, con el backend de autentificacion por email
         self.user_cache = authenticate(email=email, password=password)
 
         # verifica, para retornar los errores, en caso de haberlos
         if self.user_cache is None:
+            # solo los intentos fallidos cuentan para el limite del email
+            login_fallido(email)
             raise forms.ValidationError(_('Usuario no encontrado'))
         elif self.user_cache.is_active is None:
             raise forms.ValidationError(_('Usuario Inactivo'))
 
+        login_exitoso(email)
+
         # retorna los datos
         return cleaned_data
 
@@ -47,7 +63,34 @@ class FormularioLogearUsuario(CustomForm):
         return self.user_cache
 
 
-class FormularioCrearSobre(CustomModelForm):
+class FormularioCrearPersona(CustomModelForm):
+    """Formulario para crear personas."""
+
+    class Meta:
+        model = Persona
+        fields = (
+            'nombre', 'primer_apellido', 'segundo_apellido',
+            'cedula', 'telefono'
+        )
+
+
+def campos_opcionales(form_class):
+    """Retorna copias no obligatorias de los campos del formulario, para agregarlos a otro formulario."""
+    campos = OrderedDict()
+    for name, field in form_class.base_fields.items():
+        campos[name] = copy.deepcopy(field)
+        campos[name].required = False
+    return campos
+
+
+# formulario base con los campos de la persona no obligatorios, las clases hijas los heredan
+# al declararse, como cualquier otro campo declarado
+CamposPersonaForm = type('CamposPersonaForm', (forms.Form, ), dict(
+    campos_opcionales(FormularioCrearPersona), __module__=__name__
+))
+
+
+class FormularioCrearSobre(CustomModelForm, CamposPersonaForm):
     """Formulario para la creacion de sobres."""
 
     # crea las opciones de diligenciado
@@ -56,13 +99,22 @@ class FormularioCrearSobre(CustomModelForm):
         (False, _('No')),
     )
 
+    # campos de la persona, y los obligatorios para crearla
+    campos_persona = tuple(FormularioCrearPersona.base_fields)
+    campos_persona_obligatorios = tuple(
+        name for name, field in FormularioCrearPersona.base_fields.items() if field.required
+    )
+
     # crea un campo para guardar el id de la persona que hizo un sobre, para recuperarlo facilmente
     hidden = forms.CharField(max_length=255, widget=forms.HiddenInput, required=False)
     diligenciado = forms.TypedChoiceField(
         coerce=lambda x: x == 'True', choices=DILIGENCIADO_CHOICES,
-        widget=forms.RadioSelect
+        widget=forms.RadioSelect, initial=True
     )  # se agrega le widget a el campo diligenciado
 
+    # se agrega la clase de input a el radiobutton
+    clases_css = {'diligenciado': constants.INPUT_CLASS}
+
     class Meta:
         model = Sobre
         fields = (
@@ -74,27 +126,14 @@ class FormularioCrearSobre(CustomModelForm):
     def __init__(self, *args, **kwargs):
         self.persona_cache = None  # crea la persona en caché
         self.persona = kwargs.pop('persona', None)  # intenta obtener una persona de las kwargs
-        # asigna la clase del formulario de persona
-        self.formulario_crear_persona_class = FormularioCrearPersona
 
-        # llama el __init__ de el padre
+        # llama el __init__ de el padre, los campos de la persona ya estan en la clase
         super().__init__(*args, **kwargs)
 
-        # se agrega la clase de input a el radiobutton
-        self.fields['diligenciado'].widget.attrs.update({'class': constants.INPUT_CLASS})
-
         if self.persona is not None:  # si encuentra la persona de las kwargs
             self.initial.update(self.persona.to_json())  # actualiza el formulario inicial, con el json
             self.initial['hidden'] = self.persona.id.__str__()  # actualiza el campo hidden con el id
 
-        for name, field in self.formulario_crear_persona_class().fields.items():  # recorre los campos
-            # agrega los campos del formulario crear persona a el formulario actual
-            self.fields[name] = field
-            self.fields[name].required = False  # no los requiere
-
-        if not self.is_bound:
-            self.fields['diligenciado'].initial = True
-
     def clean(self, *args, **kwargs):
         cleaned_data = super().clean(*args, **kwargs)
 
@@ -110,10 +149,9 @@ class FormularioCrearSobre(CustomModelForm):
                 _('Este campo es obligatorio')
             )
 
-        try:
-            # intenta sacar la persona por el campo invisible
-            self.persona_cache = Persona.objects.get(id=hidden)
-        except (Persona.DoesNotExist, ValueError):
+        # intenta sacar la persona por el campo invisible
+        self.persona_cache = get_persona(hidden)
+        if self.persona_cache is None:
             # la obtiene a partir del formulario
             self.persona_cache = self._get_persona()
 
@@ -133,19 +171,13 @@ class FormularioCrearSobre(CustomModelForm):
             # no hay persona
             return None
         elif not isinstance(self.persona_cache, Persona):  # si es None (basicamente)
-            # crea un formulario de crear persona, le pasa los datos limpios
-            form = self.formulario_crear_persona_class(data=self.cleaned_data)  # self.data
-            if not form.is_valid():
-                # si entra aca, se supone que el formulario actual de la clase no tiene errores
-                if self.errors:
-                    # si hay errores, actualiza los errores con los del formulario nuevo
-                    self._errors.update(form.errors)
-                else:
-                    # asigna los errores de un formulario a otro
-                    self._errors = form.errors
-            else:
-                # crea la persona
-                self.persona_cache = form.save()
+            # los campos de la persona ya se limpiaron, solo se verifican los obligatorios
+            for name in self.campos_persona_obligatorios:
+                if name not in self._errors and self.cleaned_data.get(name) in (None, ''):
+                    self.add_error(name, self.fields[name].error_messages['required'])
+            if not self._errors:
+                # busca la persona por cedula, o la crea
+                self.persona_cache = crear_persona({name: self.cleaned_data.get(name) for name in self.campos_persona})
         # retorna la persona
         return self.persona_cache
 
@@ -155,17 +187,6 @@ class FormularioCrearSobre(CustomModelForm):
         return self._get_persona()
 
 
-class FormularioCrearPersona(CustomModelForm):
-    """Formulario para crear personas."""
-
-    class Meta:
-        model = Persona
-        fields = (
-            'nombre', 'primer_apellido', 'segundo_apellido',
-            'cedula', 'telefono'
-        )
-
-
 class FormularioCrearTipoIngreso(CustomModelForm):
     """Formulario para crear tipos de ingreso."""
 
@@ -195,11 +216,7 @@ class FormularioReporteContribuciones(FechasRangoFormMixin):
         label=_('Persona'), required=False
     )
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.fields['totalizado'].widget.attrs.update({
-            'class': 'flat'
-        })
+    clases_css = {'totalizado': 'flat'}
 
     def clean(self, *args, **kwargs):
         cleaned_data = super().clean(*args, **kwargs)
@@ -0,0 +1,280 @@
+"""
+Importacion de sobres desde hojas de calculo.
+
+Las filas de cada hoja se leen y validan (con un pool de procesos si el setting
+IMPORTACION_PROCESOS es mayor a 1), y se procesan por bloques en el proceso principal:
+las personas, observaciones y tipos de ingreso de cada bloque se resuelven con una
+consulta, los que faltan se crean con bulk_create, y los sobres se insertan con
+bulk_create. Cada bloque se guarda en su propia transaccion. El estado de cada importacion se
+guarda en un ImportJob.
+"""
+
+# Django imports
+from django.conf import settings
+from django.db import transaction, DatabaseError, IntegrityError
+
+# Locale imports
+from .columnas import ESQUEMA_SOBRES
+from .models import Sobre, Observacion, Persona, TipoIngreso, SobreMonthlyRollup
+from .personas import resolver_personas
+from .search import invalidar_busquedas
+
+# Python imports
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+
+__author__ = 'German Alzate'
+
+# numero de filas que se procesan en cada transaccion
+CHUNK_SIZE = 1000
+
+
+def chunks(iterable, size):
+    """Divide un iterable en listas de maximo size elementos, sin cargarlo completo."""
+    iterator = iter(iterable)
+    chunk = list(islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, size))
+
+
+def leer_bloque(rows, esquema=ESQUEMA_SOBRES):
+    """
+    Convierte un bloque de filas del archivo en los datos de la persona, la observacion
+    y el sobre, con los errores de las celdas de cada fila.
+    """
+    valores, errores = esquema.convertir_bloque(rows)
+    return [
+        (fila['persona'], fila['observacion']['texto'], fila['sobre'], errores_fila)
+        for fila, errores_fila in zip(valores, errores)
+    ]
+
+
+def leer_fila(row):
+    """Convierte una fila del archivo, ver leer_bloque."""
+    return leer_bloque([row])[0]
+
+
+def saltar_encabezado(rows):
+    rows = iter(rows)
+    next(rows, None)
+    return rows
+
+
+def leer_hoja(rows):
+    """Lee y valida las filas de una hoja, sin el encabezado. Se ejecuta en el pool de procesos."""
+    return leer_bloque(list(saltar_encabezado(rows)))
+
+
+def describir_errores(errores):
+    return ', '.join('{}: {}'.format(campo, razon) for campo, razon in sorted(errores.items()))
+
+
+class ErrorImportacion(namedtuple('ErrorImportacion', ['fila', 'modelo', 'razon', 'datos'])):
+    """Error de una fila de la importacion."""
+
+    __slots__ = ()
+
+    def __str__(self):
+        return '*{0} no agregada en fila #{1}, excepcion: {2}, dict: {3}\n'.format(
+            self.modelo, self.fila, self.razon, self.datos
+        )
+
+
+class ImportJob(object):
+    """
+    Estado de una importacion: el numero de fila, los errores y el cache de tipos de
+    ingreso. Cada importacion crea su propio objeto, para que no se comparta entre
+    peticiones ni hilos.
+    """
+
+    # numero maximo de errores que se guardan, los demas solo se cuentan
+    max_errores = 1000
+
+    def __init__(self, chunk_size=CHUNK_SIZE, max_errores=None, procesos=None):
+        self.chunk_size = chunk_size
+        # numero de procesos para leer las hojas
+        self.procesos = procesos or getattr(settings, 'IMPORTACION_PROCESOS', 1)
+        if max_errores is not None:
+            self.max_errores = max_errores
+        self.fila = 0
+        self.creados = 0
+        self.errores = []
+        self.total_errores = 0
+        # cache de tipos de ingreso por pk como texto, solo para esta importacion
+        self.tipos_ingreso = {}
+
+    def error(self, fila, modelo, razon, datos=None):
+        """Registra el error de una fila, si no se ha llegado al maximo."""
+        self.total_errores += 1
+        if len(self.errores) < self.max_errores:
+            self.errores.append(ErrorImportacion(fila, str(modelo), str(razon), datos))
+
+    def get_log(self):
+        """Retorna las lineas del log de errores."""
+        for error in self.errores:
+            yield str(error)
+        omitidos = self.total_errores - len(self.errores)
+        if omitidos > 0:
+            yield '* {} errores mas no se muestran\n'.format(omitidos)
+
+    def validar(self, model, instancias):
+        """
+        Valida los campos obligatorios de las instancias [(fila, instancia)], registra los
+        errores y retorna las validas.
+        """
+        validas, invalidas = model.validar_lote([instancia for fila, instancia in instancias])
+        if not invalidas:
+            return instancias
+
+        vacios = {id(instancia): campos for instancia, campos in invalidas}
+        resultado = []
+        for fila, instancia in instancias:
+            if id(instancia) not in vacios:
+                resultado.append((fila, instancia))
+                continue
+            self.error(
+                fila, model._meta.verbose_name, 'campos vacios: {}'.format(', '.join(vacios[id(instancia)])),
+                {field: getattr(instancia, attname) for field, attname in model.get_required_fields()}
+            )
+        return resultado
+
+    def resolver_personas(self, filas):
+        """Retorna un diccionario de cedula a id de persona, creando las personas que no existen."""
+
+        nuevas = {}
+        for fila, (persona, texto, sobre, errores) in filas:
+            cedula = persona['cedula']
+            if isinstance(cedula, int) and cedula not in nuevas:
+                nuevas[cedula] = (fila, persona)
+
+        ids, invalidas = resolver_personas({cedula: persona for cedula, (fila, persona) in nuevas.items()})
+
+        for cedula, vacios in invalidas:
+            fila, persona = nuevas[cedula]
+            self.error(fila, Persona._meta.verbose_name, 'campos vacios: {}'.format(', '.join(vacios)), {
+                field: persona.get(field) for field, attname in Persona.get_required_fields()
+            })
+
+        return ids
+
+    def resolver_observaciones(self, filas):
+        """Retorna un diccionario de texto a id de observacion, creando las que no existen."""
+
+        textos = {texto for fila, (persona, texto, sobre, errores) in filas if texto}
+        ids = {}
+        for id, texto in Observacion.objects.filter(texto__in=textos).values_list('id', 'texto').order_by('-id'):
+            # si hay observaciones repetidas se usa la primera
+            ids[texto] = id
+
+        crear = [Observacion(texto=texto) for texto in textos if texto not in ids]
+        if crear:
+            Observacion.objects.bulk_create(crear)
+            for id, texto in Observacion.objects.filter(
+                    texto__in=[x.texto for x in crear]).values_list('id', 'texto').order_by('-id'):
+                ids[texto] = id
+
+        return ids
+
+    def resolver_tipos_ingreso(self, filas):
+        """Completa el cache de tipos de ingreso con los tipos del bloque."""
+
+        pks = {sobre['tipo_ingreso'] for fila, (persona, texto, sobre, errores) in filas}
+        faltantes = [pk for pk in pks if str(pk) not in self.tipos_ingreso and isinstance(pk, int)]
+        if faltantes:
+            for pk, tipo in TipoIngreso.objects.in_bulk(faltantes).items():
+                self.tipos_ingreso[str(pk)] = tipo
+        return self.tipos_ingreso
+
+    def importar_bloque(self, filas):
+        """Importa un bloque de filas [(numero de fila, datos)], en una transaccion."""
+
+        with transaction.atomic():
+            personas = self.resolver_personas(filas)
+            observaciones = self.resolver_observaciones(filas)
+            tipos_ingreso = self.resolver_tipos_ingreso(filas)
+
+            sobres = []
+            for fila, (persona, texto, kwargs, errores) in filas:
+                if errores:
+                    # las celdas invalidas de la persona quedan vacias, el sobre se guarda
+                    errores_persona = {campo: errores[campo] for campo in persona if campo in errores}
+                    if errores_persona:
+                        self.error(fila, Persona._meta.verbose_name, describir_errores(errores_persona), persona)
+                    errores_sobre = {campo: errores[campo] for campo in kwargs if campo in errores}
+                    if errores_sobre:
+                        self.error(fila, Sobre._meta.verbose_name, describir_errores(errores_sobre), kwargs)
+                        continue
+
+                pk = kwargs['tipo_ingreso']
+                if str(pk) not in tipos_ingreso:
+                    self.error(fila, Sobre._meta.verbose_name, 'tipo de ingreso con pk = {}'.format(pk), kwargs)
+                    continue
+
+                sobre = Sobre(**dict(kwargs, tipo_ingreso=tipos_ingreso[str(pk)]))
+                sobre.persona_id = personas.get(persona['cedula'])
+                sobre.observaciones_id = observaciones.get(texto)
+                sobres.append((fila, sobre))
+
+            # bulk_create no llama a save, se validan los campos obligatorios
+            sobres = self.validar(Sobre, sobres)
+
+            try:
+                with transaction.atomic():
+                    Sobre.objects.bulk_create([sobre for fila, sobre in sobres])
+            except (DatabaseError, IntegrityError):
+                # si falla el bloque, se guardan uno por uno para registrar los que fallan
+                creados = []
+                for fila, sobre in sobres:
+                    try:
+                        with transaction.atomic():
+                            Sobre.objects.bulk_create([sobre])
+                        creados.append((fila, sobre))
+                    except (DatabaseError, IntegrityError) as e:
+                        self.error(fila, Sobre._meta.verbose_name, e, sobre.__dict__)
+                sobres = creados
+
+            # bulk_create no envia señales, se actualiza el resumen mensual
+            SobreMonthlyRollup.objects.registrar([sobre for fila, sobre in sobres])
+
+        # las personas creadas con bulk_create se ven en las busquedas despues del commit
+        invalidar_busquedas()
+        self.creados += len(sobres)
+        return len(sobres)
+
+    def importar_hoja(self, filas):
+        """
+        Importa las filas leidas de una hoja por bloques. Si un bloque falla, los bloques
+        anteriores de la hoja quedan guardados.
+        """
+
+        for chunk in chunks(filas, self.chunk_size):
+            bloque = []
+            for datos in chunk:
+                bloque.append((self.fila, datos))
+                self.fila += 1
+            self.importar_bloque(bloque)
+
+    def importar(self, pages):
+        """
+        Importa los sobres de las hojas, cada hoja es un iterable de filas cuya primera
+        fila es el encabezado. Retorna el numero de sobres creados.
+        """
+
+        if self.procesos <= 1:
+            for rows in pages:
+                # se leen las filas a medida que se importan
+                self.importar_hoja(
+                    fila for chunk in chunks(saltar_encabezado(rows), self.chunk_size) for fila in leer_bloque(chunk)
+                )
+            return self.creados
+
+        # las hojas se leen en paralelo, las personas y los sobres se guardan en este
+        # proceso para no crear cedulas repetidas
+        with ProcessPoolExecutor(max_workers=self.procesos) as executor:
+            for filas in executor.map(leer_hoja, (list(rows) for rows in pages)):
+                self.importar_hoja(filas)
+
+        return self.creados
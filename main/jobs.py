@@ -0,0 +1,100 @@
+"""
+Importaciones de sobres en segundo plano.
+
+Las importaciones se guardan en la tabla de ImportacionSobres y las procesa el comando
+procesar_importaciones, en el mismo proceso o en un pool de procesos locales.
+"""
+
+# Django imports
+from django.db import connections
+from django.utils import timezone
+
+# Locale imports
+from .importer import ImportJob, CHUNK_SIZE
+from .models import ImportacionSobres
+
+# Python imports
+from concurrent.futures import ProcessPoolExecutor
+import logging
+
+
+__author__ = 'German Alzate'
+
+logger = logging.getLogger(__name__)
+
+
+class ImportacionJob(ImportJob):
+    """ImportJob que guarda el progreso en una ImportacionSobres despues de cada bloque."""
+
+    def __init__(self, importacion, **kwargs):
+        super().__init__(**kwargs)
+        self.importacion = importacion
+
+    def get_progreso(self):
+        # cada fila procesada crea un sobre o falla
+        return {
+            'filas_procesadas': self.fila,
+            'filas_fallidas': self.fila - self.creados,
+            'sobres_creados': self.creados,
+        }
+
+    def importar_bloque(self, filas):
+        creados = super().importar_bloque(filas)
+        # el progreso se guarda cuando se confirma la transaccion del bloque
+        ImportacionSobres.objects.filter(pk=self.importacion.pk).update(**self.get_progreso())
+        return creados
+
+
+def leer_libro(importacion):
+    """Retorna las hojas del archivo de la importacion y el numero de filas sin encabezados."""
+
+    # pyexcel solo se necesita en el worker
+    import pyexcel
+
+    sheets = list(pyexcel.get_book(file_name=importacion.archivo.path))
+    total = sum(max(sheet.number_of_rows() - 1, 0) for sheet in sheets)
+    return (sheet.rows() for sheet in sheets), total
+
+
+def procesar_importacion(pk, chunk_size=CHUNK_SIZE, procesos=None):
+    """
+    Procesa una importacion pendiente. Retorna False si otro worker ya la tomo. procesos
+    es el numero de procesos para leer las hojas, por defecto IMPORTACION_PROCESOS.
+    """
+
+    if not ImportacionSobres.objects.reclamar(pk):
+        return False
+
+    importacion = ImportacionSobres.objects.get(pk=pk)
+    job = ImportacionJob(importacion, chunk_size=chunk_size, procesos=procesos)
+
+    try:
+        pages, total = leer_libro(importacion)
+        ImportacionSobres.objects.filter(pk=pk).update(total_filas=total)
+        job.importar(pages)
+        estado = ImportacionSobres.TERMINADA
+    except Exception as e:
+        # los bloques ya importados quedan guardados
+        logger.exception('Error en la importacion #%s', pk)
+        job.error(job.fila, ImportacionSobres._meta.verbose_name, e)
+        estado = ImportacionSobres.FALLIDA
+
+    ImportacionSobres.objects.filter(pk=pk).update(
+        estado=estado, terminada=timezone.now(), log=''.join(job.get_log()), **job.get_progreso()
+    )
+    return True
+
+
+def procesar_pendientes(procesos=1, chunk_size=CHUNK_SIZE):
+    """Procesa las importaciones pendientes, con procesos > 1 usa un pool de procesos."""
+
+    pks = list(ImportacionSobres.objects.pendientes().values_list('pk', flat=True))
+
+    if procesos <= 1 or len(pks) <= 1:
+        return sum(procesar_importacion(pk, chunk_size) for pk in pks)
+
+    # las conexiones no se pueden compartir con los procesos hijos
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=procesos) as executor:
+        # los procesos del pool no pueden crear sus propios pools, leen las hojas en el mismo proceso
+        return sum(executor.map(procesar_importacion, pks, [chunk_size] * len(pks), [1] * len(pks)))
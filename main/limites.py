@@ -0,0 +1,144 @@
+"""
+Limites de intentos de login, con token buckets por ip y por email.
+
+Cada intento de login consume un token de la ip, y cada intento fallido uno del email;
+un login exitoso recupera los intentos del email. Los tokens se recuperan con el tiempo,
+si no hay tokens el intento se rechaza antes de calcular el hash de la contraseña. Los
+buckets y los contadores se guardan en el cache local LOGIN_CACHE (por proceso), para no
+consultar la base de datos ni otro servidor.
+
+La ip es REMOTE_ADDR de la peticion (get_ip), no se leen headers como X-Forwarded-For.
+Detras de un proxy o un balanceador REMOTE_ADDR es la ip del proxy, y todos los clientes
+comparten el mismo bucket de ip.
+"""
+
+# Django imports
+from django.conf import settings
+from django.core.cache import caches
+
+# Python imports
+from collections import OrderedDict
+import threading
+import time
+
+
+__author__ = 'German Alzate'
+
+# cache de los buckets, debe ser un cache local (locmem)
+LOGIN_CACHE = getattr(settings, 'LOGIN_CACHE', 'default')
+
+# intentos por ip y por email: (capacidad, segundos para recuperar todos los intentos)
+LOGIN_LIMITES = getattr(settings, 'LOGIN_LIMITES', {
+    'ip': (30, 60),
+    'email': (10, 5 * 60),
+})
+
+# contadores de los intentos, para el monitoreo
+CONTADORES = ('permitidos', 'bloqueados_ip', 'bloqueados_email')
+
+
+class TokenBucket(object):
+    """Token bucket guardado en cache, por llave."""
+
+    # los buckets del mismo proceso se actualizan uno a la vez
+    lock = threading.Lock()
+
+    def __init__(self, nombre, capacidad, periodo, alias=LOGIN_CACHE):
+        self.nombre = nombre
+        self.capacidad = capacidad
+        # tokens que se recuperan por segundo
+        self.tasa = capacidad / periodo
+        self.periodo = periodo
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def get_key(self, llave):
+        return 'limites:{}:{}'.format(self.nombre, llave)
+
+    def get_tokens(self, llave, ahora=None):
+        """Retorna los tokens disponibles de la llave."""
+        ahora = time.time() if ahora is None else ahora
+        tokens, ultimo = self.cache.get(self.get_key(llave), (self.capacidad, ahora))
+        return min(self.capacidad, tokens + (ahora - ultimo) * self.tasa)
+
+    def consumir(self, llave, tokens=1):
+        """Consume los tokens de la llave, retorna False si no hay suficientes."""
+        with self.lock:
+            ahora = time.time()
+            disponibles = self.get_tokens(llave, ahora)
+            if disponibles < tokens:
+                return False
+            # el bucket se borra del cache cuando se recupera completo
+            self.cache.set(self.get_key(llave), (disponibles - tokens, ahora), int(self.periodo) + 1)
+            return True
+
+    def disponible(self, llave, tokens=1):
+        """Retorna True si la llave tiene los tokens, sin consumirlos."""
+        return self.get_tokens(llave) >= tokens
+
+    def reiniciar(self, llave):
+        """Recupera todos los tokens de la llave."""
+        self.cache.delete(self.get_key(llave))
+
+
+def get_buckets():
+    return {nombre: TokenBucket(nombre, *limite) for nombre, limite in LOGIN_LIMITES.items()}
+
+
+BUCKETS = get_buckets()
+
+
+def contar(contador):
+    cache = caches[LOGIN_CACHE]
+    key = 'limites:contador:{}'.format(contador)
+    if not cache.add(key, 1, None):
+        cache.incr(key)
+
+
+def get_contadores():
+    """Retorna los contadores de los intentos de login de este proceso."""
+    cache = caches[LOGIN_CACHE]
+    valores = cache.get_many(['limites:contador:{}'.format(contador) for contador in CONTADORES])
+    return OrderedDict(
+        (contador, valores.get('limites:contador:{}'.format(contador), 0)) for contador in CONTADORES
+    )
+
+
+def get_llave_email(email):
+    return str(email).strip().lower()
+
+
+def permitir_login(ip, email):
+    """
+    Consume un intento de la ip y verifica que el email tenga intentos, retorna False si
+    alguno supero el limite. Los intentos del email se consumen solo al fallar el login.
+    """
+
+    if ip and not BUCKETS['ip'].consumir(ip):
+        contar('bloqueados_ip')
+        return False
+    if email and not BUCKETS['email'].disponible(get_llave_email(email)):
+        contar('bloqueados_email')
+        return False
+    contar('permitidos')
+    return True
+
+
+def login_fallido(email):
+    """Consume un intento del email, despues de un login fallido."""
+    if email:
+        BUCKETS['email'].consumir(get_llave_email(email))
+
+
+def login_exitoso(email):
+    """Recupera los intentos del email, despues de un login exitoso."""
+    if email:
+        BUCKETS['email'].reiniciar(get_llave_email(email))
+
+
+def get_ip(request):
+    """Retorna la ip de la peticion, REMOTE_ADDR; detras de un proxy es la ip del proxy."""
+    return request.META.get('REMOTE_ADDR')
@@ -0,0 +1,208 @@
+"""
+Creacion de sobres por lotes, para la digitacion en grilla.
+
+Cada lote se valida completo, las personas, tipos de ingreso y observaciones se
+resuelven con una consulta por modelo, y los sobres validos se guardan con
+bulk_create en una transaccion; las personas nuevas solo se crean para los sobres
+validos. Los sobres invalidos se retornan con sus errores.
+"""
+
+# Django imports
+from django.db import transaction
+
+# Locale imports
+from .columnas import convertir_booleano, convertir_entero, convertir_fecha, convertir_forma_pago
+from .models import Sobre, Observacion, TipoIngreso, SobreMonthlyRollup
+from .personas import get_personas, resolver_personas as resolver_personas_cedula
+from .search import invalidar_busquedas
+
+
+__author__ = 'German Alzate'
+
+# numero maximo de sobres de un lote
+MAXIMO_LOTE = 500
+
+# campos de la persona que se pueden enviar en el lote
+CAMPOS_PERSONA = ('nombre', 'primer_apellido', 'segundo_apellido', 'cedula', 'telefono')
+
+# convertidores de los campos del sobre, y si son obligatorios
+CAMPOS_SOBRE = (
+    ('fecha', convertir_fecha, True),
+    ('diligenciado', convertir_booleano, False),
+    ('valor', convertir_entero, True),
+    ('tipo_ingreso', convertir_entero, True),
+    ('forma_pago', convertir_forma_pago, True),
+    ('observaciones', convertir_entero, False),
+)
+
+
+def vacio(valor):
+    return valor is None or isinstance(valor, str) and not valor.strip()
+
+
+def leer_sobre(item, errores):
+    """Convierte los campos del sobre de un item, agrega a errores los que no son validos."""
+
+    datos = {}
+    for campo, convertir, requerido in CAMPOS_SOBRE:
+        valor = item.get(campo)
+        if vacio(valor):
+            if requerido:
+                errores[campo] = 'campo vacio'
+            datos[campo] = None
+            continue
+        try:
+            datos[campo] = convertir(valor)
+        except (ValueError, TypeError) as e:
+            errores[campo] = str(e)
+    if datos.get('diligenciado') is None:
+        datos['diligenciado'] = True
+    # como en el formulario de sobres, los sobres no diligenciados necesitan observaciones
+    if datos['diligenciado'] is False and datos.get('observaciones') is None and 'observaciones' not in errores:
+        errores['observaciones'] = 'campo vacio, el sobre no esta diligenciado'
+    return datos
+
+
+def leer_persona(item, errores):
+    """Retorna el id de la persona o los datos para buscarla por cedula, o None si no tiene."""
+
+    persona = item.get('persona')
+    if persona is None:
+        return None
+    if not isinstance(persona, dict):
+        errores['persona'] = 'persona invalida'
+        return None
+
+    datos = {}
+    try:
+        if not vacio(persona.get('id')):
+            datos['id'] = convertir_entero(persona['id'])
+            return datos
+        for campo in CAMPOS_PERSONA:
+            valor = persona.get(campo)
+            if campo in ('cedula', 'telefono'):
+                datos[campo] = None if vacio(valor) else convertir_entero(valor)
+            else:
+                datos[campo] = '' if valor is None else str(valor).strip()
+    except (ValueError, TypeError) as e:
+        errores['persona'] = str(e)
+        return None
+
+    if datos['cedula'] is None:
+        errores['persona'] = 'la persona necesita id o cedula'
+        return None
+    return datos
+
+
+def resolver_personas(personas, errores):
+    """
+    Retorna un diccionario de posicion del item al id de la persona. Las personas se
+    buscan por id o por cedula, las que no existen se crean con bulk_create.
+    """
+
+    existentes = get_personas([datos['id'] for datos in personas.values() if 'id' in datos])
+
+    # las personas por cedula, la primera posicion de cada cedula
+    nuevas = {}
+    for posicion, datos in personas.items():
+        if 'cedula' in datos:
+            nuevas.setdefault(datos['cedula'], (posicion, datos))
+
+    por_cedula, invalidas = resolver_personas_cedula({
+        cedula: datos for cedula, (posicion, datos) in nuevas.items()
+    })
+    for cedula, vacios in invalidas:
+        errores[nuevas[cedula][0]]['persona'] = 'campos vacios: {}'.format(', '.join(vacios))
+
+    resultado = {}
+    for posicion, datos in personas.items():
+        if 'id' in datos:
+            if datos['id'] in existentes:
+                resultado[posicion] = datos['id']
+            else:
+                errores[posicion]['persona'] = 'no existe la persona con id = {}'.format(datos['id'])
+        elif datos['cedula'] in por_cedula:
+            resultado[posicion] = por_cedula[datos['cedula']]
+        elif 'persona' not in errores[posicion]:
+            errores[posicion]['persona'] = 'campos vacios'
+    return resultado
+
+
+def crear_sobres(items):
+    """
+    Crea los sobres de la lista de items, cada uno es un diccionario con fecha,
+    diligenciado, valor, tipo_ingreso, forma_pago, observaciones (id) y persona
+    ({id} o {cedula, nombre, ...}). Retorna por item {'index', 'ok', 'errores'}.
+    """
+
+    if len(items) > MAXIMO_LOTE:
+        raise ValueError('El lote no puede tener mas de {} sobres'.format(MAXIMO_LOTE))
+
+    errores = [{} for item in items]
+    sobres = []
+    personas = {}
+    for posicion, item in enumerate(items):
+        if not isinstance(item, dict):
+            errores[posicion]['sobre'] = 'sobre invalido'
+            sobres.append(None)
+            continue
+        sobres.append(leer_sobre(item, errores[posicion]))
+        persona = leer_persona(item, errores[posicion])
+        if persona is not None:
+            personas[posicion] = persona
+
+    tipos = {datos['tipo_ingreso'] for datos in sobres if datos and datos.get('tipo_ingreso') is not None}
+    tipos = set(TipoIngreso.objects.filter(pk__in=tipos).values_list('pk', flat=True)) if tipos else set()
+    observaciones = {datos['observaciones'] for datos in sobres if datos and datos.get('observaciones')}
+    if observaciones:
+        observaciones = set(Observacion.objects.filter(pk__in=observaciones).values_list('pk', flat=True))
+
+    # se validan todos los sobres antes de crear personas, los sobres invalidos no dejan personas
+    crear = []
+    for posicion, datos in enumerate(sobres):
+        if errores[posicion]:
+            continue
+        if datos['tipo_ingreso'] not in tipos:
+            errores[posicion]['tipo_ingreso'] = 'no existe el tipo de ingreso'
+        if datos['observaciones'] is not None and datos['observaciones'] not in observaciones:
+            errores[posicion]['observaciones'] = 'no existe la observacion'
+        if errores[posicion]:
+            continue
+        crear.append((posicion, Sobre(
+            fecha=datos['fecha'], diligenciado=datos['diligenciado'], valor=datos['valor'],
+            tipo_ingreso_id=datos['tipo_ingreso'], forma_pago=datos['forma_pago'],
+            observaciones_id=datos['observaciones']
+        )))
+
+    validos, invalidos = Sobre.validar_lote([sobre for posicion, sobre in crear])
+    vacios = {id(sobre): campos for sobre, campos in invalidos}
+    for posicion, sobre in crear:
+        if id(sobre) in vacios:
+            errores[posicion]['sobre'] = 'campos vacios: {}'.format(', '.join(vacios[id(sobre)]))
+    crear = [(posicion, sobre) for posicion, sobre in crear if not errores[posicion]]
+
+    with transaction.atomic():
+        # solo se crean las personas de los sobres sin errores
+        personas = resolver_personas(
+            {posicion: datos for posicion, datos in personas.items() if not errores[posicion]}, errores
+        )
+
+        validos = []
+        for posicion, sobre in crear:
+            # los sobres con una persona que no se pudo resolver no se crean
+            if errores[posicion]:
+                continue
+            sobre.persona_id = personas.get(posicion)
+            validos.append(sobre)
+
+        Sobre.objects.bulk_create(validos)
+        # bulk_create no envia señales, se actualiza el resumen mensual
+        SobreMonthlyRollup.objects.registrar(validos)
+
+    # las personas creadas con bulk_create se ven en las busquedas despues del commit
+    invalidar_busquedas()
+
+    return [
+        {'index': posicion, 'ok': not errores[posicion], 'errores': errores[posicion]}
+        for posicion in range(len(items))
+    ]
@@ -0,0 +1,23 @@
+# Django imports
+from django.core.management.base import BaseCommand, CommandError
+
+# Locale imports
+from main.benchmarks import BENCHMARKS
+
+
+class Command(BaseCommand):
+    """Comando para ejecutar los micro-benchmarks de la aplicacion."""
+
+    help = 'Ejecuta los benchmarks indicados, o todos si no se indica ninguno.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('nombres', nargs='*', help=', '.join(BENCHMARKS))
+
+    def handle(self, *args, **options):
+        nombres = options['nombres'] or list(BENCHMARKS)
+        for nombre in nombres:
+            if nombre not in BENCHMARKS:
+                raise CommandError('No existe el benchmark "{}".'.format(nombre))
+            self.stdout.write('{}:'.format(nombre))
+            for resultado, valor in BENCHMARKS[nombre]().items():
+                self.stdout.write('    {}: {:,.2f}'.format(resultado, valor))
@@ -0,0 +1,31 @@
+# Django imports
+from django.core.management.base import BaseCommand
+
+# Locale imports
+from main.importer import CHUNK_SIZE
+from main.jobs import procesar_pendientes
+
+# Python imports
+import time
+
+
+class Command(BaseCommand):
+    """Worker que procesa las importaciones de sobres pendientes."""
+
+    help = 'Procesa las importaciones de sobres pendientes, en un ciclo o una sola vez (--una-vez).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--procesos', type=int, default=1, help='Numero de procesos del pool.')
+        parser.add_argument('--intervalo', type=float, default=5, help='Segundos entre cada consulta.')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Filas por transaccion.')
+        parser.add_argument('--una-vez', action='store_true', help='Procesa las pendientes y termina.')
+
+    def handle(self, *args, **options):
+        while True:
+            procesadas = procesar_pendientes(options['procesos'], options['chunk_size'])
+            if procesadas:
+                self.stdout.write('Se procesaron {} importaciones.'.format(procesadas))
+            if options['una_vez']:
+                break
+            if not procesadas:
+                time.sleep(options['intervalo'])
@@ -0,0 +1,15 @@
+# Django imports
+from django.core.management.base import BaseCommand
+
+# Locale imports
+from main.models import SobreMonthlyRollup
+
+
+class Command(BaseCommand):
+    """Comando para reconstruir el resumen mensual de sobres."""
+
+    help = 'Reconstruye el resumen mensual de sobres (SobreMonthlyRollup) a partir de los sobres.'
+
+    def handle(self, *args, **options):
+        SobreMonthlyRollup.objects.reconstruir()
+        self.stdout.write('Se reconstruyeron {} resumenes.'.format(SobreMonthlyRollup.objects.count()))
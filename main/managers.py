@@ -1,10 +1,109 @@
 # Django imports
-from django.db.models import QuerySet
+from django.apps import apps
+from django.db import connection, transaction
+from django.db.models import QuerySet, Count, F, Sum
+from django.utils import timezone
 
-from .mixins import CustomQuerySet
 
-
-class PersonaQuerySet(CustomQuerySet, QuerySet):
+class PersonaQuerySet(QuerySet):
     """QuerySet para personas."""
 
     pass
+
+
+class SobreQuerySet(QuerySet):
+    """QuerySet para sobres."""
+
+    def listado(self, fecha_inicial, fecha_final):
+        """Retorna los sobres del rango de fechas, con los datos que se muestran en las listas."""
+        return self.filter(
+            fecha__range=(fecha_inicial, fecha_final)
+        ).select_related('persona', 'tipo_ingreso', 'observaciones').only(
+            'fecha', 'diligenciado', 'valor', 'forma_pago', 'persona', 'tipo_ingreso',
+            'observaciones'
+        )
+
+
+class SobreMonthlyRollupQuerySet(QuerySet):
+    """QuerySet para el resumen mensual de sobres."""
+
+    @staticmethod
+    def get_valor(sobre, campo):
+        """
+        Retorna el valor del campo del sobre convertido al tipo del campo, los sobres creados
+        con Sobre.objects.create(fecha='2020-01-05') tienen los valores como se pasaron.
+        """
+        Sobre = apps.get_model('main', 'Sobre')
+        return Sobre._meta.get_field(campo).to_python(getattr(sobre, campo))
+
+    @classmethod
+    def get_key(cls, sobre):
+        """Retorna la llave del resumen al que pertenece un sobre."""
+        fecha = cls.get_valor(sobre, 'fecha')
+        return (
+            fecha.year, fecha.month, sobre.tipo_ingreso_id,
+            sobre.forma_pago, bool(cls.get_valor(sobre, 'diligenciado'))
+        )
+
+    def registrar(self, sobres, signo=1):
+        """
+        Suma (signo=1) o resta (signo=-1) los sobres de los resumenes, se puede usar
+        con los sobres creados con bulk_create, que no envian señales.
+        """
+
+        # se agrupan los cambios por resumen, para hacer una consulta por llave
+        cambios = {}
+        for sobre in sobres:
+            key = self.get_key(sobre)
+            total, cantidad = cambios.get(key, (0, 0))
+            cambios[key] = (total + self.get_valor(sobre, 'valor') * signo, cantidad + signo)
+
+        with transaction.atomic(using=self.db):
+            for (year, month, tipo_ingreso, forma_pago, diligenciado), (total, cantidad) in cambios.items():
+                rollup, created = self.get_or_create(
+                    year=year, month=month, tipo_ingreso_id=tipo_ingreso,
+                    forma_pago=forma_pago, diligenciado=diligenciado
+                )
+                self.filter(pk=rollup.pk).update(total=F('total') + total, cantidad=F('cantidad') + cantidad)
+
+    def reconstruir(self):
+        """Reconstruye todos los resumenes a partir de los sobres, en una consulta agrupada."""
+
+        Sobre = apps.get_model('main', 'Sobre')
+        fecha = '{}.{}'.format(
+            connection.ops.quote_name(Sobre._meta.db_table), connection.ops.quote_name('fecha')
+        )
+
+        queryset = Sobre.objects.extra(select={
+            'year': connection.ops.date_extract_sql('year', fecha),
+            'month': connection.ops.date_extract_sql('month', fecha),
+        }).values('year', 'month', 'tipo_ingreso', 'forma_pago', 'diligenciado').annotate(
+            total=Sum('valor'), cantidad=Count('id')
+        ).order_by()
+
+        with transaction.atomic(using=self.db):
+            self.all().delete()
+            self.bulk_create([
+                self.model(
+                    year=row['year'], month=row['month'], tipo_ingreso_id=row['tipo_ingreso'],
+                    forma_pago=row['forma_pago'], diligenciado=row['diligenciado'],
+                    total=row['total'], cantidad=row['cantidad']
+                ) for row in queryset.iterator()
+            ], batch_size=500)
+
+
+class ImportacionSobresQuerySet(QuerySet):
+    """QuerySet para las importaciones de sobres."""
+
+    def pendientes(self):
+        """Retorna las importaciones que no se han procesado, en orden de llegada."""
+        return self.filter(estado=self.model.PENDIENTE).order_by('creada', 'id')
+
+    def reclamar(self, pk):
+        """
+        Marca la importacion como en proceso, si sigue pendiente. Retorna False si otro
+        worker ya la tomo.
+        """
+        return self.filter(pk=pk, estado=self.model.PENDIENTE).update(
+            estado=self.model.PROCESANDO, iniciada=timezone.now()
+        ) == 1
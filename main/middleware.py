@@ -0,0 +1,19 @@
+# Locale imports
+from .routers import COOKIE_ESCRITURA, LECTURA_FIJA, lectura_configurada
+
+# Python imports
+import time
+
+
+class EscrituraMiddleware(object):
+    """Marca al usuario que hace un POST, para que sus siguientes lecturas no usen la replica."""
+
+    METODOS_LECTURA = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+    def process_response(self, request, response):
+        # los POST de los formularios de los reportes solo leen
+        if request.method in self.METODOS_LECTURA or getattr(request, 'solo_lectura', False):
+            return response
+        if lectura_configurada():
+            response.set_cookie(COOKIE_ESCRITURA, int(time.time()), max_age=LECTURA_FIJA, httponly=True)
+        return response
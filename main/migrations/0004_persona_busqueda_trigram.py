@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+NOMBRE_COMPLETO = "lower(nombre || ' ' || primer_apellido || ' ' || segundo_apellido)"
+
+
+def crear_indices_trigram(apps, schema_editor):
+    # solo postgres soporta pg_trgm, las demas bases de datos usan el indice en memoria
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX main_persona_nombre_completo_trgm ON main_persona '
+        'USING gin (({}) gin_trgm_ops)'.format(NOMBRE_COMPLETO)
+    )
+
+
+def eliminar_indices_trigram(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute('DROP INDEX IF EXISTS main_persona_nombre_completo_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0003_auto_20161214_2143'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indices_trigram, eliminar_indices_trigram),
+    ]
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+def llenar_rollup(apps, schema_editor):
+    # se llena el resumen con los sobres existentes
+    Sobre = apps.get_model('main', 'Sobre')
+    SobreMonthlyRollup = apps.get_model('main', 'SobreMonthlyRollup')
+
+    rollups = {}
+    queryset = Sobre.objects.values_list('fecha', 'tipo_ingreso', 'forma_pago', 'diligenciado', 'valor')
+    for fecha, tipo_ingreso, forma_pago, diligenciado, valor in queryset.iterator():
+        key = (fecha.year, fecha.month, tipo_ingreso, forma_pago, diligenciado)
+        total, cantidad = rollups.get(key, (0, 0))
+        rollups[key] = (total + valor, cantidad + 1)
+
+    SobreMonthlyRollup.objects.bulk_create([
+        SobreMonthlyRollup(
+            year=year, month=month, tipo_ingreso_id=tipo_ingreso, forma_pago=forma_pago,
+            diligenciado=diligenciado, total=total, cantidad=cantidad
+        ) for (year, month, tipo_ingreso, forma_pago, diligenciado), (total, cantidad) in rollups.items()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0004_persona_busqueda_trigram'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SobreMonthlyRollup',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('year', models.PositiveSmallIntegerField(verbose_name='año')),
+                ('month', models.PositiveSmallIntegerField(verbose_name='mes')),
+                ('forma_pago', models.CharField(verbose_name='forma de pago', max_length=2, choices=[('EF', 'EFECTIVO'), ('CH', 'CHEQUE'), ('EL', 'ELECTRONICO')])),
+                ('diligenciado', models.BooleanField(verbose_name='sobre diligenciado')),
+                ('total', models.BigIntegerField(verbose_name='total', default=0)),
+                ('cantidad', models.PositiveIntegerField(verbose_name='cantidad', default=0)),
+                ('tipo_ingreso', models.ForeignKey(verbose_name='tipo ingreso', related_name='rollups', to='main.TipoIngreso')),
+            ],
+            options={
+                'verbose_name': 'Resumen mensual de sobres',
+                'verbose_name_plural': 'Resumenes mensuales de sobres',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='sobremonthlyrollup',
+            unique_together=set([('year', 'month', 'tipo_ingreso', 'forma_pago', 'diligenciado')]),
+        ),
+        migrations.RunPython(llenar_rollup, migrations.RunPython.noop),
+    ]
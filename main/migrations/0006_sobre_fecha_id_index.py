@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0005_sobremonthlyrollup'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='sobre',
+            index_together=set([('fecha', 'id')]),
+        ),
+    ]
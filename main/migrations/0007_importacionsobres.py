@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+from django.conf import settings
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('main', '0006_sobre_fecha_id_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportacionSobres',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('archivo', models.FileField(verbose_name='archivo', upload_to='importaciones/%Y/%m/')),
+                ('estado', models.CharField(verbose_name='estado', max_length=2, default='PE', choices=[('PE', 'PENDIENTE'), ('PR', 'PROCESANDO'), ('TE', 'TERMINADA'), ('FA', 'FALLIDA')])),
+                ('creada', models.DateTimeField(verbose_name='creada', auto_now_add=True)),
+                ('iniciada', models.DateTimeField(verbose_name='iniciada', blank=True, null=True)),
+                ('terminada', models.DateTimeField(verbose_name='terminada', blank=True, null=True)),
+                ('total_filas', models.PositiveIntegerField(verbose_name='total de filas', blank=True, null=True)),
+                ('filas_procesadas', models.PositiveIntegerField(verbose_name='filas procesadas', default=0)),
+                ('filas_fallidas', models.PositiveIntegerField(verbose_name='filas fallidas', default=0)),
+                ('sobres_creados', models.PositiveIntegerField(verbose_name='sobres creados', default=0)),
+                ('log', models.TextField(verbose_name='log', blank=True)),
+                ('usuario', models.ForeignKey(verbose_name='usuario', blank=True, null=True, related_name='importaciones', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Importacion de sobres',
+                'verbose_name_plural': 'Importaciones de sobres',
+            },
+        ),
+    ]
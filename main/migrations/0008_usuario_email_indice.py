@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations
+
+
+# el backend busca el email con iexact, que en postgres compara UPPER(email::text)
+EMAIL = 'UPPER(email::text)'
+
+
+def get_tabla_usuarios(apps):
+    return apps.get_model(settings.AUTH_USER_MODEL)._meta.db_table
+
+
+def crear_indice_email(apps, schema_editor):
+    # solo postgres usa el indice en las comparaciones sin mayusculas
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute(
+        'CREATE INDEX main_usuario_email_upper ON {} ({})'.format(
+            schema_editor.quote_name(get_tabla_usuarios(apps)), EMAIL
+        )
+    )
+
+
+def eliminar_indice_email(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute('DROP INDEX IF EXISTS main_usuario_email_upper')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('main', '0007_importacionsobres'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indice_email, eliminar_indice_email),
+    ]
@@ -5,6 +5,8 @@ from django.contrib.auth.decorators import login_required
 from django.conf import settings
 from django.core.urlresolvers import reverse_lazy
 from django.db import models
+from django.db.models.signals import class_prepared
+from django.dispatch import receiver
 from django.db.utils import IntegrityError
 from django.forms.utils import ErrorList
 from django.utils.translation import ugettext_lazy as _
@@ -15,19 +17,62 @@ from django.shortcuts import redirect
 
 # Locale imports
 from . import constants
+from .permisos import pertenece_grupo
 
 # Python imports
-import json
+import copy
+import operator
+
+
+# valores que se consideran vacios en los campos obligatorios
+VACIOS = ('', None)
 
 
 class CustomModel(object):
     """Custom class for models instances."""
 
+    @classmethod
+    def get_json_fields(cls):
+        """Retorna los campos por defecto de to_json, o None si el modelo no tiene."""
+        return getattr(cls, 'json_fields', None)
+
+    @classmethod
+    def get_json_serializer(cls, fields):
+        """
+        Retorna la funcion que convierte una instancia en el diccionario de los campos,
+        en mayuscula. Se compila una vez por modelo y campos, y se guarda en la clase.
+        """
+
+        # cada modelo tiene su propio cache, no el de la clase padre
+        serializers = cls.__dict__.get('_json_serializers')
+        if serializers is None:
+            serializers = {}
+            setattr(cls, '_json_serializers', serializers)
+
+        fields = tuple(fields)
+        serializer = serializers.get(fields)
+        if serializer is not None:
+            return serializer
+
+        # los campos deben ser campos del modelo o atributos de la clase
+        nombres = {field.name for field in cls._meta.fields} | {field.attname for field in cls._meta.fields}
+        for field in fields:
+            if field not in nombres and not hasattr(cls, field):
+                raise ValueError('Field "%s" not found in "%s"' % (field, cls.__name__))
+
+        getters = [(field, operator.attrgetter(field)) for field in fields]
+
+        def serializer(instance):
+            return {field: getter(instance).__str__().upper() for field, getter in getters}
+
+        serializers[fields] = serializer
+        return serializer
+
     def to_json(self, *args):
-        """Retorna los datos de la persona en formato JSON."""
+        """Retorna los datos de la instancia en formato JSON, con los valores en mayuscula."""
 
-        # se buscan los argumentos, o el parametro de json_fields
-        fields = args or getattr(self, 'json_fields', None)
+        # se buscan los argumentos, o los campos por defecto del modelo
+        fields = args or self.get_json_fields()
 
         # si no hay fields retorna la excepcion
         if fields is None:
@@ -35,27 +80,48 @@ class CustomModel(object):
                 _('No se ha definido método .to_json para la clase %s' % self.__class__.__name__)
             )
 
-        # crea el diccionario
-        JSON = {}
-        for field in fields:
-            # si los campos no estan en self.__dir__()
-            if field not in self.__dir__():  # self.__dict__
-                # levanta la excepcion
-                raise ValueError('Field "%s" not found in "%s"' % (field, self.__class__.__name__))
-            # agrega el campo en mayúscula
-            JSON[field] = getattr(self, field).__str__().upper()
-        # retorna el diccionario
-        return JSON
+        return self.get_json_serializer(fields)(self)
+
+    @classmethod
+    def get_required_fields(cls):
+        """
+        Retorna los campos obligatorios del modelo, como (nombre, attname). Se calculan una
+        vez por modelo y se guardan en la clase.
+        """
+        required = cls.__dict__.get('_required_fields')
+        if required is None:
+            required = tuple(
+                (field.name, field.attname) for field in cls._meta.fields if not field.blank and not field.null
+            )
+            setattr(cls, '_required_fields', required)
+        return required
+
+    def get_empty_fields(self):
+        """Retorna los nombres de los campos obligatorios que estan vacios."""
+        return [name for name, attname in self.get_required_fields() if getattr(self, attname, '') in VACIOS]
+
+    @classmethod
+    def validar_lote(cls, instances):
+        """
+        Valida los campos obligatorios de las instancias, para bulk_create que no llama a
+        save. Retorna las instancias validas, y las invalidas con sus campos vacios.
+        """
+        required = cls.get_required_fields()
+        validas, invalidas = [], []
+        for instance in instances:
+            vacios = [name for name, attname in required if getattr(instance, attname, '') in VACIOS]
+            if vacios:
+                invalidas.append((instance, vacios))
+            else:
+                validas.append(instance)
+        return validas, invalidas
 
     def save(self, *args, **kwargs):
-        # antes de guardar busca en los campos
-        for field in self._meta.fields:
-            # si el campo es obligatorio
-            if not field.blank and not field.null:
-                # si está vacio
-                if getattr(self, field.name, '') == '':
-                    # levanta una excepcion
-                    raise IntegrityError('{} No puede estar vacio'.format(field.name))
+        # antes de guardar busca los campos obligatorios vacios
+        vacios = self.get_empty_fields()
+        if vacios:
+            # levanta una excepcion
+            raise IntegrityError('{} No puede estar vacio'.format(vacios[0]))
         # retorna el super
         return super().save(*args, **kwargs)
 
@@ -88,36 +154,45 @@ class FormMixin(object):
     # agrega la clase general de css, definida en las constantes
     error_css_class = constants.CSS_ERROR_CLASS
 
+    # clases de css de los campos que no usan la clase por defecto, por nombre
+    clases_css = {}
+
+    @classmethod
+    def preparar_campos(cls):
+        """
+        Agrega a los widgets de los campos de la clase el placeholder con el label y la
+        clase de css; cada formulario copia los campos con sus atributos. Lo llama la
+        metaclase al crear la clase, antes de que se cree cualquier formulario.
+        """
+
+        # copia los campos, para no modificar los de la clase padre
+        base_fields = copy.deepcopy(cls.base_fields)
+        clases_error = {}
+        for name, field in base_fields.items():
+            if hasattr(field, 'choices'):
+                clase = constants.SELECT_CLASS
+                field.widget.attrs.update({'class': clase, 'placeholder': field.label, 'tabindex': '-1'})
+            else:
+                clase = constants.INPUT_CLASS
+                field.widget.attrs.update({'class': clase, 'placeholder': field.label})
+            if name in cls.clases_css:
+                field.widget.attrs['class'] = cls.clases_css[name]
+            clases_error[name] = constants.CSS_ERROR_CLASS + ' ' + clase
+
+        cls.base_fields = base_fields
+        # clases de error de css por campo
+        cls._clases_error = clases_error
+
     def __init__(self, *args, **kwargs):
         # agrega la clase de error a todos los formularios
         super().__init__(error_class=CustomErrorList, *args, **kwargs)
-        for field in self.fields:
-            # agrega a todos los campos el placeholder con el label, y la clase
-            if hasattr(self.fields[field], 'choices'):
-                self.fields[field].widget.attrs.update({
-                    'class': constants.SELECT_CLASS,
-                    'placeholder': self.fields[field].label,
-                    'tabindex': '-1'
-                })
-            else:
-                self.fields[field].widget.attrs.update({
-                    'class': constants.INPUT_CLASS,
-                    'placeholder': self.fields[field].label
-                })
 
     def add_class_error_to_input(self):
         """Agrega una clase de error de css al input."""
-        for field in self.fields:
-            if getattr(self, '_errors', None) is not None and field in self._errors:
-                # si la clase está en los errores, le asigan la clase al input
-                if hasattr(self.fields[field], 'choices'):
-                    self.fields[field].widget.attrs.update({
-                        'class': constants.CSS_ERROR_CLASS + ' ' + constants.SELECT_CLASS
-                    })
-                else:
-                    self.fields[field].widget.attrs.update({
-                        'class': constants.CSS_ERROR_CLASS + ' ' + constants.INPUT_CLASS
-                    })
+        for field in getattr(self, '_errors', None) or ():
+            # si el campo está en los errores, le asigna la clase al input
+            if field in self.fields and field in self._clases_error:
+                self.fields[field].widget.attrs['class'] = self._clases_error[field]
 
     def is_valid(self, *args, **kwargs):
         # se sobreescribe el metodo is_valid
@@ -131,12 +206,26 @@ class FormMixin(object):
         return valid
 
 
-class CustomModelForm(FormMixin, forms.ModelForm):
+class CamposMetaclass(forms.forms.DeclarativeFieldsMetaclass):
+    """Metaclase que prepara los campos de los formularios al crear la clase."""
+
+    def __new__(mcs, name, bases, attrs):
+        new_class = super().__new__(mcs, name, bases, attrs)
+        new_class.preparar_campos()
+        return new_class
+
+
+class ModelCamposMetaclass(CamposMetaclass, forms.models.ModelFormMetaclass):
+    """Metaclase que prepara los campos de los modelforms al crear la clase."""
+    pass
+
+
+class CustomModelForm(FormMixin, forms.ModelForm, metaclass=ModelCamposMetaclass):
     """Clase de base para trabajar con modelforms."""
     pass
 
 
-class CustomForm(FormMixin, forms.Form):
+class CustomForm(FormMixin, forms.Form, metaclass=CamposMetaclass):
     """Clase de base para trabajar con forms."""
     pass
 
@@ -175,7 +264,7 @@ class CustomMixinView(object):
             # saca el usuario
             user = request.user
             # si el usuario no tiene los grupos, y ademas no es superusuario
-            if not user.groups.filter(name__in=grupos).exists() and not user.is_staff and not user.is_superuser:
+            if not pertenece_grupo(user, grupos) and not user.is_staff and not user.is_superuser:
                 # lo redirecciona al login
                 return redirect(settings.LOGIN_URL)
         # retorna el metodo dispatch
@@ -206,22 +295,15 @@ class CustomMixinView(object):
         return super().get_success_url()
 
 
-class CustomQuerySet(object):
-    """Clase modelo para los querysets."""
-
-    def to_json(self, **kwargs):
-        """Metodo de serializado de querysets."""
-
-        from django.core import serializers
-
-        fields = kwargs.pop(
-            'fields',
-            getattr(self.model, 'json_fields', [x.name for x in self.model._meta.fields])
-        )
-
-        queryset = serializers.serialize('json', self, fields=fields, **kwargs)
-
-        if isinstance(queryset, str):
-            return json.loads(queryset)
+@receiver(class_prepared)
+def preparar_custom_model(sender, **kwargs):
+    """
+    Calcula los campos obligatorios y compila el serializador por defecto de los modelos
+    con CustomModel, al preparar la clase.
+    """
 
-        return queryset
+    if issubclass(sender, CustomModel):
+        sender.get_required_fields()
+        fields = sender.get_json_fields()
+        if fields is not None:
+            sender.get_json_serializer(fields)
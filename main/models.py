@@ -1,10 +1,12 @@
 # Django imports
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 
 # Locale Imports
 from .mixins import CustomModel
-from .managers import PersonaQuerySet
+from .managers import PersonaQuerySet, SobreQuerySet, SobreMonthlyRollupQuerySet, ImportacionSobresQuerySet
 
 
 class TipoIngreso(CustomModel, models.Model):
@@ -42,15 +44,10 @@ class Persona(CustomModel, models.Model):
             self.cedula
         )
 
-    def to_json(self, *args):
-        if not args:
-            fields = []
-            for field in self._meta.fields:
-                if not field.is_relation:
-                    fields.append(field.name)
-        else:
-            fields = args
-        return super().to_json(*fields)
+    @classmethod
+    def get_json_fields(cls):
+        # por defecto todos los campos que no son relaciones
+        return [field.name for field in cls._meta.fields if not field.is_relation]
 
 
 class Observacion(CustomModel, models.Model):
@@ -87,12 +84,119 @@ class Sobre(CustomModel, models.Model):
     persona = models.ForeignKey(Persona, verbose_name=_('persona'), blank=True, null=True, related_name='sobres')
     observaciones = models.ForeignKey(Observacion, verbose_name=_('observaciones'), blank=True, null=True)
 
+    objects = SobreQuerySet().as_manager()
+
     class Meta:
         verbose_name = _('Sobre')
         verbose_name_plural = _('Sobres')
+        index_together = [('fecha', 'id')]
 
     def __str__(self):
         return 'Sobre de {0}, valor=${1}'.format(
             self.persona.__str__(),
             self.valor
         )
+
+
+class SobreMonthlyRollup(models.Model):
+    """
+    Resumen mensual de los sobres, por tipo de ingreso, forma de pago y diligenciado.
+
+    Se mantiene con las señales de Sobre, y se reconstruye con el comando reconstruir_rollup.
+    """
+
+    year = models.PositiveSmallIntegerField(verbose_name=_('año'))
+    month = models.PositiveSmallIntegerField(verbose_name=_('mes'))
+    tipo_ingreso = models.ForeignKey(TipoIngreso, verbose_name=_('tipo ingreso'), related_name='rollups')
+    forma_pago = models.CharField(max_length=2, verbose_name=_('forma de pago'), choices=Sobre.FORMAS_PAGO)
+    diligenciado = models.BooleanField(verbose_name=_('sobre diligenciado'))
+    total = models.BigIntegerField(verbose_name=_('total'), default=0)
+    cantidad = models.PositiveIntegerField(verbose_name=_('cantidad'), default=0)
+
+    objects = SobreMonthlyRollupQuerySet().as_manager()
+
+    class Meta:
+        verbose_name = _('Resumen mensual de sobres')
+        verbose_name_plural = _('Resumenes mensuales de sobres')
+        unique_together = ('year', 'month', 'tipo_ingreso', 'forma_pago', 'diligenciado')
+
+    def __str__(self):
+        return '{0}/{1} {2}, total=${3}'.format(self.month, self.year, self.tipo_ingreso_id, self.total)
+
+
+class ImportacionSobres(models.Model):
+    """
+    Importacion de sobres desde un archivo de excel, que procesa en segundo plano el
+    comando procesar_importaciones.
+    """
+
+    PENDIENTE = 'PE'
+    PROCESANDO = 'PR'
+    TERMINADA = 'TE'
+    FALLIDA = 'FA'
+
+    ESTADOS = (
+        (PENDIENTE, 'PENDIENTE'),
+        (PROCESANDO, 'PROCESANDO'),
+        (TERMINADA, 'TERMINADA'),
+        (FALLIDA, 'FALLIDA'),
+    )
+
+    archivo = models.FileField(verbose_name=_('archivo'), upload_to='importaciones/%Y/%m/')
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL, verbose_name=_('usuario'), blank=True, null=True, related_name='importaciones'
+    )
+    estado = models.CharField(max_length=2, verbose_name=_('estado'), choices=ESTADOS, default=PENDIENTE)
+    creada = models.DateTimeField(verbose_name=_('creada'), auto_now_add=True)
+    iniciada = models.DateTimeField(verbose_name=_('iniciada'), blank=True, null=True)
+    terminada = models.DateTimeField(verbose_name=_('terminada'), blank=True, null=True)
+    total_filas = models.PositiveIntegerField(verbose_name=_('total de filas'), blank=True, null=True)
+    filas_procesadas = models.PositiveIntegerField(verbose_name=_('filas procesadas'), default=0)
+    filas_fallidas = models.PositiveIntegerField(verbose_name=_('filas fallidas'), default=0)
+    sobres_creados = models.PositiveIntegerField(verbose_name=_('sobres creados'), default=0)
+    log = models.TextField(verbose_name=_('log'), blank=True)
+
+    objects = ImportacionSobresQuerySet().as_manager()
+
+    class Meta:
+        verbose_name = _('Importacion de sobres')
+        verbose_name_plural = _('Importaciones de sobres')
+
+    def __str__(self):
+        return 'Importacion #{0}, {1}'.format(self.pk, self.get_estado_display())
+
+    def get_duracion(self):
+        """Retorna los segundos que lleva (o que tomo) la importacion."""
+        if self.iniciada is None:
+            return 0
+        return ((self.terminada or timezone.now()) - self.iniciada).total_seconds()
+
+    def get_throughput(self):
+        """Retorna las filas procesadas por segundo."""
+        duracion = self.get_duracion()
+        return self.filas_procesadas / duracion if duracion > 0 else 0
+
+    def get_eta(self):
+        """Retorna los segundos que faltan, o None si no se pueden calcular."""
+        if self.estado != self.PROCESANDO or self.total_filas is None:
+            return None
+        throughput = self.get_throughput()
+        if not throughput:
+            return None
+        return max(self.total_filas - self.filas_procesadas, 0) / throughput
+
+    def get_estado(self):
+        """Retorna el estado de la importacion, para la API."""
+        eta = self.get_eta()
+        return {
+            'id': self.pk,
+            'estado': self.estado,
+            'estado_display': self.get_estado_display(),
+            'total_filas': self.total_filas,
+            'filas_procesadas': self.filas_procesadas,
+            'filas_fallidas': self.filas_fallidas,
+            'sobres_creados': self.sobres_creados,
+            'throughput': round(self.get_throughput(), 2),
+            'eta': round(eta) if eta is not None else None,
+            'terminada': self.estado in (self.TERMINADA, self.FALLIDA),
+        }
@@ -0,0 +1,53 @@
+"""
+Grupos de los usuarios, para las verificaciones de permisos.
+
+Los nombres de los grupos de cada usuario se consultan una vez, se guardan en el
+usuario para el resto de la peticion, y en cache con una version que cambia cuando
+cambian los grupos de cualquier usuario.
+"""
+
+# Django imports
+from django.core.cache import cache
+
+# Locale imports
+from .versiones import get_version, invalidar
+
+
+__author__ = 'German Alzate'
+
+# segundos que se guardan los grupos de un usuario en cache
+CACHE_TIMEOUT = 60 * 60
+
+# llave de la version de los grupos en cache, cambia cuando cambian los grupos
+CACHE_VERSION_KEY = 'usuarios:grupos:version'
+
+
+def invalidar_grupos():
+    """Invalida los grupos en cache de todos los usuarios."""
+    invalidar(CACHE_VERSION_KEY)
+
+
+def get_grupos(user):
+    """Retorna el conjunto de nombres de los grupos del usuario."""
+
+    if not user.is_authenticated():
+        return frozenset()
+
+    # se guardan en el usuario para el resto de la peticion
+    grupos = getattr(user, '_grupos', None)
+    if grupos is not None:
+        return grupos
+
+    key = 'usuarios:grupos:{}:{}'.format(get_version(CACHE_VERSION_KEY), user.pk)
+    grupos = cache.get(key)
+    if grupos is None:
+        grupos = frozenset(user.groups.values_list('name', flat=True))
+        cache.set(key, grupos, CACHE_TIMEOUT)
+
+    user._grupos = grupos
+    return grupos
+
+
+def pertenece_grupo(user, grupos):
+    """Indica si el usuario pertenece a alguno de los grupos, sin tener en cuenta si es superusuario."""
+    return not get_grupos(user).isdisjoint(grupos)
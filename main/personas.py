@@ -0,0 +1,181 @@
+"""
+Resolucion de personas por id o por cedula, compartida por el formulario de sobres,
+la importacion y el api.
+
+Las personas se guardan en cache por poco tiempo, con una version que cambia cuando
+cambia cualquier persona. Las personas que no existen se crean con un solo insert, y
+si la cedula ya existe (por ejemplo, si otra peticion la creo) se usa la existente.
+"""
+
+# Django imports
+from django.core.cache import cache
+from django.db import transaction, IntegrityError
+
+# Locale imports
+from .models import Persona
+from .search import invalidar_busquedas
+from .versiones import get_version, invalidar
+
+
+__author__ = 'German Alzate'
+
+# segundos que se guardan las personas en cache
+CACHE_TIMEOUT = 30
+
+# llave de la version de las personas en cache, cambia cuando cambia una persona
+CACHE_VERSION_KEY = 'personas:version'
+
+
+def invalidar_personas():
+    """Invalida todas las personas en cache."""
+    invalidar(CACHE_VERSION_KEY)
+
+
+def get_key_id(version, pk):
+    return 'personas:id:{}:{}'.format(version, pk)
+
+
+def get_key_cedula(version, cedula):
+    return 'personas:cedula:{}:{}'.format(version, cedula)
+
+
+def en_transaccion():
+    """
+    Indica si hay una transaccion abierta. Dentro de una transaccion no se guardan
+    personas en cache, porque si se revierte quedarian ids que no existen.
+    """
+    return transaction.get_connection().in_atomic_block
+
+
+def guardar_persona(persona, version=None):
+    """Guarda la persona en cache, por id y por cedula."""
+    if en_transaccion():
+        return
+    version = get_version(CACHE_VERSION_KEY) if version is None else version
+    cache.set_many({
+        get_key_id(version, persona.pk): persona,
+        get_key_cedula(version, persona.cedula): persona.pk,
+    }, CACHE_TIMEOUT)
+
+
+def convertir_id(valor):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def get_persona(pk):
+    """Retorna la persona con el id, o None si no existe o el id no es valido."""
+
+    pk = convertir_id(pk)
+    if pk is None:
+        return None
+
+    version = get_version(CACHE_VERSION_KEY)
+    persona = cache.get(get_key_id(version, pk))
+    if persona is None:
+        persona = Persona.objects.filter(pk=pk).first()
+        if persona is not None:
+            guardar_persona(persona, version)
+    return persona
+
+
+def get_personas(pks):
+    """Retorna un diccionario de id a persona, de las personas que existen."""
+
+    pks = {pk for pk in map(convertir_id, pks) if pk is not None}
+    if not pks:
+        return {}
+
+    version = get_version(CACHE_VERSION_KEY)
+    keys = {get_key_id(version, pk): pk for pk in pks}
+    personas = {keys[key]: persona for key, persona in cache.get_many(list(keys)).items()}
+
+    faltantes = pks.difference(personas)
+    if faltantes:
+        encontradas = Persona.objects.in_bulk(faltantes)
+        if not en_transaccion():
+            cache.set_many(
+                {get_key_id(version, pk): persona for pk, persona in encontradas.items()}, CACHE_TIMEOUT
+            )
+        personas.update(encontradas)
+    return personas
+
+
+def get_persona_por_cedula(cedula):
+    """Retorna la persona con la cedula, o None si no existe."""
+
+    version = get_version(CACHE_VERSION_KEY)
+    pk = cache.get(get_key_cedula(version, cedula))
+    if pk is not None:
+        persona = get_persona(pk)
+        # si la cedula de la persona cambio, se consulta de nuevo
+        if persona is not None and persona.cedula == cedula:
+            return persona
+
+    persona = Persona.objects.filter(cedula=cedula).first()
+    if persona is not None:
+        guardar_persona(persona, version)
+    return persona
+
+
+def crear_persona(datos):
+    """
+    Retorna la persona con la cedula de datos, si no existe la crea con un insert. Las
+    personas existentes no se modifican.
+    """
+
+    persona = get_persona_por_cedula(datos['cedula'])
+    if persona is not None:
+        return persona
+
+    try:
+        with transaction.atomic():
+            persona = Persona.objects.create(**datos)
+    except IntegrityError:
+        # otra peticion creo la persona con la misma cedula
+        persona = Persona.objects.get(cedula=datos['cedula'])
+
+    guardar_persona(persona)
+    return persona
+
+
+def resolver_personas(personas):
+    """
+    Recibe un diccionario de cedula a los datos de la persona, y retorna un diccionario
+    de cedula a id, y la lista [(cedula, campos vacios)] de las personas nuevas que no
+    se pudieron crear. Las personas que no estan en cache se buscan con una consulta, y
+    las que no existen se crean con bulk_create.
+    """
+
+    if not personas:
+        return {}, []
+
+    version = get_version(CACHE_VERSION_KEY)
+    keys = {get_key_cedula(version, cedula): cedula for cedula in personas}
+    ids = {keys[key]: pk for key, pk in cache.get_many(list(keys)).items()}
+
+    faltantes = [cedula for cedula in personas if cedula not in ids]
+    if faltantes:
+        encontradas = dict(Persona.objects.filter(cedula__in=faltantes).values_list('cedula', 'id'))
+        ids.update(encontradas)
+
+        nuevas = {cedula: Persona(**personas[cedula]) for cedula in faltantes if cedula not in encontradas}
+        validas, invalidas = Persona.validar_lote(list(nuevas.values()))
+        if validas:
+            Persona.objects.bulk_create(validas)
+            # bulk_create no asigna los ids, se consultan los creados
+            creadas = dict(Persona.objects.filter(cedula__in=[x.cedula for x in validas]).values_list('cedula', 'id'))
+            encontradas.update(creadas)
+            ids.update(creadas)
+            # bulk_create no envia señales, se invalidan las busquedas de personas
+            invalidar_busquedas()
+
+        if not en_transaccion():
+            cache.set_many({get_key_cedula(version, cedula): pk for cedula, pk in encontradas.items()}, CACHE_TIMEOUT)
+        invalidas = [(persona.cedula, vacios) for persona, vacios in invalidas]
+    else:
+        invalidas = []
+
+    return ids, invalidas
@@ -0,0 +1,59 @@
+"""
+Reportes de la aplicacion, calculados con consultas agrupadas.
+"""
+
+# Django imports
+from django.db.models import Sum
+
+# Locale imports
+from .models import Sobre, TipoIngreso
+
+# Python imports
+from collections import OrderedDict, defaultdict
+
+
+__author__ = 'German Alzate'
+
+
+def pivot(queryset, fila, columna, valor):
+    """
+    Retorna un diccionario {fila: {columna: total}} con la suma de `valor` de los objetos
+    de queryset, agrupados por `fila` y `columna` en una sola consulta.
+
+    Los filtros se aplican al queryset (en el WHERE), asi la consulta usa los indices y
+    solo agrupa los objetos que cumplen los filtros.
+    """
+
+    tabla = defaultdict(dict)
+    # se quita el orden por defecto, para que no se agregue al GROUP BY
+    for grupo in queryset.values(fila, columna).annotate(total=Sum(valor)).order_by():
+        tabla[grupo[fila]][grupo[columna]] = grupo['total']
+    return tabla
+
+
+def tabla_contribuciones(**filtros):
+    """
+    Retorna la tabla de totales por tipo de ingreso y forma de pago de los sobres
+    que cumplen los filtros, con el total por fila y la fila 'TOTAL' al final.
+    """
+
+    totales = pivot(Sobre.objects.filter(**filtros), 'tipo_ingreso', 'forma_pago', 'valor')
+
+    # se crea la tabla, de forma ordenada, para que sea a menera cola
+    tabla = OrderedDict({'TOTAL': {'total': 0}})
+    tabla['TOTAL'].update({forma: 0 for codigo, forma in Sobre.FORMAS_PAGO})
+
+    # los tipos de ingreso sin sobres quedan en cero
+    for tipo in TipoIngreso.objects.all():
+        _totales = {'total': 0}
+        for codigo, forma in Sobre.FORMAS_PAGO:
+            valor = totales.get(tipo.pk, {}).get(codigo, 0)
+            _totales[forma] = valor
+            _totales['total'] += valor
+            tabla['TOTAL'][forma] += valor
+
+        tabla['TOTAL']['total'] += _totales['total']
+        tabla[str(tipo)] = _totales
+
+    # se vuelve a ordenar la tabla de manera inversa para que el total salga de ultimo
+    return OrderedDict(reversed(list(tabla.items())))
@@ -0,0 +1,69 @@
+"""
+Router de la base de datos de lectura, para los reportes y el dashboard.
+
+Las vistas marcadas con el decorador solo_lectura leen los datos de la aplicacion del
+alias DATABASE_LECTURA (una replica), si esta configurado. Despues de que el usuario hace
+un POST, sus lecturas se hacen en la base de datos principal durante LECTURA_FIJA segundos,
+para que vea lo que acaba de guardar aunque la replica este atrasada.
+"""
+
+# Django imports
+from django.conf import settings
+from django.db import connections
+
+# Python imports
+from contextlib import contextmanager
+import threading
+
+
+__author__ = 'German Alzate'
+
+# alias de la base de datos de lectura
+DATABASE_LECTURA = getattr(settings, 'DATABASE_LECTURA', 'lectura')
+
+# segundos que las lecturas del usuario van a la base de datos principal despues de un POST
+LECTURA_FIJA = getattr(settings, 'LECTURA_FIJA', 15)
+
+# cookie que marca al usuario que acaba de escribir
+COOKIE_ESCRITURA = 'db_escritura'
+
+# aplicaciones que se leen de la replica, las sesiones y los usuarios siempre van a la principal
+APPS_LECTURA = ('main', )
+
+_estado = threading.local()
+
+
+def lectura_configurada():
+    return DATABASE_LECTURA in connections.databases
+
+
+def escritura_reciente(request):
+    """Retorna True si el usuario hizo un POST hace menos de LECTURA_FIJA segundos."""
+    return COOKIE_ESCRITURA in request.COOKIES
+
+
+@contextmanager
+def lectura():
+    """Las consultas dentro del contexto se leen de la base de datos de lectura."""
+    anterior = getattr(_estado, 'activa', False)
+    _estado.activa = True
+    try:
+        yield
+    finally:
+        _estado.activa = anterior
+
+
+class LecturaRouter(object):
+    """Envia las lecturas de los contextos de lectura a DATABASE_LECTURA."""
+
+    def db_for_read(self, model, **hints):
+        if getattr(_estado, 'activa', False) and model._meta.app_label in APPS_LECTURA and lectura_configurada():
+            return DATABASE_LECTURA
+        return None
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # la replica tiene los mismos datos que la principal
+        return True
@@ -0,0 +1,339 @@
+"""
+Motores de busqueda de personas.
+
+El backend se escoge con el setting PERSONA_SEARCH_BACKEND (ruta a la clase), si no
+se define se usa PostgresPersonaSearch en postgres y MemoryPersonaSearch en otras
+bases de datos (sqlite, pruebas).
+"""
+
+# Django imports
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+# Locale imports
+from .models import Persona
+from .versiones import get_version, invalidar
+
+# Python imports
+from bisect import bisect_left
+from collections import deque
+from functools import reduce
+from heapq import nsmallest
+import operator
+import threading
+
+
+__author__ = 'German Alzate'
+
+# numero maximo de digitos de un BigIntegerField
+MAX_DIGITOS_CEDULA = 19
+
+# tamaño de los n-gramas usados para buscar subcadenas
+NGRAMA = 3
+
+# campos que se cargan de las personas encontradas
+CAMPOS_BUSQUEDA = ('nombre', 'primer_apellido', 'segundo_apellido', 'cedula')
+
+# numero de personas por defecto y maximo de una busqueda, y maximo offset
+LIMITE_BUSQUEDA = 10
+MAXIMO_LIMITE_BUSQUEDA = 50
+MAXIMO_OFFSET_BUSQUEDA = 500
+
+# segundos que se guardan en cache los resultados de una busqueda
+CACHE_TIMEOUT = 60
+
+# llave de la version de las busquedas en cache, cambia cuando cambian las personas
+CACHE_VERSION_KEY = 'personas:busqueda:version'
+
+
+def normalizar(value):
+    """Retorna el texto en minuscula, sin espacios repetidos."""
+    return ' '.join(str(value).lower().split())
+
+
+def cedula_prefix_ranges(prefix):
+    """
+    Retorna los rangos (inicio, fin) de las cedulas que empiezan por prefix, de
+    modo que la busqueda por prefijo use el indice unico de la cedula.
+    """
+
+    prefix = str(prefix).lstrip('0')
+
+    if not prefix.isdigit():
+        return []
+
+    inicio = int(prefix)
+    ranges = []
+    for digitos in range(MAX_DIGITOS_CEDULA - len(prefix) + 1):
+        # cedulas con el prefijo, y `digitos` digitos adicionales
+        potencia = 10 ** digitos
+        ranges.append((inicio * potencia, (inicio + 1) * potencia - 1))
+    return ranges
+
+
+def cedula_prefix_q(prefix):
+    """Retorna un objeto Q para buscar las cedulas por prefijo."""
+
+    ranges = cedula_prefix_ranges(prefix)
+
+    if not ranges:
+        return None
+
+    return reduce(operator.or_, [Q(cedula__range=rango) for rango in ranges])
+
+
+class BasePersonaSearch(object):
+    """Clase base para los motores de busqueda de personas."""
+
+    def search(self, value, limit=10, offset=0):
+        """Retorna una lista de personas ordenadas por relevancia, desde offset."""
+        raise NotImplementedError('Método search no implementado en %s' % self.__class__.__name__)
+
+    def get_queryset(self):
+        return Persona.objects.only(*CAMPOS_BUSQUEDA)
+
+    def search_cedula(self, value, limit, offset=0):
+        """Busca las personas cuya cedula empieza por value."""
+        query = cedula_prefix_q(value)
+        if query is None:
+            return []
+        return list(self.get_queryset().filter(query).order_by('cedula')[offset:offset + limit])
+
+
+class PostgresPersonaSearch(BasePersonaSearch):
+    """
+    Busqueda con trigramas de postgres (pg_trgm), usa los indices GIN creados en la
+    migracion 0004 sobre el nombre completo de la persona.
+    """
+
+    NOMBRE_COMPLETO = (
+        "lower(main_persona.nombre || ' ' || main_persona.primer_apellido || ' ' || "
+        "main_persona.segundo_apellido)"
+    )
+
+    @staticmethod
+    def escape_like(value):
+        return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+    def search(self, value, limit=10, offset=0):
+        value = normalizar(value)
+
+        if not value:
+            return []
+
+        if value.isdigit():
+            return self.search_cedula(value, limit, offset)
+
+        tokens = value.split()
+        queryset = self.get_queryset().extra(
+            select={'rank': 'similarity({}, %s)'.format(self.NOMBRE_COMPLETO)},
+            select_params=(value, ),
+            where=['{} LIKE %s'.format(self.NOMBRE_COMPLETO)] * len(tokens),
+            params=['%{}%'.format(self.escape_like(token)) for token in tokens],
+            order_by=['-rank', 'nombre']
+        )
+        return list(queryset[offset:offset + limit])
+
+
+class MemoryPersonaSearch(BasePersonaSearch):
+    """
+    Indice en memoria del proceso, para bases de datos sin pg_trgm (desarrollo y pruebas).
+
+    Guarda un trie con las palabras de los nombres, los n-gramas de los nombres
+    completos para buscar subcadenas, y una lista ordenada de cedulas para buscar
+    por prefijo. Se carga en la primera busqueda, y se vuelve a cargar completo cuando
+    cambia la version de las busquedas en cache: al guardar o eliminar personas en
+    cualquier proceso, y al crearlas con bulk_create en la importacion o los lotes.
+    Cada proceso tiene su propio indice, por eso en produccion se usa PostgresPersonaSearch.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.loaded = False
+        # version de las busquedas con la que se cargo el indice
+        self.version = None
+        self.clear()
+
+    def clear(self):
+        self.trie = {}
+        self.ngramas = {}
+        self.cedulas = []
+        self.documentos = {}
+
+    def load(self):
+        """Carga todas las personas de la base de datos en el indice."""
+        with self.lock:
+            self.clear()
+            queryset = Persona.objects.values_list('id', 'nombre', 'primer_apellido', 'segundo_apellido', 'cedula')
+            for persona in queryset.iterator():
+                self.add(*persona)
+            # se ordenan las cedulas una sola vez al final de la carga
+            self.cedulas.sort()
+            self.loaded = True
+
+    def add(self, id, nombre, primer_apellido, segundo_apellido, cedula):
+        """Agrega una persona al indice, las cedulas se ordenan al final de load."""
+        texto = normalizar(' '.join([nombre, primer_apellido, segundo_apellido or '']))
+        cedula = str(cedula)
+        self.documentos[id] = (texto, cedula)
+
+        for token in set(texto.split()):
+            node = self.trie
+            for letra in token:
+                node = node.setdefault(letra, {})
+            node.setdefault(None, set()).add(id)
+
+        for ngrama in self.get_ngramas(texto):
+            self.ngramas.setdefault(ngrama, set()).add(id)
+
+        self.cedulas.append((cedula, id))
+
+    @staticmethod
+    def get_ngramas(texto):
+        return {texto[i:i + NGRAMA] for i in range(len(texto) - NGRAMA + 1)}
+
+    def prefix(self, token, limit=None):
+        """
+        Retorna los ids de las palabras que empiezan por token, las palabras mas cortas
+        primero, se detiene al llegar a limit.
+        """
+        node = self.trie
+        for letra in token:
+            node = node.get(letra)
+            if node is None:
+                return []
+
+        ids = []
+        vistos = set()
+        cola = deque([node])
+        while cola:
+            node = cola.popleft()
+            for key, value in node.items():
+                if key is None:
+                    for id in value - vistos:
+                        vistos.add(id)
+                        ids.append(id)
+                else:
+                    cola.append(value)
+            if limit is not None and len(ids) >= limit:
+                break
+        return ids
+
+    def substring(self, value):
+        """Retorna los ids de los nombres que contienen value."""
+        ngramas = sorted(
+            (self.ngramas.get(ngrama, set()) for ngrama in self.get_ngramas(value)), key=len
+        )
+        if not ngramas:
+            return []
+        ids = set.intersection(*ngramas)
+        documentos = self.documentos
+        return [id for id in ids if value in documentos[id][0]]
+
+    def ids_cedula(self, value, limit):
+        """Retorna los ids de las personas cuya cedula empieza por value."""
+        ids = []
+        index = bisect_left(self.cedulas, (value, ))
+        while index < len(self.cedulas) and len(ids) < limit:
+            cedula, id = self.cedulas[index]
+            if not cedula.startswith(value):
+                break
+            ids.append(id)
+            index += 1
+        return ids
+
+    def search_ids(self, value, limit):
+        """Retorna los ids de las personas ordenados por relevancia."""
+        if value.isdigit():
+            return self.ids_cedula(value, limit)
+
+        tokens = value.split()
+        if len(tokens) == 1:
+            # primero las palabras que empiezan por el valor, luego las que lo contienen
+            ids = self.prefix(value, limit)
+            if len(ids) < limit and len(value) >= NGRAMA:
+                vistos = set(ids)
+                extras = (id for id in self.substring(value) if id not in vistos)
+                ids.extend(nsmallest(limit - len(ids), extras, key=lambda id: self.documentos[id][0]))
+            return ids[:limit]
+
+        # con varias palabras, cada una debe ser prefijo de alguna palabra del nombre
+        tokens.sort(key=len, reverse=True)
+        ids = []
+        for id in self.prefix(tokens[0]):
+            palabras = self.documentos[id][0].split()
+            if all(any(palabra.startswith(token) for palabra in palabras) for token in tokens[1:]):
+                ids.append(id)
+        return nsmallest(
+            limit, ids, key=lambda id: (not self.documentos[id][0].startswith(value), self.documentos[id][0])
+        )
+
+    def search(self, value, limit=10, offset=0):
+        value = normalizar(value)
+
+        if not value:
+            return []
+
+        version = get_version(CACHE_VERSION_KEY)
+        with self.lock:
+            if not self.loaded or self.version != version:
+                self.load()
+                self.version = version
+            ids = self.search_ids(value, offset + limit)[offset:]
+
+        personas = self.get_queryset().in_bulk(ids)
+        return [personas[id] for id in ids if id in personas]
+
+
+_backend = None
+
+
+def get_backend():
+    """Retorna la instancia del motor de busqueda de personas configurado."""
+
+    global _backend
+
+    if _backend is None:
+        path = getattr(settings, 'PERSONA_SEARCH_BACKEND', None)
+        if path is None:
+            if connection.vendor == 'postgresql':
+                path = 'main.search.PostgresPersonaSearch'
+            else:
+                path = 'main.search.MemoryPersonaSearch'
+        _backend = import_string(path)()
+    return _backend
+
+
+def invalidar_busquedas():
+    """Invalida todas las busquedas de personas en cache."""
+    invalidar(CACHE_VERSION_KEY)
+
+
+def buscar_personas(value, limit=LIMITE_BUSQUEDA, offset=0):
+    """
+    Retorna las personas que coinciden con value, desde offset, como diccionarios con
+    id, nombre, primer_apellido y cedula. Los resultados se guardan en cache por
+    CACHE_TIMEOUT.
+    """
+
+    value = normalizar(value)
+
+    if not value:
+        return []
+
+    key = 'personas:busqueda:{}:{}:{}:{}'.format(get_version(CACHE_VERSION_KEY), limit, offset, value)
+    personas = cache.get(key)
+
+    if personas is None:
+        personas = [
+            {
+                'id': persona.id, 'nombre': persona.nombre,
+                'primer_apellido': persona.primer_apellido, 'cedula': persona.cedula
+            } for persona in get_backend().search(value, limit=limit, offset=offset)
+        ]
+        cache.set(key, personas, CACHE_TIMEOUT)
+
+    return personas
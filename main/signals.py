@@ -0,0 +1,82 @@
+"""
+Señales de la aplicacion.
+"""
+
+# Django imports
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db.models.signals import pre_save, post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+# Locale imports
+from .backends import invalidar_usuarios
+from .models import Persona, Sobre, SobreMonthlyRollup
+from .permisos import invalidar_grupos
+from .personas import invalidar_personas
+from .search import invalidar_busquedas
+
+
+__author__ = 'German Alzate'
+
+
+@receiver(pre_save, sender=Sobre)
+def guardar_sobre_anterior(sender, instance, raw=False, **kwargs):
+    """Guarda el sobre como estaba en la base de datos, para restarlo del resumen."""
+
+    instance._sobre_anterior = None
+
+    if instance.pk is not None and not raw:
+        instance._sobre_anterior = Sobre.objects.only(
+            'fecha', 'tipo_ingreso', 'forma_pago', 'diligenciado', 'valor'
+        ).filter(pk=instance.pk).first()
+
+
+@receiver(post_save, sender=Sobre)
+def actualizar_rollup_sobre_guardado(sender, instance, raw=False, **kwargs):
+    """Actualiza el resumen mensual con el sobre guardado."""
+
+    if raw:
+        return
+
+    anterior = getattr(instance, '_sobre_anterior', None)
+    if anterior is not None:
+        SobreMonthlyRollup.objects.registrar([anterior], signo=-1)
+    SobreMonthlyRollup.objects.registrar([instance])
+
+
+@receiver(post_delete, sender=Sobre)
+def actualizar_rollup_sobre_eliminado(sender, instance, **kwargs):
+    """Resta el sobre eliminado del resumen mensual."""
+
+    SobreMonthlyRollup.objects.registrar([instance], signo=-1)
+
+
+@receiver(post_save, sender=Persona)
+@receiver(post_delete, sender=Persona)
+def invalidar_busquedas_personas(sender, created=False, **kwargs):
+    """Invalida las busquedas y las personas en cache cuando cambia una persona."""
+
+    invalidar_busquedas()
+    # las personas nuevas no estan en cache
+    if not created:
+        invalidar_personas()
+
+
+@receiver(m2m_changed, sender=get_user_model().groups.through)
+@receiver(post_delete, sender=get_user_model())
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidar_grupos_usuarios(sender, action=None, **kwargs):
+    """Invalida los grupos de los usuarios en cache cuando cambian los grupos."""
+
+    if action is None or action in ('post_add', 'post_remove', 'post_clear'):
+        invalidar_grupos()
+        invalidar_usuarios()
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidar_usuario_guardado(sender, instance, **kwargs):
+    """Invalida el usuario en cache cuando se guarda (por ejemplo, al cambiar la contraseña) o se elimina."""
+
+    invalidar_usuarios()
@@ -2,6 +2,9 @@
 from django import template
 from django.contrib.auth.models import Group
 
+# Locale imports
+from main import permisos
+
 __author__ = 'german alzate'
 
 register = template.Library()
@@ -19,4 +22,4 @@ def pertenece_grupo(usuario, grupos):
     if usuario.is_superuser and usuario.is_staff:  # si es superusuario
         return True
 
-    return usuario.groups.filter(name__in=_grupos).exists()
+    return permisos.pertenece_grupo(usuario, _grupos)
@@ -19,6 +19,7 @@ from django.views.generic import View
 from django.views.generic.edit import UpdateView
 from django.core.urlresolvers import reverse
 from django.conf import settings
+from django.core.cache import caches
 
 # Locale imports
 from .. import constants
@@ -26,6 +27,7 @@ from ..urls import urlpatterns
 
 # Python imports
 import datetime
+import json
 
 
 class MetaClassTest(object):
@@ -70,8 +72,8 @@ class CustomBaseTestCase(TestCase):
         if not isinstance(response, dict):
             # si no es un diccionario
             try:
-                # se evalua la respuesta, debe ser estring, y se le quita el bytecode
-                response = eval(response.decode('utf-8'))
+                # se lee el JSON de la respuesta, con true, false y null
+                response = json.loads(response.decode('utf-8'))
                 if not isinstance(response, dict):
                     # si no retorna un JSON o diccionario, levanta una excepcion
                     raise ValueError("Expected 'dict', found '%s'." % response.__class__.__name__)
@@ -193,6 +195,9 @@ class CustomBaseTestCase(TestCase):
     def setUp(self):
         self.client = Client()
         self._configure_meta()
+        # los ids se repiten entre pruebas, se limpian los datos en cache
+        for cache in caches.all():
+            cache.clear()
 
 
 class ModelTestCase(CustomBaseTestCase):
@@ -0,0 +1,275 @@
+# Django imports
+from django.core.urlresolvers import reverse
+from django.test import Client
+from django.utils import timezone
+
+# Locale imports
+from .base_test import CustomBaseTestCase, ViewTestCase
+from .. import constants
+from ..api import listar_sobres_api
+from ..lotes import MAXIMO_LOTE
+from ..models import Persona, Sobre, TipoIngreso, ImportacionSobres
+from ..search import LIMITE_BUSQUEDA, MAXIMO_LIMITE_BUSQUEDA
+
+# Python imports
+from unittest import mock
+import datetime
+import json
+
+
+class GetPersonasApiTest(CustomBaseTestCase):
+    """Pruebas para el api de busqueda de personas."""
+
+    def setUp(self):
+        super().setUp()
+        # cada prueba usa un motor de busqueda nuevo, las personas de otras pruebas ya no existen
+        backend = mock.patch('main.search._backend', None)
+        backend.start()
+        self.addCleanup(backend.stop)
+        self.persona = Persona.objects.create(
+            nombre='Juan', primer_apellido='Perez', segundo_apellido='', cedula=1045678
+        )
+
+    def test_search_returns_personas(self):
+        """Verifica que el api retorne las personas encontradas."""
+
+        response = self.client.get(reverse('main:api>get_personas'), {'q': 'jua'})
+        data = self.get_response_data(response)
+
+        self.assertEqual(data[constants.RESPONSE_CODE], constants.RESPONSE_SUCCESS)
+        self.assertEqual(data['personas'], [{
+            'id': self.persona.id, 'nombre': 'Juan', 'primer_apellido': 'Perez', 'cedula': 1045678
+        }])
+
+    def test_search_limit_offset(self):
+        """Verifica la paginacion de la busqueda, con el maximo del servidor y has_more."""
+
+        for i in range(60):
+            Persona.objects.create(nombre='Juan', primer_apellido='Gomez', cedula=2000 + i)
+        url = reverse('main:api>get_personas')
+
+        data = self.get_response_data(self.client.get(url, {'q': '20', 'limit': 5, 'offset': 55}))
+        self.assertEqual([x['cedula'] for x in data['personas']], list(range(2055, 2060)))
+        self.assertFalse(data['has_more'])
+
+        data = self.get_response_data(self.client.get(url, {'q': '20', 'limit': 5, 'offset': 50}))
+        self.assertTrue(data['has_more'])
+
+        # el limite no puede pasar del maximo
+        data = self.get_response_data(self.client.get(url, {'q': '20', 'limit': 1000}))
+        self.assertEqual(data['limit'], MAXIMO_LIMITE_BUSQUEDA)
+        self.assertEqual(len(data['personas']), MAXIMO_LIMITE_BUSQUEDA)
+        self.assertTrue(data['has_more'])
+
+        data = self.get_response_data(self.client.get(url, {'q': 'juan', 'limit': 'x', 'offset': -3}))
+        self.assertEqual((data['limit'], data['offset']), (LIMITE_BUSQUEDA, 0))
+        self.assertEqual(len(data['personas']), LIMITE_BUSQUEDA)
+
+    def test_search_cached_until_persona_changes(self):
+        """Verifica que la busqueda se guarde en cache, y se invalide al cambiar una persona."""
+
+        url = reverse('main:api>get_personas')
+        self.client.get(url, {'q': 'jua'})
+
+        # la segunda busqueda no consulta la base de datos
+        with self.assertNumQueries(0):
+            self.client.get(url, {'q': 'jua'})
+
+        self.persona.nombre = 'Juanito'
+        self.persona.save()
+
+        data = self.get_response_data(self.client.get(url, {'q': 'jua'}))
+        self.assertEqual(data['personas'][0]['nombre'], 'Juanito')
+
+
+class ListarSobresApiTest(ViewTestCase):
+    """Pruebas para el api server-side de DataTables de los sobres."""
+
+    class Meta:
+        view = listar_sobres_api
+
+    def setUp(self):
+        super().setUp()
+        tipo = TipoIngreso.objects.create(nombre='diezmo')
+        self.persona = Persona.objects.create(nombre='Juan', primer_apellido='Perez', cedula=1045678)
+        self.fecha = datetime.date(2016, 12, 4)
+        self.sobres = [
+            Sobre.objects.create(
+                fecha=self.fecha + datetime.timedelta(days=i % 3), tipo_ingreso=tipo, valor=(i + 1) * 10,
+                forma_pago=Sobre.EFECTIVO, persona=self.persona if i % 2 else None
+            ) for i in range(25)
+        ]
+        # se ordenan como los debe retornar el api
+        self.sobres.sort(key=lambda sobre: (sobre.fecha, sobre.id))
+
+    def get_data(self, **params):
+        params.setdefault('fecha_inicial', self.fecha.strftime(constants.DATE_FORMAT))
+        params.setdefault('fecha_final', (self.fecha + datetime.timedelta(days=5)).strftime(constants.DATE_FORMAT))
+        return self.get_response_data(self.GET(data=params))
+
+    def test_paging(self):
+        """Verifica la paginacion con OFFSET y el total de registros."""
+
+        data = self.get_data(draw=3, start=10, length=10)
+
+        self.assertEqual(data['draw'], 3)
+        self.assertEqual(data['recordsTotal'], 25)
+        self.assertEqual(data['recordsFiltered'], 25)
+        self.assertEqual([x[3] for x in data['data']], ['${}'.format(x.valor) for x in self.sobres[10:20]])
+
+    def test_keyset_paging(self):
+        """Verifica que paginar con el cursor retorne las mismas filas que con OFFSET."""
+
+        data = self.get_data(start=0, length=10)
+        cursor = data['cursor']
+        self.assertEqual(cursor['start'], 10)
+
+        data = self.get_data(start=10, length=10, cursor=cursor['value'])
+        self.assertEqual([x[3] for x in data['data']], ['${}'.format(x.valor) for x in self.sobres[10:20]])
+
+        # descendente
+        ordenados = list(reversed(self.sobres))
+        data = self.get_data(start=0, length=10, **{'order[0][column]': 0, 'order[0][dir]': 'desc'})
+        data = self.get_data(start=10, length=10, cursor=data['cursor']['value'], **{
+            'order[0][column]': 0, 'order[0][dir]': 'desc'
+        })
+        self.assertEqual([x[3] for x in data['data']], ['${}'.format(x.valor) for x in ordenados[10:20]])
+
+    def test_search_and_ordering(self):
+        """Verifica la busqueda general, los filtros por columna y el orden por otras columnas."""
+
+        data = self.get_data(length=100, **{'search[value]': 'juan'})
+        self.assertEqual(data['recordsFiltered'], 12)
+
+        data = self.get_data(length=100, **{'columns[3][search][value]': '$250'})
+        self.assertEqual(data['recordsFiltered'], 1)
+
+        data = self.get_data(length=5, **{'order[0][column]': 3, 'order[0][dir]': 'desc'})
+        self.assertEqual(data['data'][0][3], '$250')
+
+    def test_invalid_range(self):
+        """Verifica que retorne error sin rango de fechas."""
+
+        data = self.get_data(fecha_inicial='')
+        self.assertEqual(data[constants.RESPONSE_CODE], constants.RESPONSE_ERROR)
+
+
+class GetImportacionApiTest(CustomBaseTestCase):
+    """Pruebas para el api del progreso de las importaciones."""
+
+    def setUp(self):
+        super().setUp()
+        user = self.get_user()
+        self.client.login(email=user.email, password=self.RAW_STRING)
+        self.importacion = ImportacionSobres.objects.create(archivo='importaciones/sobres.xlsx', usuario=user)
+
+    def get_data(self):
+        url = reverse('main:api>get_importacion', args=(self.importacion.pk, ))
+        return self.get_response_data(self.client.get(url))
+
+    def test_progreso(self):
+        """Verifica que retorne las filas procesadas, el throughput y el tiempo restante."""
+
+        ImportacionSobres.objects.filter(pk=self.importacion.pk).update(
+            estado=ImportacionSobres.PROCESANDO, total_filas=300, filas_procesadas=100, filas_fallidas=2,
+            iniciada=timezone.now() - datetime.timedelta(seconds=10)
+        )
+
+        data = self.get_data()
+
+        self.assertEqual(data[constants.RESPONSE_CODE], constants.RESPONSE_SUCCESS)
+        importacion = data['importacion']
+        self.assertEqual(importacion['filas_procesadas'], 100)
+        self.assertEqual(importacion['filas_fallidas'], 2)
+        self.assertAlmostEqual(importacion['throughput'], 10, delta=1)
+        self.assertAlmostEqual(importacion['eta'], 20, delta=3)
+        self.assertFalse(importacion['terminada'])
+        self.assertNotIn('log_url', importacion)
+
+    def test_log_al_terminar(self):
+        """Verifica que al terminar se pueda descargar el log."""
+
+        ImportacionSobres.objects.filter(pk=self.importacion.pk).update(
+            estado=ImportacionSobres.TERMINADA, log='*Sobre no agregada en fila #1\n'
+        )
+
+        data = self.get_data()
+        self.assertTrue(data['importacion']['terminada'])
+        self.assertIsNone(data['importacion']['eta'])
+
+        response = self.client.get(data['importacion']['log_url'])
+        self.assertEqual(response.content, b'*Sobre no agregada en fila #1\n')
+
+    def test_requiere_usuario(self):
+        """Verifica que el api no responda sin usuario."""
+
+        self.client.logout()
+        self.assertEqual(self.get_data()[constants.RESPONSE_CODE], constants.RESPONSE_DENIED)
+
+
+class CrearSobresApiTest(CustomBaseTestCase):
+    """Pruebas para el api de creacion de sobres por lotes."""
+
+    def setUp(self):
+        super().setUp()
+        user = self.get_user()
+        self.client.login(email=user.email, password=self.RAW_STRING)
+        self.tipo = TipoIngreso.objects.create(nombre='diezmo')
+        self.url = reverse('main:api>crear_sobres')
+
+    def post(self, data):
+        return self.get_response_data(self.client.post(self.url, json.dumps(data), content_type='application/json'))
+
+    def test_crear_lote(self):
+        """Verifica que se creen los sobres validos y retorne el resultado de cada uno."""
+
+        sobre = {'fecha': '04/12/2016', 'valor': 1000, 'tipo_ingreso': self.tipo.pk, 'forma_pago': 'EF'}
+        data = self.post({'sobres': [
+            dict(sobre, persona={'cedula': 111, 'nombre': 'Juan', 'primer_apellido': 'Perez'}),
+            dict(sobre, valor=None),
+        ]})
+
+        self.assertEqual(data[constants.RESPONSE_CODE], constants.RESPONSE_SUCCESS)
+        self.assertEqual(data['creados'], 1)
+        self.assertEqual([resultado['ok'] for resultado in data['resultados']], [True, False])
+        self.assertEqual(data['resultados'][1]['errores'], {'valor': 'campo vacio'})
+        self.assertEqual(Sobre.objects.get().persona.cedula, 111)
+
+    def test_lote_invalido(self):
+        """Verifica que se rechacen los cuerpos invalidos, los lotes muy grandes y los GET."""
+
+        response = self.client.post(self.url, 'no es json', content_type='application/json')
+        self.assertEqual(self.get_response_data(response)[constants.RESPONSE_CODE], constants.RESPONSE_ERROR)
+        self.assertEqual(self.post({'sobres': {}})[constants.RESPONSE_CODE], constants.RESPONSE_ERROR)
+        self.assertEqual(
+            self.post({'sobres': [{}] * (MAXIMO_LOTE + 1)})[constants.RESPONSE_CODE], constants.RESPONSE_ERROR
+        )
+        data = self.get_response_data(self.client.get(self.url))
+        self.assertEqual(data[constants.RESPONSE_CODE], constants.RESPONSE_DENIED)
+
+    def test_csrf(self):
+        """Verifica que el api, que modifica datos, rechace las peticiones sin el token CSRF."""
+
+        client = Client(enforce_csrf_checks=True)
+        client.login(email=self.get_user().email, password=self.RAW_STRING)
+        sobre = {'fecha': '04/12/2016', 'valor': 1000, 'tipo_ingreso': self.tipo.pk, 'forma_pago': 'EF'}
+        body = json.dumps({'sobres': [sobre]})
+
+        response = client.post(self.url, body, content_type='text/plain')
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Sobre.objects.exists())
+
+        # la pagina de la grilla entrega el token, que el cliente envia en el header
+        client.get(reverse('main:ingresar_sobres_lote'))
+        token = client.cookies['csrftoken'].value
+        response = client.post(self.url, body, content_type='application/json', HTTP_X_CSRFTOKEN=token)
+        self.assertEqual(self.get_response_data(response)['creados'], 1)
+
+    def test_pagina_grilla(self):
+        """Verifica que la pagina de la grilla muestre los tipos de ingreso."""
+
+        response = self.client.get(reverse('main:ingresar_sobres_lote'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, self.url)
+        self.assertContains(response, str(self.tipo))
@@ -0,0 +1,81 @@
+# Django imports
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# Locale imports
+from .base_test import CustomBaseTestCase
+from ..backends import CACHE_VERSION_KEY, EmailAuthenticationBackend, get_key
+
+
+class EmailAuthenticationBackendTest(CustomBaseTestCase):
+    """Pruebas para el backend de autentificacion por email."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.get_user()
+        self.backend = EmailAuthenticationBackend()
+
+    def test_authenticate_sin_mayusculas(self):
+        """Verifica que el email se busque sin importar mayusculas ni espacios."""
+
+        email = ' {} '.format(self.user.email.upper())
+        self.assertEqual(authenticate(email=email, password=self.RAW_STRING), self.user)
+        self.assertIsNone(authenticate(email=email, password='otra'))
+        self.assertIsNone(authenticate(email='no@existe.com', password=self.RAW_STRING))
+        self.assertIsNone(authenticate(email=None, password=self.RAW_STRING))
+
+    def test_get_user_en_cache(self):
+        """Verifica que el usuario se consulte una vez, y se invalide al guardarlo."""
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.backend.get_user(self.user.pk), self.user)
+            self.assertEqual(self.backend.get_user(self.user.pk), self.user)
+
+        self.user.set_password('nueva')
+        self.user.save()
+        self.assertTrue(self.backend.get_user(self.user.pk).check_password('nueva'))
+
+        self.user.delete()
+        self.assertIsNone(self.backend.get_user(self.user.pk))
+
+    def test_usuario_en_cache_local(self):
+        """Verifica que el usuario, con el hash de la contraseña, no se guarde en el cache compartido."""
+
+        self.backend.get_user(self.user.pk)
+        self.assertIsNone(cache.get(get_key(self.user.pk)))
+
+    def test_version_sale_del_cache(self):
+        """Verifica que un usuario desactivado no vuelva del cache si la version sale del cache."""
+
+        self.backend.get_user(self.user.pk)
+        self.user.is_active = False
+        self.user.save()
+        cache.delete(CACHE_VERSION_KEY)
+
+        self.assertFalse(self.backend.get_user(self.user.pk).is_active)
+
+    def test_invalidar_al_cambiar_grupos(self):
+        """Verifica que al cambiar los grupos del usuario se vuelva a consultar."""
+
+        self.backend.get_user(self.user.pk)
+        self.user.groups.add(Group.objects.create(name='digitador'))
+
+        with self.assertNumQueries(1):
+            self.backend.get_user(self.user.pk)
+
+    def test_peticiones_sin_consultas_de_usuario(self):
+        """Verifica que las peticiones autenticadas no consulten el usuario ni sus grupos."""
+
+        self.client.login(email=self.user.email, password=self.RAW_STRING)
+        url = reverse('main:api>get_importacion', args=(1, ))
+        self.client.get(url)
+
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+
+        consultas = [query['sql'] for query in context.captured_queries if 'auth_' in query['sql']]
+        self.assertEqual(consultas, [])
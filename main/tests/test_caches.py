@@ -0,0 +1,65 @@
+# Django imports
+from django.conf import settings
+
+# Locale imports
+from .base_test import CustomBaseTestCase
+from ..benchmarks import benchmark_cache
+from ..caches import LRUCache
+from digitacion import cache as configuracion
+
+
+class LRUCacheTest(CustomBaseTestCase):
+    """Pruebas para el cache local LRU."""
+
+    def setUp(self):
+        super().setUp()
+        self.cache = LRUCache('pruebas-lru', {'OPTIONS': {'MAX_ENTRIES': 3, 'CULL_FREQUENCY': 3}})
+        self.cache.clear()
+
+    def test_descarta_la_menos_usada(self):
+        """Verifica que al llenarse se borre la llave usada hace mas tiempo, no la primera insertada."""
+
+        for llave in ('a', 'b', 'c'):
+            self.cache.set(llave, llave)
+        # se usa la primera llave, la menos usada es b
+        self.assertEqual(self.cache.get('a'), 'a')
+        self.cache.set('d', 'd')
+
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual([self.cache.get(llave) for llave in ('a', 'c', 'd')], ['a', 'c', 'd'])
+
+    def test_incr_y_add(self):
+        """Verifica que las operaciones del cache local sigan funcionando."""
+
+        self.assertTrue(self.cache.add('contador', 1))
+        self.assertFalse(self.cache.add('contador', 5))
+        self.assertEqual(self.cache.incr('contador'), 2)
+        self.assertEqual(self.cache.get_many(['contador', 'otra']), {'contador': 2})
+
+
+class ConfiguracionCacheTest(CustomBaseTestCase):
+    """Pruebas para la configuracion del cache por entorno."""
+
+    def test_produccion(self):
+        """Verifica que en produccion el cache sea compartido y los templates se compilen una vez."""
+
+        caches = configuracion.get_caches('produccion')
+        self.assertEqual(caches['default']['BACKEND'], 'django.core.cache.backends.filebased.FileBasedCache')
+        self.assertEqual(caches['local']['BACKEND'], 'main.caches.LRUCache')
+        self.assertEqual(configuracion.get_template_loaders('produccion')[0][0], 'django.template.loaders.cached.Loader')
+
+    def test_desarrollo(self):
+        """Verifica que en desarrollo todo el cache sea local, y las sesiones usen el cache."""
+
+        caches = configuracion.get_caches('desarrollo')
+        self.assertEqual({cache['BACKEND'] for cache in caches.values()}, {'main.caches.LRUCache'})
+        self.assertNotEqual(caches['default']['LOCATION'], caches['local']['LOCATION'])
+        self.assertEqual(configuracion.get_template_loaders('desarrollo'), configuracion.TEMPLATE_LOADERS)
+        self.assertEqual(settings.SESSION_ENGINE, 'django.contrib.sessions.backends.cached_db')
+
+    def test_benchmark_cache(self):
+        """Verifica que el benchmark mida las dos vistas con y sin cache."""
+
+        resultados = benchmark_cache(peticiones=1)
+        self.assertEqual(len(resultados), 4)
+        self.assertTrue(all(valor > 0 for valor in resultados.values()))
@@ -0,0 +1,56 @@
+# Locale imports
+from .base_test import CustomBaseTestCase
+from ..benchmarks import benchmark_conversion
+from ..columnas import ESQUEMA_SOBRES, convertir_entero, convertir_booleano, convertir_fecha
+
+# Python imports
+import datetime
+
+
+class EsquemaImportacionTest(CustomBaseTestCase):
+    """Pruebas para los convertidores de las columnas de la importacion."""
+
+    def test_convertidores(self):
+        """Verifica la conversion de cada tipo de celda."""
+
+        self.assertEqual(convertir_entero('$10.000'), 10000)
+        self.assertEqual(convertir_entero(1045678.0), 1045678)
+        self.assertRaises(ValueError, convertir_entero, '10,5 pesos')
+        self.assertRaises(ValueError, convertir_entero, True)
+        self.assertTrue(convertir_booleano('si'))
+        self.assertFalse(convertir_booleano(0))
+        self.assertRaises(ValueError, convertir_booleano, 'tal vez')
+        self.assertEqual(convertir_fecha('04/12/2016'), datetime.date(2016, 12, 4))
+        self.assertEqual(convertir_fecha('2016-12-04'), datetime.date(2016, 12, 4))
+        self.assertEqual(convertir_fecha(datetime.datetime(2016, 12, 4, 10)), datetime.date(2016, 12, 4))
+
+    def test_convertir_bloque(self):
+        """Verifica que el bloque se convierta por modelo, con los errores por celda."""
+
+        valores, errores = ESQUEMA_SOBRES.convertir_bloque([
+            ['04/12/2016', 1, None, 'juan', 'perez', '', '1.045.678', '', '$10.000', 3, 'efectivo'],
+            ['31/02/2016', 'x', 'sin sobre', 'ana', 'diaz', '', 'abc', 'n/a', '', 3],
+        ])
+
+        self.assertEqual(valores[0]['sobre'], {
+            'fecha': datetime.date(2016, 12, 4), 'diligenciado': True, 'valor': 10000,
+            'tipo_ingreso': 3, 'forma_pago': 'EF'
+        })
+        self.assertEqual(valores[0]['persona']['cedula'], 1045678)
+        self.assertIsNone(valores[0]['persona']['telefono'])
+        self.assertEqual(valores[0]['observacion'], {'texto': ''})
+        self.assertEqual(errores[0], {})
+
+        self.assertEqual(valores[1]['observacion'], {'texto': 'Sin Sobre'})
+        self.assertEqual(
+            set(errores[1]), {'fecha', 'diligenciado', 'cedula', 'telefono', 'valor', 'forma_pago'}
+        )
+        self.assertEqual(errores[1]['valor'], 'campo vacio')
+        self.assertIsNone(valores[1]['persona']['cedula'])
+
+    def test_benchmark_conversion(self):
+        """Verifica que el benchmark retorne las celdas por segundo de ambas conversiones."""
+
+        resultados = benchmark_conversion(filas=10)
+        self.assertEqual(len(resultados), 2)
+        self.assertTrue(all(valor > 0 for valor in resultados.values()))
@@ -0,0 +1,190 @@
+# Django imports
+from django.db import connections
+
+# Locale imports
+from .base_test import CustomBaseTestCase
+from ..benchmarks import benchmark_conexiones
+from digitacion import database
+from digitacion.db.pool import POOLS, cerrar_pools
+from digitacion.db.sqlite3.base import DatabaseWrapper
+
+# Python imports
+from unittest import mock
+import os
+import tempfile
+import unittest
+
+
+class ConexionesTest(CustomBaseTestCase):
+    """Pruebas para los backends con health checks y pool de conexiones."""
+
+    def setUp(self):
+        super().setUp()
+        carpeta = tempfile.mkdtemp()
+        self.nombre = os.path.join(carpeta, 'conexiones.sqlite3')
+        self.addCleanup(os.rmdir, carpeta)
+        self.addCleanup(lambda: os.path.exists(self.nombre) and os.remove(self.nombre))
+        self.addCleanup(cerrar_pools, 'prueba')
+
+    def get_wrapper(self, **opciones):
+        settings_dict = dict(connections['default'].settings_dict, NAME=self.nombre, **opciones)
+        wrapper = DatabaseWrapper(settings_dict, 'prueba')
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def test_sin_pool_cierra_la_conexion(self):
+        """Verifica que sin pool se abra una nueva conexion despues de cerrarla."""
+
+        wrapper = self.get_wrapper()
+        wrapper.ensure_connection()
+        conexion = wrapper.connection
+        wrapper.close()
+        wrapper.ensure_connection()
+
+        self.assertIsNot(wrapper.connection, conexion)
+        self.assertNotIn('prueba', POOLS)
+
+    def test_pool_reusa_conexiones(self):
+        """Verifica que la conexion cerrada vuelva al pool y la use el siguiente wrapper."""
+
+        wrapper = self.get_wrapper(POOL={'MAXIMO': 1})
+        wrapper.ensure_connection()
+        conexion = wrapper.connection
+        wrapper.close()
+
+        otro = self.get_wrapper(POOL={'MAXIMO': 1})
+        otro.ensure_connection()
+        self.assertIs(otro.connection, conexion)
+        self.assertEqual((POOLS['prueba'].creadas, POOLS['prueba'].reusadas), (1, 1))
+
+    def test_pool_maximo(self):
+        """Verifica que el pool no guarde mas conexiones libres que el maximo."""
+
+        wrappers = [self.get_wrapper(POOL={'MAXIMO': 1}) for i in range(2)]
+        for wrapper in wrappers:
+            wrapper.ensure_connection()
+        for wrapper in wrappers:
+            wrapper.close()
+
+        self.assertEqual(len(POOLS['prueba'].libres), 1)
+
+    def test_pool_descarta_conexiones_cerradas(self):
+        """Verifica que con health checks no se use una conexion del pool que ya no sirve."""
+
+        wrapper = self.get_wrapper(POOL={'MAXIMO': 1}, CONN_HEALTH_CHECKS=True)
+        wrapper.ensure_connection()
+        conexion = wrapper.connection
+        wrapper.close()
+        conexion.close()
+
+        wrapper.ensure_connection()
+        self.assertIsNot(wrapper.connection, conexion)
+        self.assertEqual(len(POOLS['prueba'].libres), 0)
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'fork no disponible')
+    def test_pool_en_proceso_hijo(self):
+        """Verifica que un proceso hijo no use las conexiones ni el pool heredados del padre."""
+
+        libre, en_uso = self.get_wrapper(POOL={'MAXIMO': 1}), self.get_wrapper(POOL={'MAXIMO': 1})
+        libre.ensure_connection()
+        en_uso.ensure_connection()
+        conexion_libre, conexion_en_uso = libre.connection, en_uso.connection
+        libre.close()
+
+        lectura, escritura = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            # proceso hijo, el resultado se envia al padre por el pipe
+            try:
+                otro = self.get_wrapper(POOL={'MAXIMO': 1})
+                otro.ensure_connection()
+                en_uso.ensure_connection()
+                nueva = en_uso.connection
+                en_uso.close()
+                resultado = all((
+                    otro.connection is not conexion_libre,
+                    nueva is not conexion_en_uso,
+                    POOLS['prueba'].pid == os.getpid(),
+                    list(POOLS['prueba'].libres) == [nueva],
+                ))
+            except Exception:
+                resultado = False
+            os.write(escritura, b'1' if resultado else b'0')
+            os._exit(0)
+
+        os.close(escritura)
+        resultado = os.read(lectura, 1)
+        os.close(lectura)
+        os.waitpid(pid, 0)
+
+        self.assertEqual(resultado, b'1')
+        # las conexiones del padre siguen abiertas, y la libre sigue en su pool
+        self.assertIs(en_uso.connection, conexion_en_uso)
+        conexion_en_uso.cursor().execute('SELECT 1')
+        self.assertEqual(list(POOLS['prueba'].libres), [conexion_libre])
+        conexion_libre.cursor().execute('SELECT 1')
+
+    def test_health_check(self):
+        """Verifica que la conexion persistente se verifique una vez antes de usarla en cada peticion."""
+
+        wrapper = self.get_wrapper(CONN_MAX_AGE=None, CONN_HEALTH_CHECKS=True)
+        wrapper.ensure_connection()
+        conexion = wrapper.connection
+
+        # la conexion sigue abierta al terminar la peticion
+        wrapper.close_if_unusable_or_obsolete()
+        self.assertIs(wrapper.connection, conexion)
+
+        with mock.patch.object(DatabaseWrapper, 'is_usable', return_value=False) as is_usable:
+            wrapper.cursor()
+            wrapper.cursor()
+        self.assertEqual(is_usable.call_count, 1)
+        self.assertIsNot(wrapper.connection, conexion)
+
+    def test_sin_health_check(self):
+        """Verifica que sin health checks no se verifique la conexion persistente."""
+
+        wrapper = self.get_wrapper(CONN_MAX_AGE=None)
+        wrapper.ensure_connection()
+        conexion = wrapper.connection
+        wrapper.close_if_unusable_or_obsolete()
+
+        with mock.patch.object(DatabaseWrapper, 'is_usable', return_value=False) as is_usable:
+            wrapper.cursor()
+        self.assertFalse(is_usable.called)
+        self.assertIs(wrapper.connection, conexion)
+
+    def test_benchmark_conexiones(self):
+        """Verifica que la prueba de carga mida las tres configuraciones."""
+
+        resultados = benchmark_conexiones(peticiones=2, hilos=2)
+        self.assertEqual(len(resultados), 3)
+        self.assertTrue(all(valor > 0 for valor in resultados.values()))
+        self.assertNotIn('benchmark', connections.databases)
+
+
+class ConfiguracionDatabaseTest(CustomBaseTestCase):
+    """Pruebas para la configuracion de la base de datos por entorno."""
+
+    def test_desarrollo(self):
+        """Verifica que en desarrollo cada peticion abra su conexion."""
+
+        default = database.get_databases('desarrollo')['default']
+        self.assertEqual(default['CONN_MAX_AGE'], 0)
+        self.assertNotIn('POOL', default)
+
+    def test_produccion(self):
+        """Verifica que en produccion las conexiones sean persistentes, con health checks."""
+
+        default = database.get_databases('produccion')['default']
+        self.assertEqual(default['CONN_MAX_AGE'], database.CONN_MAX_AGE)
+        self.assertTrue(default['CONN_HEALTH_CHECKS'])
+        self.assertNotIn('POOL', default)
+
+    def test_produccion_con_pool(self):
+        """Verifica que con el pool las conexiones vuelvan al pool al terminar cada peticion."""
+
+        with mock.patch.object(database, 'POOL_MAXIMO', 5):
+            default = database.get_databases('produccion')['default']
+        self.assertEqual(default['CONN_MAX_AGE'], 0)
+        self.assertEqual(default['POOL'], {'MAXIMO': 5})
@@ -0,0 +1,28 @@
+# Locale imports
+from .base_test import CustomBaseTestCase
+from .. import constants
+from ..benchmarks import benchmark_constantes
+from ..context_processors import constants as constants_processor
+
+
+class ConstantsProcessorTest(CustomBaseTestCase):
+    """Pruebas para el procesador de contexto de constantes."""
+
+    def test_constantes_precalculadas(self):
+        """Verifica que el procesador retorne siempre el mismo diccionario inmutable."""
+
+        data = constants_processor(None)
+
+        self.assertIs(constants_processor(None), data)
+        self.assertEqual(data['RESPONSE_CODE'], constants.RESPONSE_CODE)
+        self.assertEqual(data['DATE_FORMAT'], constants.DATE_FORMAT)
+        self.assertEqual(data['INPUT_CLASS'], constants.INPUT_CLASS)
+        with self.assertRaises(TypeError):
+            data['RESPONSE_CODE'] = None
+
+    def test_benchmark_constantes(self):
+        """Verifica que el benchmark dibuje base.html con ambos procesadores."""
+
+        resultados = benchmark_constantes(renders=2)
+        self.assertEqual(len(resultados), 2)
+        self.assertTrue(all(valor > 0 for valor in resultados.values()))
@@ -5,13 +5,16 @@ from django.contrib.auth import get_user_model
 
 # Locale imports
 from .base_test import FormTestCase
+from ..benchmarks import benchmark_formularios
 from ..forms import (
     FormularioLogearUsuario, FormularioCrearSobre, FormularioCrearPersona,
     FormularioCrearTipoIngreso, FormularioCrearObservacion,
     FormularioReporteContribuciones, FormularioCrearUsuario,
     CambiarContrasenaForm
 )
+from ..mixins import FechasRangoFormMixin
 from ..models import Persona, Sobre
+from .. import constants
 
 
 class FormularioLogearUsuarioTest(FormTestCase):
@@ -276,6 +279,28 @@ class FormularioCrearSobreTest(FormTestCase):
         # verifica que el id sea el mismo
         self.assertEqual(form.initial['hidden'].__str__(), sobre.persona.id.__str__())
 
+    def test_persona_fields_not_shared(self):
+        """Verifica que los campos de la persona esten en la clase, y que cada formulario tenga sus copias."""
+
+        self.assertIn('cedula', self.form.base_fields)
+        self.assertFalse(self.form.base_fields['cedula'].required)
+        # los campos se heredan al declarar la clase, como los demas campos declarados
+        self.assertIn('cedula', self.form.declared_fields)
+        self.assertFalse(self.form.declared_fields['cedula'].required)
+        # el formulario de personas mantiene sus campos obligatorios
+        self.assertTrue(FormularioCrearPersona.base_fields['cedula'].required)
+
+        form_1, form_2 = self.form(), self.form()
+        self.assertIsNot(form_1.fields['cedula'], form_2.fields['cedula'])
+        self.assertIsNot(form_1.fields['cedula'].widget.attrs, form_2.fields['cedula'].widget.attrs)
+
+    def test_benchmark_formularios(self):
+        """Verifica que el benchmark construya los formularios de ambas formas."""
+
+        resultados = benchmark_formularios(instancias=2)
+        self.assertEqual(len(resultados), 2)
+        self.assertTrue(all(valor > 0 for valor in resultados.values()))
+
 
 class FormularioCrearPersonaTest(FormTestCase):
     """Clase para las pruebas unitarias de el formulario para crear personas."""
@@ -377,6 +402,38 @@ class FormularioReporteContribucionesTest(FormTestCase):
     def test_error_css_class(self):
         super().error_class_form_invalid()
 
+    def test_widget_attrs_per_class(self):
+        """Verifica que los atributos de los widgets se preparen en la clase, sin cambiar los de la clase padre."""
+
+        # los campos se preparan al crear la clase, antes de crear formularios
+        self.assertIn('_clases_error', self.form.__dict__)
+        base_fields = self.form.base_fields
+        self.assertEqual(base_fields['totalizado'].widget.attrs['class'], 'flat')
+
+        form = self.form()
+
+        # crear formularios no modifica la clase
+        self.assertIs(self.form.base_fields, base_fields)
+        self.assertEqual(form.fields['fecha_inicial'].widget.attrs['class'], constants.INPUT_CLASS)
+        self.assertEqual(form.fields['persona'].widget.attrs['tabindex'], '-1')
+
+        # los campos de la clase padre no se modifican
+        FechasRangoFormMixin()
+        self.assertIsNot(
+            FechasRangoFormMixin.base_fields['fecha_inicial'], self.form.base_fields['fecha_inicial']
+        )
+
+        # los cambios de una instancia no pasan a la clase
+        form.fields['persona'].widget.attrs['class'] = 'otra'
+        self.assertEqual(self.form().fields['persona'].widget.attrs['class'], constants.SELECT_CLASS)
+
+        form = self.form(data={})
+        form.is_valid()
+        self.assertEqual(
+            form.fields['fecha_inicial'].widget.attrs['class'],
+            constants.CSS_ERROR_CLASS + ' ' + constants.INPUT_CLASS
+        )
+
     def test_persona_is_required_if_totalizado_is_false(self):
         """Verifica que el campo de persona sea requerido si el campo de totalizado es False."""
 
@@ -0,0 +1,255 @@
+# Django imports
+from django.db import connection, DatabaseError
+from django.test.utils import CaptureQueriesContext
+
+# Locale imports
+from .base_test import CustomBaseTestCase
+from ..importer import ImportJob
+from ..jobs import procesar_importacion, procesar_pendientes
+from ..models import Sobre, Persona, Observacion, TipoIngreso, SobreMonthlyRollup, ImportacionSobres
+from ..search import buscar_personas
+
+# Python imports
+from unittest import mock
+import datetime
+
+
+class ImportacionBaseTest(CustomBaseTestCase):
+    """Clase base para las pruebas de importacion, con las filas del archivo."""
+
+    ENCABEZADO = [
+        'fecha', 'diligenciado', 'observacion', 'nombre', 'primer apellido', 'segundo apellido',
+        'cedula', 'telefono', 'valor', 'tipo ingreso', 'forma pago'
+    ]
+
+    def setUp(self):
+        super().setUp()
+        self.tipo = TipoIngreso.objects.create(nombre='diezmo')
+        self.existente = Persona.objects.create(nombre='Ana', primer_apellido='Diaz', cedula=222)
+
+    def fila(self, cedula, valor='$10.000', tipo=None, observacion=None, nombre='juan'):
+        return [
+            '04/12/2016', 1, observacion, nombre, 'perez', '', cedula, '', valor,
+            self.tipo.pk if tipo is None else tipo, 'ef'
+        ]
+
+
+class ImportarSobresTest(ImportacionBaseTest):
+    """Pruebas para la importacion de sobres por bloques."""
+
+    def test_importar_sobres(self):
+        """Verifica que se creen los sobres, las personas y observaciones que faltan."""
+
+        hojas = [
+            [self.ENCABEZADO, self.fila(111), self.fila(222, observacion='sin sobre'), self.fila(111)],
+            [self.ENCABEZADO, self.fila('', observacion='sin sobre')],
+        ]
+
+        job = ImportJob(chunk_size=2)
+        creados = job.importar(hojas)
+
+        self.assertEqual(creados, 4)
+        self.assertEqual(job.fila, 4)
+        self.assertEqual(job.errores, [])
+        self.assertEqual(Sobre.objects.count(), 4)
+        # la persona repetida se crea una sola vez, la existente se reutiliza
+        self.assertEqual(Persona.objects.count(), 2)
+        self.assertEqual(Sobre.objects.filter(persona=self.existente).count(), 1)
+        self.assertEqual(Observacion.objects.count(), 1)
+        self.assertEqual(Sobre.objects.filter(persona=None).count(), 1)
+
+        sobre = Sobre.objects.filter(persona__cedula=111).first()
+        self.assertEqual(sobre.valor, 10000)
+        self.assertEqual(sobre.forma_pago, Sobre.EFECTIVO)
+        self.assertEqual(sobre.fecha, datetime.date(2016, 12, 4))
+        self.assertTrue(sobre.diligenciado)
+        # el resumen mensual se actualiza aunque bulk_create no envia señales
+        self.assertEqual(SobreMonthlyRollup.objects.get().total, 40000)
+
+    def test_personas_importadas_en_busquedas(self):
+        """Verifica que las personas creadas con bulk_create se encuentren en las busquedas."""
+
+        # se carga el indice de busqueda antes de importar
+        self.assertEqual(buscar_personas('zacar'), [])
+
+        ImportJob().importar([[self.ENCABEZADO, self.fila(333, nombre='zacarias')]])
+
+        self.assertEqual([persona['cedula'] for persona in buscar_personas('zacar')], [333])
+        self.assertEqual([persona['cedula'] for persona in buscar_personas('33')], [333])
+
+    def test_filas_invalidas_en_log(self):
+        """Verifica que las filas invalidas se registren en el log sin detener la importacion."""
+
+        hojas = [[self.ENCABEZADO, self.fila(111, tipo=999), self.fila(333, valor='abc'), self.fila(444)]]
+
+        job = ImportJob()
+        job.importar(hojas)
+
+        self.assertEqual(job.total_errores, 2)
+        self.assertEqual([(error.fila, error.modelo) for error in job.errores], [(0, 'Sobre'), (1, 'Sobre')])
+        self.assertIn('pk = 999', job.errores[0].razon)
+        self.assertIn('pk = 999', list(job.get_log())[0])
+        self.assertEqual(Sobre.objects.count(), 1)
+
+    def test_importar_hojas_en_paralelo(self):
+        """Verifica que leer las hojas en un pool de procesos no repita las personas."""
+
+        hojas = [
+            [self.ENCABEZADO, self.fila(111), self.fila(333, valor='abc')],
+            [self.ENCABEZADO, self.fila(111), self.fila(444, observacion='sin sobre')],
+            [self.ENCABEZADO, self.fila(444, observacion='sin sobre')],
+        ]
+
+        job = ImportJob(procesos=2)
+        creados = job.importar(hojas)
+
+        self.assertEqual(creados, 4)
+        self.assertEqual(job.fila, 5)
+        self.assertEqual([error.fila for error in job.errores], [1])
+        # la cedula repetida entre hojas se crea una sola vez
+        self.assertEqual(Persona.objects.filter(cedula__in=(111, 333, 444)).count(), 3)
+        self.assertEqual(Observacion.objects.count(), 1)
+
+    def test_persona_con_campos_vacios(self):
+        """Verifica que las personas sin campos obligatorios se registren, y el sobre se guarde sin persona."""
+
+        job = ImportJob()
+        job.importar([[self.ENCABEZADO, self.fila(777, nombre='')]])
+
+        self.assertEqual(len(job.errores), 1)
+        self.assertEqual(job.errores[0].modelo, 'Persona')
+        self.assertEqual(job.errores[0].razon, 'campos vacios: nombre')
+        self.assertEqual(Sobre.objects.get().persona, None)
+
+    def test_errores_limitados(self):
+        """Verifica que solo se guarden max_errores errores, y que los demas se cuenten."""
+
+        hojas = [[self.ENCABEZADO] + [self.fila(100 + i, tipo=999) for i in range(5)]]
+
+        job = ImportJob(max_errores=2)
+        job.importar(hojas)
+
+        self.assertEqual(len(job.errores), 2)
+        self.assertEqual(job.total_errores, 5)
+        log = list(job.get_log())
+        self.assertEqual(len(log), 3)
+        self.assertIn('3', log[-1])
+
+    def test_estado_por_importacion(self):
+        """Verifica que cada importacion empiece con su propio estado."""
+
+        hojas = [[self.ENCABEZADO, self.fila(111, tipo=999), self.fila(444)]]
+        ImportJob().importar(hojas)
+
+        job = ImportJob()
+        job.importar([[self.ENCABEZADO, self.fila(555)]])
+
+        self.assertEqual(job.fila, 1)
+        self.assertEqual(job.errores, [])
+        self.assertEqual(list(job.tipos_ingreso), [str(self.tipo.pk)])
+
+    def test_consultas_por_bloque(self):
+        """Verifica que el numero de consultas no dependa del numero de filas del bloque."""
+
+        tipos = {str(self.tipo.pk): self.tipo}
+        consultas = []
+        for inicio, cantidad in ((1000, 50), (2000, 100)):
+            # se borra el resumen para que ambos bloques hagan las mismas consultas
+            SobreMonthlyRollup.objects.all().delete()
+            hojas = [[self.ENCABEZADO] + [self.fila(inicio + i) for i in range(cantidad)]]
+            job = ImportJob(chunk_size=100)
+            job.tipos_ingreso = dict(tipos)
+            with CaptureQueriesContext(connection) as context:
+                job.importar(hojas)
+            consultas.append(len(context.captured_queries))
+
+        self.assertEqual(consultas[0], consultas[1])
+        self.assertEqual(Sobre.objects.count(), 150)
+
+
+class ProcesarImportacionTest(ImportacionBaseTest):
+    """Pruebas para el procesamiento de importaciones en segundo plano."""
+
+    def setUp(self):
+        super().setUp()
+        self.importacion = ImportacionSobres.objects.create(archivo='importaciones/sobres.xlsx')
+
+    def leer_libro(self, hojas):
+        return mock.patch('main.jobs.leer_libro', return_value=(iter(hojas), sum(len(x) - 1 for x in hojas)))
+
+    def test_procesar_importacion(self):
+        """Verifica que se importen los sobres y se guarde el progreso y el log."""
+
+        filas = [self.fila(100 + i) for i in range(5)]
+        filas.append(self.fila(200, tipo=999))
+        with self.leer_libro([[self.ENCABEZADO] + filas]):
+            self.assertTrue(procesar_importacion(self.importacion.pk, chunk_size=2))
+
+        importacion = ImportacionSobres.objects.get(pk=self.importacion.pk)
+        self.assertEqual(importacion.estado, ImportacionSobres.TERMINADA)
+        self.assertEqual(importacion.total_filas, 6)
+        self.assertEqual(importacion.filas_procesadas, 6)
+        self.assertEqual(importacion.filas_fallidas, 1)
+        self.assertEqual(importacion.sobres_creados, 5)
+        self.assertIn('pk = 999', importacion.log)
+        self.assertIsNotNone(importacion.terminada)
+        self.assertEqual(Sobre.objects.count(), 5)
+
+    def test_progreso_por_bloque(self):
+        """Verifica que cada bloque se guarde en su transaccion y el progreso se guarde despues de cada uno."""
+
+        importar_bloque = ImportJob.importar_bloque
+        progreso = []
+
+        def fallar_tercer_bloque(job, filas):
+            importacion = ImportacionSobres.objects.get(pk=self.importacion.pk)
+            progreso.append((importacion.filas_procesadas, importacion.sobres_creados))
+            if len(progreso) == 3:
+                raise DatabaseError('conexion perdida')
+            return importar_bloque(job, filas)
+
+        filas = [self.fila(100 + i) for i in range(6)]
+        with self.leer_libro([[self.ENCABEZADO] + filas]), \
+                mock.patch('main.importer.ImportJob.importar_bloque', fallar_tercer_bloque), \
+                self.assertLogs('main.jobs', 'ERROR'):
+            procesar_importacion(self.importacion.pk, chunk_size=2)
+
+        # el progreso avanza con cada bloque de la hoja, no al final de la hoja
+        self.assertEqual(progreso, [(0, 0), (2, 2), (4, 4)])
+        importacion = ImportacionSobres.objects.get(pk=self.importacion.pk)
+        self.assertEqual(importacion.estado, ImportacionSobres.FALLIDA)
+        self.assertEqual(importacion.sobres_creados, 4)
+        self.assertEqual(importacion.filas_fallidas, 2)
+        # los bloques anteriores al error quedan guardados
+        self.assertEqual(Sobre.objects.count(), 4)
+
+    def test_pool_sin_pools_anidados(self):
+        """Verifica que las importaciones del pool de procesos lean las hojas en el mismo proceso."""
+
+        otra = ImportacionSobres.objects.create(archivo='importaciones/otros.xlsx')
+        with mock.patch('main.jobs.ProcessPoolExecutor') as executor:
+            executor.return_value.__enter__.return_value.map.return_value = [True, True]
+            self.assertEqual(procesar_pendientes(procesos=2), 2)
+
+        funcion, pks, chunk_sizes, procesos = executor.return_value.__enter__.return_value.map.call_args[0]
+        self.assertEqual(sorted(pks), sorted([self.importacion.pk, otra.pk]))
+        self.assertEqual(procesos, [1, 1])
+
+    def test_importacion_reclamada_una_vez(self):
+        """Verifica que una importacion solo se procese una vez."""
+
+        with self.leer_libro([[self.ENCABEZADO]]):
+            self.assertEqual(procesar_pendientes(), 1)
+            self.assertEqual(procesar_pendientes(), 0)
+            self.assertFalse(procesar_importacion(self.importacion.pk))
+
+    def test_archivo_invalido(self):
+        """Verifica que si no se puede leer el archivo, la importacion quede fallida."""
+
+        with mock.patch('main.jobs.leer_libro', side_effect=ValueError('archivo corrupto')):
+            with self.assertLogs('main.jobs', 'ERROR'):
+                procesar_importacion(self.importacion.pk)
+
+        importacion = ImportacionSobres.objects.get(pk=self.importacion.pk)
+        self.assertEqual(importacion.estado, ImportacionSobres.FALLIDA)
+        self.assertIn('archivo corrupto', importacion.log)
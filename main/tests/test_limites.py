@@ -0,0 +1,113 @@
+# Django imports
+from django.core.urlresolvers import reverse
+
+# Locale imports
+from .base_test import CustomBaseTestCase
+from .. import constants
+from ..forms import FormularioLogearUsuario
+from ..limites import TokenBucket, BUCKETS, LOGIN_LIMITES, get_contadores
+
+# Python imports
+from unittest import mock
+
+
+class TokenBucketTest(CustomBaseTestCase):
+    """Pruebas para los token buckets de los intentos."""
+
+    def test_consumir_y_recuperar(self):
+        """Verifica que se consuman los tokens, y se recuperen con el tiempo."""
+
+        bucket = TokenBucket('prueba', 2, 10)
+        with mock.patch('main.limites.time.time', return_value=1000):
+            self.assertTrue(bucket.consumir('a'))
+            self.assertTrue(bucket.consumir('a'))
+            self.assertFalse(bucket.consumir('a'))
+            # cada llave tiene su propio bucket
+            self.assertTrue(bucket.consumir('b'))
+
+        with mock.patch('main.limites.time.time', return_value=1005):
+            self.assertTrue(bucket.consumir('a'))
+            self.assertFalse(bucket.consumir('a'))
+
+        with mock.patch('main.limites.time.time', return_value=2000):
+            self.assertEqual(bucket.get_tokens('a', 2000), 2)
+
+
+class LimitesLoginTest(CustomBaseTestCase):
+    """Pruebas para los limites de intentos de login."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.get_user()
+
+    def form(self, ip='10.0.0.1', email=None, password='otra'):
+        return FormularioLogearUsuario(data={'email': email or self.user.email, 'password': password}, ip=ip)
+
+    def test_bloqueo_por_email_sin_hash(self):
+        """Verifica que al superar los intentos del email se rechace sin autenticar."""
+
+        capacidad = LOGIN_LIMITES['email'][0]
+        for i in range(capacidad):
+            # cada intento viene de una ip distinta
+            self.assertFalse(self.form(ip='10.0.1.{}'.format(i)).is_valid())
+
+        with mock.patch('main.forms.authenticate') as authenticate:
+            form = self.form(ip='10.0.2.1', password=self.RAW_STRING)
+            self.assertFalse(form.is_valid())
+            self.assertFalse(authenticate.called)
+
+        # las demas cuentas se siguen autenticando
+        with mock.patch('main.forms.authenticate', return_value=None) as authenticate:
+            self.form(ip='10.0.2.1', email='otro@correo.com').is_valid()
+            self.assertTrue(authenticate.called)
+        contadores = get_contadores()
+        self.assertEqual(contadores['bloqueados_email'], 1)
+        self.assertEqual(contadores['permitidos'], capacidad + 1)
+
+    def test_login_exitoso_no_consume_email(self):
+        """Verifica que los logins exitosos no consuman los intentos del email."""
+
+        capacidad = LOGIN_LIMITES['email'][0]
+        for i in range(capacidad + 1):
+            self.assertTrue(self.form(ip='10.0.3.{}'.format(i), password=self.RAW_STRING).is_valid())
+        self.assertEqual(BUCKETS['email'].get_tokens(self.user.email.lower()), capacidad)
+
+    def test_login_exitoso_reinicia_email(self):
+        """Verifica que un login exitoso recupere los intentos fallidos del email."""
+
+        capacidad = LOGIN_LIMITES['email'][0]
+        for i in range(capacidad - 1):
+            self.assertFalse(self.form(ip='10.0.4.{}'.format(i)).is_valid())
+        self.assertLess(BUCKETS['email'].get_tokens(self.user.email.lower()), 2)
+
+        self.assertTrue(self.form(ip='10.0.5.1', password=self.RAW_STRING).is_valid())
+        self.assertEqual(BUCKETS['email'].get_tokens(self.user.email.lower()), capacidad)
+
+    def test_bloqueo_por_ip(self):
+        """Verifica que al superar los intentos de una ip se rechacen todos sus logins."""
+
+        capacidad = LOGIN_LIMITES['ip'][0]
+        for i in range(capacidad):
+            self.form(email='usuario{}@correo.com'.format(i)).is_valid()
+
+        form = self.form(password=self.RAW_STRING)
+        self.assertFalse(form.is_valid())
+        self.assertEqual(get_contadores()['bloqueados_ip'], 1)
+        # otra ip puede entrar
+        self.assertTrue(self.form(ip='10.0.0.2', password=self.RAW_STRING).is_valid())
+
+    def test_login_view_usa_ip(self):
+        """Verifica que la vista de login consuma los intentos de la ip de la peticion."""
+
+        self.client.post(reverse('main:login'), {'email': self.user.email, 'password': 'otra'}, REMOTE_ADDR='10.9.9.9')
+        self.assertLess(BUCKETS['ip'].get_tokens('10.9.9.9'), LOGIN_LIMITES['ip'][0])
+
+    def test_contadores_api(self):
+        """Verifica que los administradores puedan consultar los contadores."""
+
+        self.form().is_valid()
+        self.client.login(email=self.user.email, password=self.RAW_STRING)
+
+        data = self.get_response_data(self.client.get(reverse('main:api>contadores_login')))
+        self.assertEqual(data[constants.RESPONSE_CODE], constants.RESPONSE_SUCCESS)
+        self.assertEqual(data['contadores']['permitidos'], 1)
@@ -0,0 +1,134 @@
+# Django imports
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# Locale imports
+from .base_test import CustomBaseTestCase
+from ..lotes import crear_sobres, MAXIMO_LOTE
+from ..models import Sobre, Persona, Observacion, TipoIngreso, SobreMonthlyRollup
+from ..search import buscar_personas
+
+# Python imports
+import datetime
+
+
+class CrearSobresTest(CustomBaseTestCase):
+    """Pruebas para la creacion de sobres por lotes."""
+
+    def setUp(self):
+        super().setUp()
+        self.tipo = TipoIngreso.objects.create(nombre='diezmo')
+        self.observacion = Observacion.objects.create(texto='sin sobre')
+        self.existente = Persona.objects.create(nombre='Ana', primer_apellido='Diaz', cedula=222)
+
+    def sobre(self, **kwargs):
+        sobre = {'fecha': '04/12/2016', 'valor': '10000', 'tipo_ingreso': self.tipo.pk, 'forma_pago': 'EF'}
+        sobre.update(kwargs)
+        return sobre
+
+    def test_crear_sobres(self):
+        """Verifica que se creen los sobres, con personas por id, por cedula y nuevas."""
+
+        resultados = crear_sobres([
+            self.sobre(persona={'id': self.existente.pk}),
+            self.sobre(persona={'cedula': 222}, observaciones=self.observacion.pk, diligenciado=False),
+            self.sobre(persona={'cedula': '111', 'nombre': 'Juan', 'primer_apellido': 'Perez'}),
+            self.sobre(persona={'cedula': 111, 'nombre': 'Juan', 'primer_apellido': 'Perez'}, valor=5000),
+            self.sobre(fecha='2016-12-05', forma_pago='cheque'),
+        ])
+
+        self.assertTrue(all(resultado['ok'] for resultado in resultados))
+        self.assertEqual([resultado['index'] for resultado in resultados], list(range(5)))
+        self.assertEqual(Sobre.objects.count(), 5)
+        self.assertEqual(Sobre.objects.filter(persona=self.existente).count(), 2)
+        # la persona nueva se crea una sola vez
+        self.assertEqual(Persona.objects.filter(cedula=111).count(), 1)
+        self.assertEqual(Sobre.objects.filter(persona__cedula=111).count(), 2)
+
+        sobre = Sobre.objects.get(observaciones=self.observacion)
+        self.assertFalse(sobre.diligenciado)
+        self.assertEqual(sobre.fecha, datetime.date(2016, 12, 4))
+        self.assertEqual(Sobre.objects.get(persona=None).forma_pago, Sobre.CHEQUE)
+        # bulk_create no envia señales, el resumen mensual se actualiza
+        self.assertEqual(sum(SobreMonthlyRollup.objects.values_list('total', flat=True)), 45000)
+
+    def test_personas_nuevas_en_busquedas(self):
+        """Verifica que las personas creadas por el lote se encuentren en las busquedas."""
+
+        self.assertEqual(buscar_personas('zacar'), [])
+        crear_sobres([self.sobre(persona={'cedula': 333, 'nombre': 'Zacarias', 'primer_apellido': 'Perez'})])
+
+        self.assertEqual([persona['cedula'] for persona in buscar_personas('zacar')], [333])
+
+    def test_errores_por_sobre(self):
+        """Verifica que los sobres invalidos retornen sus errores, y los validos se guarden."""
+
+        resultados = crear_sobres([
+            self.sobre(valor='abc'),
+            self.sobre(tipo_ingreso=999),
+            self.sobre(persona={'id': 999}),
+            self.sobre(persona={'cedula': 333, 'nombre': '', 'primer_apellido': 'Perez'}),
+            self.sobre(observaciones=999, fecha=''),
+            'sobre',
+            self.sobre(),
+        ])
+
+        self.assertEqual([resultado['ok'] for resultado in resultados], [False] * 6 + [True])
+        self.assertEqual(resultados[0]['errores'], {'valor': 'numero invalido'})
+        self.assertIn('tipo_ingreso', resultados[1]['errores'])
+        self.assertIn('999', resultados[2]['errores']['persona'])
+        self.assertEqual(resultados[3]['errores'], {'persona': 'campos vacios: nombre'})
+        self.assertEqual(resultados[4]['errores'], {'fecha': 'campo vacio'})
+        self.assertIn('sobre', resultados[5]['errores'])
+        self.assertEqual(Sobre.objects.count(), 1)
+        self.assertFalse(Persona.objects.filter(cedula=333).exists())
+
+    def test_no_diligenciado_sin_observaciones(self):
+        """Verifica que, como en el formulario, los sobres no diligenciados necesiten observaciones."""
+
+        resultados = crear_sobres([
+            self.sobre(diligenciado=False),
+            self.sobre(diligenciado='False', observaciones=self.observacion.pk),
+        ])
+
+        self.assertFalse(resultados[0]['ok'])
+        self.assertIn('observaciones', resultados[0]['errores'])
+        self.assertTrue(resultados[1]['ok'])
+        self.assertEqual(Sobre.objects.count(), 1)
+
+    def test_sobres_invalidos_sin_personas(self):
+        """Verifica que los sobres rechazados no creen personas nuevas."""
+
+        persona = {'cedula': 444, 'nombre': 'Juan', 'primer_apellido': 'Perez'}
+        resultados = crear_sobres([
+            self.sobre(persona=persona, tipo_ingreso=999),
+            self.sobre(persona=dict(persona, cedula=555), observaciones=999),
+            self.sobre(persona=dict(persona, cedula=666), diligenciado=False),
+        ])
+
+        self.assertFalse(any(resultado['ok'] for resultado in resultados))
+        self.assertFalse(Persona.objects.filter(cedula__in=[444, 555, 666]).exists())
+        self.assertEqual(Sobre.objects.count(), 0)
+
+    def test_maximo_lote(self):
+        """Verifica que no se acepten lotes de mas de MAXIMO_LOTE sobres."""
+
+        with self.assertRaises(ValueError):
+            crear_sobres([self.sobre()] * (MAXIMO_LOTE + 1))
+
+    def test_consultas_por_lote(self):
+        """Verifica que el numero de consultas no dependa del numero de sobres."""
+
+        consultas = []
+        for inicio, cantidad in ((1000, 10), (2000, 50)):
+            SobreMonthlyRollup.objects.all().delete()
+            sobres = [
+                self.sobre(persona={'cedula': inicio + i, 'nombre': 'Juan', 'primer_apellido': 'Perez'})
+                for i in range(cantidad)
+            ]
+            with CaptureQueriesContext(connection) as context:
+                crear_sobres(sobres)
+            consultas.append(len(context.captured_queries))
+
+        self.assertEqual(consultas[0], consultas[1])
+        self.assertEqual(Sobre.objects.count(), 60)
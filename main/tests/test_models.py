@@ -2,8 +2,12 @@
 from django.db.utils import IntegrityError, DataError
 
 # Locale imports
-from .base_test import ModelTestCase
-from ..models import Sobre, Persona, TipoIngreso, Observacion
+from .base_test import CustomBaseTestCase, ModelTestCase
+from ..benchmarks import benchmark_to_json
+from ..models import Sobre, Persona, TipoIngreso, Observacion, SobreMonthlyRollup
+
+# Python imports
+import datetime
 
 
 class SobreModelTest(ModelTestCase):
@@ -80,3 +84,153 @@ class ObservacionModelTest(ModelTestCase):
 
     def test_fields_with_ugettext(self):
         return super().fields_with_ugettext()
+
+
+class SobreMonthlyRollupTest(ModelTestCase):
+    """Pruebas unitarias para el resumen mensual de sobres."""
+
+    class Meta:
+        model = SobreMonthlyRollup
+
+    def setUp(self):
+        super().setUp()
+        self.tipo = TipoIngreso.objects.create(nombre='diezmo')
+        self.fecha = datetime.date(2016, 12, 4)
+
+    def crear_sobre(self, valor, **kwargs):
+        kwargs.setdefault('fecha', self.fecha)
+        kwargs.setdefault('forma_pago', Sobre.EFECTIVO)
+        return Sobre.objects.create(tipo_ingreso=self.tipo, valor=valor, **kwargs)
+
+    def get_rollup(self, year=2016, month=12, forma_pago=Sobre.EFECTIVO, diligenciado=True):
+        return SobreMonthlyRollup.objects.get(
+            year=year, month=month, tipo_ingreso=self.tipo, forma_pago=forma_pago, diligenciado=diligenciado
+        )
+
+    def test_fields_with_ugettext(self):
+        return super().fields_with_ugettext()
+
+    def test_rollup_updated_when_sobre_created(self):
+        """Verifica que el resumen sume los sobres creados."""
+
+        self.crear_sobre(100)
+        self.crear_sobre(50)
+
+        rollup = self.get_rollup()
+        self.assertEqual(rollup.total, 150)
+        self.assertEqual(rollup.cantidad, 2)
+
+    def test_rollup_moved_when_sobre_changed(self):
+        """Verifica que al editar un sobre se reste del resumen anterior y se sume al nuevo."""
+
+        sobre = self.crear_sobre(100)
+        sobre.fecha = datetime.date(2017, 1, 8)
+        sobre.forma_pago = Sobre.CHEQUE
+        sobre.valor = 70
+        sobre.save()
+
+        anterior = self.get_rollup()
+        self.assertEqual((anterior.total, anterior.cantidad), (0, 0))
+        nuevo = self.get_rollup(year=2017, month=1, forma_pago=Sobre.CHEQUE)
+        self.assertEqual((nuevo.total, nuevo.cantidad), (70, 1))
+
+    def test_rollup_sobre_con_valores_sin_convertir(self):
+        """Verifica que el resumen convierta los valores de los sobres creados con strings."""
+
+        sobre = self.crear_sobre('100', fecha='2020-01-05')
+        self.crear_sobre('30', fecha='2020-01-20', diligenciado='False')
+
+        self.assertEqual(self.get_rollup(year=2020, month=1).total, 100)
+        self.assertEqual(self.get_rollup(year=2020, month=1, diligenciado=False).total, 30)
+
+        # al editarlo se resta del resumen anterior
+        sobre.fecha = '2020-02-01'
+        sobre.save()
+        self.assertEqual(self.get_rollup(year=2020, month=1).cantidad, 0)
+        self.assertEqual(self.get_rollup(year=2020, month=2).total, 100)
+
+    def test_rollup_updated_when_sobre_deleted(self):
+        """Verifica que el resumen reste los sobres eliminados."""
+
+        self.crear_sobre(100)
+        self.crear_sobre(30).delete()
+
+        rollup = self.get_rollup()
+        self.assertEqual((rollup.total, rollup.cantidad), (100, 1))
+
+    def test_reconstruir(self):
+        """Verifica que la reconstruccion del resumen coincida con los sobres."""
+
+        self.crear_sobre(100)
+        self.crear_sobre(20, diligenciado=False)
+        self.crear_sobre(5, fecha=datetime.date(2016, 11, 30))
+        # se daña el resumen
+        SobreMonthlyRollup.objects.update(total=0, cantidad=0)
+
+        SobreMonthlyRollup.objects.reconstruir()
+
+        self.assertEqual(SobreMonthlyRollup.objects.count(), 3)
+        self.assertEqual(self.get_rollup().total, 100)
+        self.assertEqual(self.get_rollup(diligenciado=False).total, 20)
+        self.assertEqual(self.get_rollup(month=11).cantidad, 1)
+
+
+class CustomModelToJsonTest(CustomBaseTestCase):
+    """Pruebas para el serializador compilado de CustomModel.to_json."""
+
+    def test_serializador_en_la_clase(self):
+        """Verifica que el serializador se compile al preparar la clase y se reutilice."""
+
+        fields = tuple(Persona.get_json_fields())
+        self.assertIn(fields, Persona.__dict__['_json_serializers'])
+        self.assertIs(Persona.get_json_serializer(fields), Persona.get_json_serializer(list(fields)))
+        # cada modelo tiene su cache
+        self.assertNotIn(fields, Observacion.__dict__.get('_json_serializers', {}))
+
+    def test_to_json(self):
+        """Verifica los valores en mayuscula y los campos invalidos."""
+
+        persona = Persona(id=3, nombre='juan', primer_apellido='perez', segundo_apellido='', cedula=10)
+
+        self.assertEqual(persona.to_json(), {
+            'id': '3', 'nombre': 'JUAN', 'primer_apellido': 'PEREZ', 'segundo_apellido': '',
+            'cedula': '10', 'telefono': 'NONE'
+        })
+        self.assertEqual(persona.to_json('nombre'), {'nombre': 'JUAN'})
+        with self.assertRaises(ValueError):
+            persona.to_json('no_existe')
+
+    def test_benchmark_to_json(self):
+        """Verifica que el benchmark retorne las instancias por segundo de ambas implementaciones."""
+
+        resultados = benchmark_to_json(instancias=10)
+        self.assertTrue(all(valor > 0 for valor in resultados.values()))
+
+
+class CustomModelValidacionTest(CustomBaseTestCase):
+    """Pruebas para la validacion de los campos obligatorios de CustomModel."""
+
+    def test_campos_obligatorios_en_la_clase(self):
+        """Verifica que los campos obligatorios se calculen una vez por modelo."""
+
+        self.assertEqual(
+            Persona.__dict__['_required_fields'],
+            (('nombre', 'nombre'), ('primer_apellido', 'primer_apellido'), ('cedula', 'cedula'))
+        )
+        self.assertIn(('tipo_ingreso', 'tipo_ingreso_id'), Sobre.get_required_fields())
+
+    def test_validar_lote(self):
+        """Verifica que el lote se separe en instancias validas e invalidas."""
+
+        valida = Persona(nombre='juan', primer_apellido='perez', cedula=1)
+        sin_nombre = Persona(nombre='', primer_apellido='perez', cedula=2)
+        sin_cedula = Persona(nombre='ana', primer_apellido='', cedula=None)
+
+        with self.assertNumQueries(0):
+            validas, invalidas = Persona.validar_lote([valida, sin_nombre, sin_cedula])
+
+        self.assertEqual(validas, [valida])
+        self.assertEqual(invalidas, [(sin_nombre, ['nombre']), (sin_cedula, ['primer_apellido', 'cedula'])])
+
+        with self.assertRaises(IntegrityError):
+            sin_nombre.save()
@@ -0,0 +1,76 @@
+# Django imports
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.template import Context, Template
+
+# Locale imports
+from .base_test import CustomBaseTestCase
+from ..permisos import CACHE_VERSION_KEY, get_grupos, pertenece_grupo
+
+
+class GruposUsuarioTest(CustomBaseTestCase):
+    """Pruebas para los grupos de los usuarios en cache."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.get_user()
+        self.user.is_superuser = False
+        self.user.save()
+        self.administrador = Group.objects.create(name='administrador')
+        self.digitador = Group.objects.create(name='digitador')
+        self.user.groups.add(self.administrador)
+
+    def get_user_db(self):
+        # un usuario nuevo, como el de cada peticion
+        return get_user_model().objects.get(pk=self.user.pk)
+
+    def test_grupos_en_cache(self):
+        """Verifica que los grupos se consulten una vez, y luego salgan de la cache."""
+
+        self.assertEqual(get_grupos(self.get_user_db()), {'administrador'})
+
+        user = self.get_user_db()
+        with self.assertNumQueries(0):
+            self.assertTrue(pertenece_grupo(user, ['administrador', 'consultas']))
+            self.assertFalse(pertenece_grupo(user, ['digitador']))
+
+    def test_cache_invalidada_al_cambiar_grupos(self):
+        """Verifica que al agregar o quitar grupos se vuelvan a consultar."""
+
+        get_grupos(self.get_user_db())
+
+        self.user.groups.add(self.digitador)
+        self.assertEqual(get_grupos(self.get_user_db()), {'administrador', 'digitador'})
+
+        self.digitador.user_set.remove(self.user)
+        self.assertEqual(get_grupos(self.get_user_db()), {'administrador'})
+
+        self.administrador.name = 'consultas'
+        self.administrador.save()
+        self.assertEqual(get_grupos(self.get_user_db()), {'consultas'})
+
+    def test_version_sale_del_cache(self):
+        """Verifica que si la version sale del cache no vuelvan los grupos guardados con una version anterior."""
+
+        self.user.groups.add(self.digitador)
+        self.assertIn('digitador', get_grupos(self.get_user_db()))
+
+        self.digitador.user_set.remove(self.user)
+        # la llave de la version sale del cache, pero los grupos guardados siguen
+        cache.delete(CACHE_VERSION_KEY)
+
+        self.assertEqual(get_grupos(self.get_user_db()), {'administrador'})
+
+    def test_filtro_pertenece_grupo(self):
+        """Verifica que el filtro del template consulte los grupos una sola vez."""
+
+        template = Template(
+            '{% load utils %}{% if user|pertenece_grupo:"administrador" %}A{% endif %}'
+            '{% if user|pertenece_grupo:"digitador,consultas" %}D{% endif %}'
+            '{% if user|pertenece_grupo:"digitador,administrador" %}X{% endif %}'
+        )
+        user = self.get_user_db()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(template.render(Context({'user': user})), 'AX')
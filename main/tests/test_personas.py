@@ -0,0 +1,112 @@
+# Django imports
+from django.core.cache import cache
+from django.db import connection
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+# Locale imports
+from .base_test import CustomBaseTestCase
+from ..forms import FormularioCrearSobre
+from ..models import Persona, TipoIngreso
+from ..personas import get_persona, get_personas, get_persona_por_cedula, crear_persona, resolver_personas
+
+
+class PersonasCacheTest(TransactionTestCase):
+    """Pruebas para las personas en cache, fuera de una transaccion."""
+
+    def setUp(self):
+        cache.clear()
+        self.persona = Persona.objects.create(nombre='Ana', primer_apellido='Diaz', cedula=222)
+
+    def test_get_persona_en_cache(self):
+        """Verifica que la persona se consulte una vez, por id y por cedula."""
+
+        with self.assertNumQueries(1):
+            self.assertEqual(get_persona(self.persona.pk), self.persona)
+            self.assertEqual(get_persona(str(self.persona.pk)), self.persona)
+            self.assertEqual(get_persona_por_cedula(222), self.persona)
+            self.assertEqual(get_personas([self.persona.pk]), {self.persona.pk: self.persona})
+
+        self.assertIsNone(get_persona('abc'))
+        self.assertIsNone(get_persona(None))
+
+    def test_invalidar_al_cambiar(self):
+        """Verifica que al cambiar una persona no se retorne la de cache."""
+
+        get_persona(self.persona.pk)
+        self.persona.nombre = 'Maria'
+        self.persona.cedula = 333
+        self.persona.save()
+
+        self.assertEqual(get_persona(self.persona.pk).nombre, 'Maria')
+        self.assertIsNone(get_persona_por_cedula(222))
+
+        self.persona.delete()
+        self.assertIsNone(get_persona_por_cedula(333))
+
+    def test_resolver_personas_en_cache(self):
+        """Verifica que las cedulas resueltas no se vuelvan a consultar."""
+
+        datos = {
+            222: {'cedula': 222, 'nombre': 'Ana', 'primer_apellido': 'Diaz'},
+            111: {'cedula': 111, 'nombre': 'Juan', 'primer_apellido': 'Perez'},
+        }
+        ids, invalidas = resolver_personas(datos)
+
+        self.assertEqual(invalidas, [])
+        self.assertEqual(ids[222], self.persona.pk)
+        self.assertEqual(ids[111], Persona.objects.get(cedula=111).pk)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(resolver_personas(datos), (ids, []))
+
+
+class CrearPersonaTest(CustomBaseTestCase):
+    """Pruebas para la creacion de personas por cedula."""
+
+    def setUp(self):
+        super().setUp()
+        self.persona = Persona.objects.create(nombre='Ana', primer_apellido='Diaz', cedula=222)
+
+    def test_crear_persona(self):
+        """Verifica que se cree la persona que no existe, y se reutilice la existente sin modificarla."""
+
+        persona = crear_persona({'cedula': 111, 'nombre': 'Juan', 'primer_apellido': 'Perez'})
+        self.assertEqual(Persona.objects.get(cedula=111), persona)
+
+        existente = crear_persona({'cedula': 222, 'nombre': 'Otra', 'primer_apellido': 'Persona'})
+        self.assertEqual(existente, self.persona)
+        self.assertEqual(Persona.objects.get(cedula=222).nombre, 'Ana')
+
+    def test_sin_cache_en_transaccion(self):
+        """Verifica que dentro de una transaccion no se guarden personas en cache."""
+
+        get_persona(self.persona.pk)
+        resolver_personas({111: {'cedula': 111, 'nombre': 'Juan', 'primer_apellido': 'Perez'}})
+
+        with CaptureQueriesContext(connection) as context:
+            get_persona(self.persona.pk)
+            resolver_personas({111: {'cedula': 111, 'nombre': 'Juan', 'primer_apellido': 'Perez'}})
+        self.assertEqual(len(context.captured_queries), 2)
+
+    def test_resolver_personas_invalidas(self):
+        """Verifica que las personas nuevas sin campos obligatorios no se creen."""
+
+        ids, invalidas = resolver_personas({333: {'cedula': 333, 'nombre': '', 'primer_apellido': 'Perez'}})
+
+        self.assertEqual(ids, {})
+        self.assertEqual(invalidas, [(333, ['nombre'])])
+        self.assertFalse(Persona.objects.filter(cedula=333).exists())
+
+    def test_formulario_con_cedula_existente(self):
+        """Verifica que el formulario de sobres use la persona existente de la cedula."""
+
+        tipo = TipoIngreso.objects.create(nombre='diezmo')
+        form = FormularioCrearSobre(data={
+            'fecha': '04/12/2016', 'diligenciado': 'True', 'valor': 1000, 'tipo_ingreso': tipo.pk,
+            'forma_pago': 'EF', 'nombre': 'Ana', 'primer_apellido': 'Diaz', 'cedula': 222,
+        })
+
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.save().persona, self.persona)
+        self.assertEqual(Persona.objects.count(), 1)
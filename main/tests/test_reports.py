@@ -0,0 +1,72 @@
+# Django imports
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# Locale imports
+from .base_test import CustomBaseTestCase
+from ..models import Sobre, TipoIngreso, Persona
+from ..reports import tabla_contribuciones
+
+# Python imports
+import datetime
+
+
+class TablaContribucionesTest(CustomBaseTestCase):
+    """Pruebas para el reporte de contribuciones por tipo de ingreso y forma de pago."""
+
+    def setUp(self):
+        super().setUp()
+        self.diezmo = TipoIngreso.objects.create(nombre='diezmo')
+        self.ofrenda = TipoIngreso.objects.create(nombre='ofrenda')
+        self.persona = Persona.objects.create(nombre='juan', primer_apellido='perez', cedula=1)
+        self.rango = (self.RAW_DATE, self.RAW_DATE + datetime.timedelta(days=1))
+
+        for tipo, forma, valor, persona in (
+                (self.diezmo, Sobre.EFECTIVO, 100, self.persona),
+                (self.diezmo, Sobre.EFECTIVO, 50, None),
+                (self.diezmo, Sobre.CHEQUE, 20, self.persona),
+                (self.ofrenda, Sobre.ELECTRONICO, 7, None)):
+            Sobre.objects.create(
+                fecha=self.RAW_DATE, tipo_ingreso=tipo, forma_pago=forma, valor=valor, persona=persona
+            )
+
+    def test_table_totals(self):
+        """Verifica los totales por fila y por columna de la tabla."""
+
+        tabla = tabla_contribuciones(fecha__range=self.rango)
+
+        self.assertEqual(tabla['DIEZMO'], {'total': 170, 'EFECTIVO': 150, 'CHEQUE': 20, 'ELECTRONICO': 0})
+        self.assertEqual(tabla['OFRENDA'], {'total': 7, 'EFECTIVO': 0, 'CHEQUE': 0, 'ELECTRONICO': 7})
+        self.assertEqual(tabla['TOTAL'], {'total': 177, 'EFECTIVO': 150, 'CHEQUE': 20, 'ELECTRONICO': 7})
+        # el total debe salir de ultimo
+        self.assertEqual(list(tabla)[-1], 'TOTAL')
+
+    def test_table_filtered_by_persona(self):
+        """Verifica que los filtros se apliquen a los sobres, sin quitar los tipos de ingreso."""
+
+        tabla = tabla_contribuciones(fecha__range=self.rango, persona=self.persona)
+
+        self.assertEqual(tabla['DIEZMO']['total'], 120)
+        self.assertEqual(tabla['OFRENDA']['total'], 0)
+        self.assertEqual(tabla['TOTAL']['total'], 120)
+
+    def test_table_in_one_query(self):
+        """Verifica que los totales se calculen en una sola consulta agrupada, y los tipos en otra."""
+
+        TipoIngreso.objects.create(nombre='primicias')
+
+        with self.assertNumQueries(2):
+            tabla = tabla_contribuciones(fecha__range=self.rango)
+        self.assertEqual(tabla['PRIMICIAS']['total'], 0)
+
+    def test_filters_in_where(self):
+        """Verifica que los filtros se apliquen en el WHERE de la consulta de los sobres."""
+
+        with CaptureQueriesContext(connection) as consultas:
+            tabla_contribuciones(fecha__range=self.rango, persona=self.persona)
+
+        sql = next(consulta['sql'] for consulta in consultas if 'GROUP BY' in consulta['sql'])
+        where = sql[sql.index('WHERE'):sql.index('GROUP BY')]
+        self.assertIn('"fecha" BETWEEN', where)
+        self.assertIn('"persona_id" =', where)
+        self.assertNotIn('CASE', sql)
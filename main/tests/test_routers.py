@@ -0,0 +1,99 @@
+# Django imports
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.urlresolvers import reverse
+from django.db import connections
+
+# Locale imports
+from .base_test import CustomBaseTestCase
+from ..models import TipoIngreso
+from ..routers import COOKIE_ESCRITURA, DATABASE_LECTURA, LecturaRouter, lectura
+
+# Python imports
+from unittest import mock
+
+
+class LecturaRouterTest(CustomBaseTestCase):
+    """Pruebas para el router de la base de datos de lectura, con una replica en sqlite."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # la replica es otra base de datos en memoria, con las mismas tablas
+        connections.databases[DATABASE_LECTURA] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}
+        call_command('migrate', database=DATABASE_LECTURA, verbosity=0, interactive=False)
+
+    @classmethod
+    def tearDownClass(cls):
+        # la conexion en memoria se cierra directamente, Django no cierra las bases de datos en memoria
+        connections[DATABASE_LECTURA].connection.close()
+        del connections[DATABASE_LECTURA]
+        del connections.databases[DATABASE_LECTURA]
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        user = self.get_user()
+        user.is_staff = user.is_superuser = True
+        user.save()
+        self.client.login(email=user.email, password=self.RAW_STRING)
+
+        TipoIngreso.objects.create(nombre='principal')
+        TipoIngreso.objects.using(DATABASE_LECTURA).create(nombre='replica')
+        self.addCleanup(lambda: TipoIngreso.objects.using(DATABASE_LECTURA).all().delete())
+
+    def test_router(self):
+        """Verifica que solo los datos de la aplicacion en un contexto de lectura vayan a la replica."""
+
+        router = LecturaRouter()
+        self.assertIsNone(router.db_for_read(TipoIngreso))
+        with lectura():
+            self.assertEqual(router.db_for_read(TipoIngreso), DATABASE_LECTURA)
+            # los usuarios y las sesiones siempre se leen de la principal
+            self.assertIsNone(router.db_for_read(get_user_model()))
+            self.assertIsNone(router.db_for_write(TipoIngreso))
+        self.assertIsNone(router.db_for_read(TipoIngreso))
+
+    def test_home_lee_la_replica(self):
+        """Verifica que el dashboard lea los datos de la replica."""
+
+        response = self.client.get(reverse('main:home'))
+
+        self.assertIn('replica', response.context['totales'])
+        self.assertNotIn('principal', response.context['totales'])
+
+    def test_lee_lo_escrito_despues_de_un_post(self):
+        """Verifica que despues de un POST el usuario lea de la principal, y vea lo que guardo."""
+
+        response = self.client.post(reverse('main:crear_tipo_ingreso'), {'nombre': 'nuevo'})
+        self.assertIn(COOKIE_ESCRITURA, response.cookies)
+
+        response = self.client.get(reverse('main:home'))
+        self.assertIn('principal', response.context['totales'])
+        self.assertIn('nuevo', response.context['totales'])
+
+        # cuando vence la cookie se vuelve a leer la replica
+        del self.client.cookies[COOKIE_ESCRITURA]
+        response = self.client.get(reverse('main:home'))
+        self.assertNotIn('nuevo', response.context['totales'])
+
+    def test_post_de_reporte_no_fija_la_principal(self):
+        """Verifica que los POST de los reportes, que solo leen, no cambien la base de datos del usuario."""
+
+        response = self.client.post(
+            reverse('main:listar_sobres'), {'fecha_inicial': '2016-12-01', 'fecha_final': '2016-12-31'}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(COOKIE_ESCRITURA, response.cookies)
+
+    def test_sin_replica(self):
+        """Verifica que sin la replica configurada se lea de la principal y no se marque al usuario."""
+
+        with mock.patch.dict(connections.databases):
+            del connections.databases[DATABASE_LECTURA]
+            response = self.client.post(reverse('main:crear_tipo_ingreso'), {'nombre': 'nuevo'})
+            self.assertNotIn(COOKIE_ESCRITURA, response.cookies)
+
+            response = self.client.get(reverse('main:home'))
+            self.assertIn('principal', response.context['totales'])
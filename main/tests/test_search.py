@@ -0,0 +1,99 @@
+# Locale imports
+from .base_test import CustomBaseTestCase
+from ..models import Persona
+from ..search import MemoryPersonaSearch, cedula_prefix_ranges, invalidar_busquedas
+
+
+class MemoryPersonaSearchTest(CustomBaseTestCase):
+    """Pruebas para el motor de busqueda de personas en memoria."""
+
+    def setUp(self):
+        super().setUp()
+        self.backend = MemoryPersonaSearch()
+        self.juan = Persona.objects.create(
+            nombre='Juan', primer_apellido='Perez', segundo_apellido='Gomez', cedula=1045678
+        )
+        self.juana = Persona.objects.create(
+            nombre='Juana', primer_apellido='Lopez', segundo_apellido='', cedula=1049999
+        )
+        self.pedro = Persona.objects.create(
+            nombre='Pedro', primer_apellido='Martinez', segundo_apellido='Juanes', cedula=71234
+        )
+
+    def test_cedula_prefix_ranges(self):
+        """Verifica que los rangos de cedulas contengan las cedulas con el prefijo."""
+
+        ranges = cedula_prefix_ranges('104')
+        # se verifica que cada cedula con el prefijo este en algun rango
+        for cedula in (104, 1045, 1045678, 1049999):
+            self.assertTrue(any(inicio <= cedula <= fin for inicio, fin in ranges))
+        # se verifica que las demas no esten
+        for cedula in (10, 105, 71234, 2045678):
+            self.assertFalse(any(inicio <= cedula <= fin for inicio, fin in ranges))
+
+    def test_search_by_prefix(self):
+        """Verifica que se encuentren las personas por el prefijo del nombre, las palabras cortas primero."""
+
+        personas = self.backend.search('JUAN')
+        # juan va primero porque la palabra es exacta
+        self.assertEqual(personas[0], self.juan)
+        self.assertEqual(set(personas), {self.juan, self.juana, self.pedro})
+
+    def test_search_by_substring(self):
+        """Verifica que se encuentren las personas por subcadenas del nombre."""
+
+        self.assertEqual(self.backend.search('artin'), [self.pedro])
+
+    def test_search_by_several_words(self):
+        """Verifica que todas las palabras deban estar en el nombre."""
+
+        self.assertEqual(self.backend.search('juan per'), [self.juan])
+
+    def test_search_by_cedula(self):
+        """Verifica la busqueda por prefijo de cedula."""
+
+        self.assertEqual(self.backend.search('104'), [self.juan, self.juana])
+        self.assertEqual(self.backend.search('7123'), [self.pedro])
+
+    def test_search_limit(self):
+        """Verifica que no se retornen mas resultados que el limite."""
+
+        self.assertEqual(len(self.backend.search('juan', limit=1)), 1)
+
+    def test_search_offset(self):
+        """Verifica que offset salte los primeros resultados."""
+
+        self.assertEqual(self.backend.search('juan', limit=2, offset=1), self.backend.search('juan')[1:3])
+        self.assertEqual(self.backend.search('104', offset=1), [self.juana])
+
+    def test_search_cedula_polimorfico(self):
+        """Verifica que search_cedula tenga la firma y el resultado de la clase base."""
+
+        self.assertEqual(self.backend.search_cedula('104', 10, 1), [self.juana])
+        self.backend.load()
+        self.assertEqual(self.backend.ids_cedula('104', 10), [self.juan.id, self.juana.id])
+
+    def test_index_reloaded_on_changes(self):
+        """Verifica que el indice se vuelva a cargar al guardar y eliminar personas."""
+
+        # se carga el indice
+        self.backend.search('juan')
+
+        self.pedro.nombre = 'Pablo'
+        self.pedro.save()
+        self.assertEqual(self.backend.search('pablo'), [self.pedro])
+        self.assertEqual(self.backend.search('pedro'), [])
+
+        self.juana.delete()
+        self.assertEqual(self.backend.search('lopez'), [])
+
+    def test_index_reloaded_on_version_change(self):
+        """Verifica que el indice de un proceso se cargue de nuevo cuando otro proceso cambia las personas."""
+
+        self.backend.search('juan')
+        # bulk_create no envia señales, como una persona creada en otro proceso
+        Persona.objects.bulk_create([Persona(nombre='Maria', primer_apellido='Diaz', cedula=555)])
+        self.assertEqual(self.backend.search('maria'), [])
+
+        invalidar_busquedas()
+        self.assertEqual([persona.nombre for persona in self.backend.search('maria')], ['Maria'])
@@ -120,6 +120,23 @@ class HomeViewTest(ViewTestCase):
     def test_get_response_is_template(self):
         super().response_is_template()
 
+    def test_totales_del_mes(self):
+        """Verifica que los totales del mes se lean del resumen mensual."""
+
+        # se crea un sobre de hoy
+        sobre = self.create_object(Sobre)
+        # se crea un superusuario para ver el dashboard
+        user = self.get_user()
+        user.is_superuser = True
+        user.save()
+
+        response = self.GET()
+
+        self.assertEqual(response.context['total_mes'], sobre.valor)
+        self.assertEqual(response.context['numero_sobres_mes'], 1)
+        self.assertEqual(response.context['total_sin_diligenciar'], 0)
+        self.assertIn(sobre.tipo_ingreso.nombre, response.context['totales'])
+
 
 class LogoutViewTest(ViewTestCase):
     """Pruebas para la vista de logout_view."""
@@ -200,6 +217,23 @@ class ListarSobresTest(ViewTestCase):
         self.assertContains(response, sobre.valor)
         self.assertContains(response, sobre.persona.nombre)
         self.assertContains(response, reverse(self.url_base.format('editar_sobre'), args=(sobre.id, )))
+        # con sobres la tabla pide las demas paginas al servidor
+        self.assertTrue(response.context['paginar_servidor'])
+        self.assertContains(response, 'data-server-side="true"')
+
+    def test_sin_sobres_no_pagina_en_servidor(self):
+        """Verifica que sin sobres la tabla no se pagine en el servidor."""
+        # se crean los datos
+        hoy = datetime.date.today().strftime(constants.DATE_FORMAT)
+        # se crea la peticion POST
+        response = self.POST(data={
+            'fecha_inicial': hoy,
+            'fecha_final': hoy
+        })
+
+        # el cursor vacio se serializa como "null", pero no activa la paginacion en el servidor
+        self.assertFalse(response.context['paginar_servidor'])
+        self.assertNotContains(response, 'data-server-side="true"')
 
 
 class ReporteContribuciones(ViewTestCase):
@@ -385,17 +419,17 @@ class SobreCreateTest(ViewTestCase):
         # verifica que la fecha esté en la vista
         self.assertContains(response, hoy)
 
-    def test_personas_in_context(self):
-        """Verifica que las personas esten en el contexto."""
+    def test_personas_not_in_context(self):
+        """Verifica que las personas no se envien en el contexto, se buscan con el api."""
 
         # hace un GET
         response = self.GET()
-        # verifica que este las personas dentro del contexto
-        self.assertIn('personas', response.context)
+        # verifica que no esten las personas dentro del contexto
+        self.assertNotIn('personas', response.context)
         # hace un POST
         response = self.POST()
-        # verifica que este las personas dentro del contexto
-        self.assertIn('personas', response.context)
+        # verifica que no esten las personas dentro del contexto
+        self.assertNotIn('personas', response.context)
 
 
 class SobreUpdateTest(ViewTestCase):
@@ -433,17 +467,17 @@ class SobreUpdateTest(ViewTestCase):
         url = self.view.success_url
         self.assertRedirects(response, reverse(url, args=(self.instance.id, )).__str__())
 
-    def test_personas_in_context(self):
-        """Verifica que las personas esten en el contexto."""
+    def test_personas_not_in_context(self):
+        """Verifica que las personas no se envien en el contexto, se buscan con el api."""
 
         # hace un GET
         response = self.GET()
-        # verifica que este las personas dentro del contexto
-        self.assertIn('personas', response.context)
+        # verifica que no esten las personas dentro del contexto
+        self.assertNotIn('personas', response.context)
         # hace un POST
         response = self.POST()
-        # verifica que este las personas dentro del contexto
-        self.assertIn('personas', response.context)
+        # verifica que no esten las personas dentro del contexto
+        self.assertNotIn('personas', response.context)
 
 
 class PersonaCreateTest(ViewTestCase):
@@ -11,9 +11,12 @@ from .views import (
     PersonaCreate, PersonaUpdate, TipoIngresoCreate, TipoIngresoUpdate,
     ObservacionCreate, ObservacionUpdate, SobreList, PersonaList,
     TipoIngresoList, ObservacionList, reporte_contribuciones, listar_sobres,
-    UserCreate, UserList, SetPasswordView
+    UserCreate, UserList, SetPasswordView, ingresar_sobres_lote
+)
+from .api import (
+    get_persona_api, get_personas_api, listar_sobres_api, get_importacion_api, crear_sobres_api,
+    get_contadores_login_api
 )
-from .api import get_persona_api, get_personas_api
 
 
 urlpatterns = [
@@ -24,6 +27,7 @@ urlpatterns = [
     url(r'^sobres/crear/$', SobreCreate.as_view(), name='crear_sobre'),
     url(r'^sobres/editar/(?P<pk>\d+)/$', SobreUpdate.as_view(), name='editar_sobre'),
     url(r'^sobres/lista/$', listar_sobres, name='listar_sobres'),
+    url(r'^sobres/lote/$', ingresar_sobres_lote, name='ingresar_sobres_lote'),
     url(r'^personas/crear/$', PersonaCreate.as_view(), name='crear_persona'),
     url(r'^personas/editar/(?P<pk>\d+)/$', PersonaUpdate.as_view(), name='editar_persona'),
     url(r'^personas/lista/$', PersonaList.as_view(), name='listar_personas'),
@@ -40,4 +44,8 @@ urlpatterns = [
     # API
     url(r'^api/v1\.1/persona/(?P<id_persona>\d+)/$', get_persona_api, name='api>get_persona'),
     url(r'^api/v1\.1/persona/all/$', get_personas_api, name='api>get_personas'),
+    url(r'^api/v1\.1/sobres/$', listar_sobres_api, name='api>listar_sobres'),
+    url(r'^api/v1\.1/importaciones/(?P<pk>\d+)/$', get_importacion_api, name='api>get_importacion'),
+    url(r'^api/v1\.1/sobres/lote/$', crear_sobres_api, name='api>crear_sobres'),
+    url(r'^api/v1\.1/login/contadores/$', get_contadores_login_api, name='api>contadores_login'),
 ]
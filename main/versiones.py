@@ -0,0 +1,37 @@
+"""
+Versiones de los datos en cache.
+
+Los datos se guardan en cache con la version en la llave, y para invalidarlos todos se
+cambia la version. Las versiones son valores aleatorios que no se repiten: si la llave de
+la version sale del cache (por el LRU o el cull del cache en archivos) la nueva version
+no coincide con la de las llaves viejas que sigan en cache.
+"""
+
+# Django imports
+from django.core.cache import cache as default_cache
+
+# Python imports
+import uuid
+
+
+__author__ = 'German Alzate'
+
+
+def nueva_version():
+    return uuid.uuid4().hex
+
+
+def get_version(llave, cache=default_cache):
+    """Retorna la version actual de la llave, si no existe crea una nueva."""
+    version = cache.get(llave)
+    if version is None:
+        # si otro proceso la crea primero, se usa la de ese proceso
+        version = nueva_version()
+        if not cache.add(llave, version, None):
+            version = cache.get(llave, version)
+    return version
+
+
+def invalidar(llave, cache=default_cache):
+    """Cambia la version de la llave, invalidando todos los datos guardados con la anterior."""
+    cache.set(llave, nueva_version(), None)
@@ -3,7 +3,7 @@ from django.contrib import messages
 from django.contrib.auth import login, logout, get_user_model
 from django.contrib.auth.decorators import login_required
 from django.core.urlresolvers import reverse, reverse_lazy
-from django.db.models import Sum
+from django.db.models import Case, F, IntegerField, Q, Sum, Value, When
 from django.shortcuts import render, redirect
 from django.utils.translation import ugettext as _, activate
 from django.views.generic.edit import CreateView, UpdateView
@@ -13,9 +13,14 @@ from django.template.defaultfilters import date as date_name
 
 # Locale imports
 from .constants import MAIN, ERROR_FORM, INFO_FORM, DATE_FORMAT
-from .decorators import group_required
+from .datatables import SobreDataTable
+from .decorators import group_required, solo_lectura
 from .mixins import CustomMixinView, FechasRangoFormMixin
-from .models import Sobre, Persona, Observacion, TipoIngreso
+from .models import Sobre, Persona, Observacion, TipoIngreso, SobreMonthlyRollup
+from .permisos import get_grupos
+from .reports import tabla_contribuciones
+from .limites import get_ip
+from .lotes import MAXIMO_LOTE
 from .forms import (
     FormularioLogearUsuario, FormularioCrearSobre, FormularioCrearPersona,
     FormularioCrearTipoIngreso, FormularioCrearObservacion,
@@ -25,9 +30,11 @@ from .forms import (
 
 # Python imports
 from collections import OrderedDict
+from functools import reduce
 import datetime
 import calendar
 import json
+import operator
 
 
 def login_view(request):
@@ -47,7 +54,7 @@ def login_view(request):
 
     if request.method == 'POST':
         # se crea el formulario con los datos del POST
-        form = FormularioLogearUsuario(data=request.POST)
+        form = FormularioLogearUsuario(data=request.POST, ip=get_ip(request))
 
         if form.is_valid():
             # se logea el usuario apra el request, en caso de ser valido
@@ -72,80 +79,51 @@ def login_view(request):
 
 
 @login_required
+@solo_lectura
 def home_view(request):
     """Vista que retorna el inicio."""
 
     user = request.user
     data = {}
 
-    if user.groups.filter(name__icontains='administrador').exists() or user.is_superuser:
+    if any('administrador' in grupo.lower() for grupo in get_grupos(user)) or user.is_superuser:
         # (group_required('administrador')(user)(request))
-        _hoy = timezone.now().date()
-        hoy = _hoy
-        inicio_mes = datetime.date(year=hoy.year, month=hoy.month, day=1)
-
-        hoy += datetime.timedelta(days=1)
-
-        rango_mes = (inicio_mes, hoy)
-
-        sobres = Sobre.objects.filter(
-            fecha__range=rango_mes
+        hoy = timezone.now().date()
+
+        # se leen los totales del resumen mensual, no de los sobres
+        mes_actual = SobreMonthlyRollup.objects.filter(year=hoy.year, month=hoy.month).aggregate(
+            total=Sum('total'), numero_sobres=Sum('cantidad'),
+            sin_diligenciar=Sum(Case(
+                When(diligenciado=False, then=F('cantidad')), default=Value(0), output_field=IntegerField()
+            ))
         )
 
-        total = sobres.aggregate(total=Sum('valor'))['total'] or 0
         data['admin'] = True
-        data['total_mes'] = total
-        data['numero_sobres_mes'] = sobres.count()
-        data['total_sin_diligenciar'] = sobres.filter(diligenciado=False).count()
-
-        totales = {}
-
-        _tipos = TipoIngreso.objects.all().values_list('nombre', flat=True)
-
-        start = hoy.month - 5
-        end = hoy.month + 1
-        year = hoy.year
-
-        if start < 5:
-            start = 12 - 5 + hoy.month
-        if end < start:
-            end = 12 + end
-
-        for month in range(start, end):
-            if end >= 14:
-                if month >= 13:
-                    year = hoy.year
-                else:
-                    year = hoy.year - 1
-
-            if month > 12:
-                month -= 12
-
-            sobres = Sobre.objects.filter(
-                fecha__month=month, fecha__year=year
-            ).values('tipo_ingreso__nombre').annotate(total=Sum('valor'))
-
-            mes = date_name(datetime.date(year=year, month=month, day=1), 'F')
-
-            tipos = [x for x in _tipos]
-
-            for tipo in sobres:
-                if tipo['tipo_ingreso__nombre'] not in totales:
-                    totales[tipo['tipo_ingreso__nombre']] = OrderedDict(
-                        {mes: tipo['total']}
-                    )
-                else:
-                    totales[tipo['tipo_ingreso__nombre']][mes] = tipo['total']
+        data['total_mes'] = mes_actual['total'] or 0
+        data['numero_sobres_mes'] = mes_actual['numero_sobres'] or 0
+        data['total_sin_diligenciar'] = mes_actual['sin_diligenciar'] or 0
+
+        # se calculan los ultimos seis meses, incluyendo el actual
+        meses = []
+        year, month = hoy.year, hoy.month
+        for _mes in range(6):
+            meses.insert(0, (year, month))
+            year, month = (year - 1, 12) if month == 1 else (year, month - 1)
+
+        # se crea la tabla de totales, con todos los tipos de ingreso en cero
+        totales = OrderedDict()
+        for tipo in TipoIngreso.objects.all().values_list('nombre', flat=True):
+            totales[tipo] = OrderedDict(
+                (date_name(datetime.date(year=year, month=month, day=1), 'F'), 0) for year, month in meses
+            )
 
-                tipos.remove(tipo['tipo_ingreso__nombre'])
+        queryset = SobreMonthlyRollup.objects.filter(
+            reduce(operator.or_, [Q(year=year, month=month) for year, month in meses])
+        ).values('year', 'month', 'tipo_ingreso__nombre').annotate(total=Sum('total'))
 
-            for tipo in tipos:
-                if tipo in totales:
-                    totales[tipo][mes] = 0
-                else:
-                    totales[tipo] = OrderedDict({
-                        mes: 0
-                    })
+        for tipo in queryset:
+            mes = date_name(datetime.date(year=tipo['year'], month=tipo['month'], day=1), 'F')
+            totales[tipo['tipo_ingreso__nombre']][mes] = tipo['total']
 
         data['totales'] = json.dumps(totales)
 
@@ -159,6 +137,7 @@ def logout_view(request):
 
 
 @group_required('administrador')
+@solo_lectura
 def listar_sobres(request):
     """Vista para listar los sobres, de acuerdo a un rango de fecha."""
 
@@ -171,15 +150,15 @@ def listar_sobres(request):
             fecha_inicial = form.cleaned_data.get('fecha_inicial')
             fecha_final = form.cleaned_data.get('fecha_final') + datetime.timedelta(days=1)
 
-            sobres = Sobre.objects.filter(
-                fecha__range=(fecha_inicial, fecha_final)
-            ).select_related('persona', 'tipo_ingreso', 'observaciones').only(
-                'fecha', 'diligenciado', 'valor', 'forma_pago', 'persona', 'tipo_ingreso',
-                'observaciones'
-            )
+            sobres = Sobre.objects.listado(fecha_inicial, fecha_final)
 
-            sobres = sobres.iterator()
-            data['sobre_list'] = sobres
+            # solo se dibuja la primera pagina, las demas se piden al api de DataTables
+            sobre_list, total_sobres, cursor = SobreDataTable(sobres, {}).get_first_page()
+            data['sobre_list'] = sobre_list
+            data['total_sobres'] = total_sobres
+            # sin filas no hay paginas que pedir al servidor, la tabla se dibuja en el cliente
+            data['paginar_servidor'] = cursor is not None
+            data['cursor'] = json.dumps(cursor)
 
             messages.success(
                 request,
@@ -198,7 +177,22 @@ def listar_sobres(request):
     return render(request, MAIN.format('listar_sobres.html'), data)
 
 
+@group_required('administrador', 'digitador')
+def ingresar_sobres_lote(request):
+    """Vista para ingresar sobres en una grilla, que se guardan por lotes con el api."""
+
+    data = {
+        'tipos_ingreso': TipoIngreso.objects.order_by('nombre'),
+        'observaciones': Observacion.objects.order_by('texto'),
+        'formas_pago': Sobre.FORMAS_PAGO,
+        'maximo_lote': MAXIMO_LOTE,
+    }
+
+    return render(request, MAIN.format('ingresar_sobres_lote.html'), data)
+
+
 @group_required('consultas', 'administrador')
+@solo_lectura
 def reporte_contribuciones(request):
     """Reporte de personas totalizada por contribuciones"""
 
@@ -224,47 +218,8 @@ def reporte_contribuciones(request):
                 # lo añade a los argumentos
                 queryset_kwargs['persona'] = persona
 
-            # se crea la tabla, de forma ordenada, para que sea a menera cola
-            tabla = OrderedDict({'TOTAL': {'total': 0}})
-
-            # se recorren todos los tipos de ingresos
-            queryset = TipoIngreso.objects.prefetch_related('sobres').all()
-            for tipo in queryset.iterator():
-                total = 0
-                # se crea una variable temporal, para guardar los totales por tipo de ingreso
-                _totales = {'total': 0}  # se inicializa un total a 0
-
-                # se filtra con los argumentos de llave valor, creados antes
-                sobres = tipo.sobres.filter(**queryset_kwargs)
-
-                # se recorren las formas de pago que tienen los sobres
-                for forma in Sobre.FORMAS_PAGO:
-                    # forma = ('FO', 'FORMA DE PAGO'), representacion de forma de pago
-                    _sobres = sobres.filter(forma_pago=forma[0])  # se filtra por el primer valor de la tupla
-                    # se crea una variable temporal, para guardar los totales por forma de pago
-                    totales = _sobres.aggregate(
-                        **{forma[1]: Sum('valor')}  # seria la forma de pago con la suma de los valores
-                    )
-
-                    # si no hay valores, lo asigna a 0
-                    totales[forma[1]] = totales[forma[1]] or 0
-                    # actualiza el total de el diccionario de tipo de ingreso
-                    _totales['total'] += totales[forma[1]]
-                    _totales.update(totales)
-
-                    # agrega los totales por forma de pago valores a la tabla principal
-                    if forma[1] in tabla['TOTAL']:
-                        tabla['TOTAL'][forma[1]] += totales[forma[1]]
-                    else:
-                        tabla['TOTAL'][forma[1]] = totales[forma[1]]
-
-                # agrega los totales por tipo de ingreso a la tabla
-                tabla['TOTAL']['total'] += _totales['total']
-
-                # agrega los datos a la tabla
-                tabla.update({str(tipo): _totales})
-            # se vuelve a ordenar la tabla de manera inversa para que el total salga de ultimo
-            data['tabla'] = OrderedDict(reversed(list(tabla.items())))
+            # se calcula la tabla de totales en una sola consulta
+            data['tabla'] = tabla_contribuciones(**queryset_kwargs)
             # se muestra el mensaje
             messages.success(
                 request,
@@ -295,11 +250,6 @@ class SobreCreate(CustomMixinView, CreateView):
     template_name = MAIN.format('crear_sobre.html')
     group_required = ('administrador', 'digitador', )
 
-    def render_to_response(self, context, **response_kwargs):
-        persona_queryset = Persona.objects.all().only('nombre', 'primer_apellido', 'cedula')
-        context['personas'] = persona_queryset.iterator()  # agrega el queryset de personas
-        return super().render_to_response(context, **response_kwargs)
-
     def form_valid(self, form):
         self._valid_form = form  # se guarda el formulario valido
         return super().form_valid(form)
@@ -336,11 +286,6 @@ class SobreUpdate(CustomMixinView, UpdateView):
     template_name = MAIN.format('crear_sobre.html')
     group_required = ('administrador', )
 
-    def render_to_response(self, context, **response_kwargs):
-        persona_queryset = Persona.objects.all().only('nombre', 'primer_apellido', 'cedula')
-        context['personas'] = persona_queryset.iterator()  # agrega el queryset de personas
-        return super().render_to_response(context, **response_kwargs)
-
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()  # obtiene las llaves/valor de el formulario
         if self.object.persona is not None: